@@ -1,7 +1,10 @@
 """Quirks common helpers."""
 
 import asyncio
+from collections.abc import Awaitable, Callable
 import datetime
+import statistics
+import time
 
 ZCL_IAS_MOTION_COMMAND = b"\t!\x00\x01\x00\x00\x00\x00\x00"
 ZCL_OCC_ATTR_RPT_OCC = b"\x18d\n\x00\x00\x18\x01"
@@ -53,3 +56,66 @@ async def wait_for_zigpy_tasks() -> None:
             tasks.append(task)
 
     await asyncio.gather(*tasks)
+
+
+class Benchmark:
+    """Time a benchmark and collect its results.
+
+    Without full rounds, every benchmark runs once as a smoke test.
+    """
+
+    def __init__(self, name: str, results: list[dict], *, rounds: int | None) -> None:
+        """Init instance."""
+        self.name = name
+        self.full = rounds is not None
+        self.rounds = rounds or 1
+        self._results = results
+
+    def _record(self, times: list[float], iterations: int, **extra) -> None:
+        per_op = [t / iterations for t in times]
+        self._results.append(
+            {
+                "name": self.name,
+                "rounds": len(times),
+                "iterations": iterations,
+                "min": min(per_op),
+                "max": max(per_op),
+                "mean": statistics.fmean(per_op),
+                "median": statistics.median(per_op),
+                "stdev": statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+                "ops": iterations / statistics.median(times),
+                **extra,
+            }
+        )
+
+    def __call__(self, func: Callable[[], object], iterations: int = 1, **extra):
+        """Time `iterations` calls of `func` per round."""
+        iterations = iterations if self.full else 1
+        times = []
+
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            times.append(time.perf_counter() - start)
+
+        self._record(times, iterations, **extra)
+
+    async def run_async(
+        self, func: Callable[[], Awaitable[object]], iterations: int = 1, **extra
+    ):
+        """Time `iterations` awaited calls of `func` per round."""
+        iterations = iterations if self.full else 1
+        times = []
+
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await func()
+            times.append(time.perf_counter() - start)
+
+        self._record(times, iterations, **extra)
+
+    def timed(self, func: Callable[[], float], **extra):
+        """Record the durations measured by `func` itself, e.g. in a subprocess."""
+        self._record([func() for _ in range(self.rounds)], 1, **extra)
@@ -1,5 +1,8 @@
 """Fixtures for all tests."""
 
+from importlib.metadata import PackageNotFoundError, version
+import json
+import platform
 from unittest.mock import AsyncMock, Mock
 
 import pytest
@@ -23,6 +26,9 @@ from zhaquirks.const import (
 )
 
 from .async_mock import sentinel
+from .common import Benchmark
+
+BENCHMARK_RESULTS = pytest.StashKey[list[dict]]()
 
 
 class MockApp(zigpy.application.ControllerApplication):
@@ -271,3 +277,65 @@ def assert_signature_matches_quirk():
         assert isinstance(device, quirk)
 
     return _check
+
+
+def pytest_addoption(parser):
+    """Add the benchmark options."""
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-json",
+        metavar="PATH",
+        default=None,
+        help="run the benchmarks in full and write their results as JSON to PATH",
+    )
+    group.addoption(
+        "--benchmark-rounds",
+        type=int,
+        default=10,
+        help="number of rounds of every benchmark when run in full",
+    )
+
+
+def pytest_configure(config):
+    """Collect the benchmark results of the session."""
+    config.stash[BENCHMARK_RESULTS] = []
+
+
+def _package_version(name: str) -> str | None:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def pytest_sessionfinish(session):
+    """Write the benchmark results."""
+    path = session.config.getoption("--benchmark-json")
+    if path is None:
+        return
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "version": 1,
+                "python": platform.python_version(),
+                "zigpy": _package_version("zigpy"),
+                "zha-quirks": _package_version("zha-quirks"),
+                "benchmarks": session.config.stash[BENCHMARK_RESULTS],
+            },
+            file,
+            indent=1,
+        )
+
+
+@pytest.fixture
+def benchmark(request):
+    """Return a benchmark timer, running once unless `--benchmark-json` is given."""
+    config = request.config
+    full = config.getoption("--benchmark-json") is not None
+
+    return Benchmark(
+        request.node.name,
+        config.stash[BENCHMARK_RESULTS],
+        rounds=config.getoption("--benchmark-rounds") if full else None,
+    )
@@ -0,0 +1,176 @@
+"""Benchmarks of quirk hot paths.
+
+Every benchmark runs once as part of the test suite. Run them in full with
+`pytest tests/test_benchmarks.py --benchmark-json=results.json` to compare the
+results between releases.
+"""
+
+import json
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+import zigpy.quirks as zq
+import zigpy.types as t
+from zigpy.zcl import foundation
+
+from tests.common import wait_for_zigpy_tasks
+from tests.test_quirks import ALL_QUIRK_CLASSES
+import zhaquirks
+import zhaquirks.philips.rwl022
+import zhaquirks.tuya.ts0601_dimmer
+import zhaquirks.xiaomi.aqara.motion_aq2
+import zhaquirks.xiaomi.aqara.smoke
+
+zhaquirks.setup()
+
+SETUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import zhaquirks
+zhaquirks.setup(lazy=sys.argv[1] == "lazy")
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+@pytest.mark.parametrize("mode", ("eager", "lazy"))
+def test_benchmark_setup_cold_import(benchmark, mode):
+    """Benchmark `zhaquirks.setup()` in a fresh interpreter."""
+    if not benchmark.full:
+        pytest.skip("cold imports only run with --benchmark-json")
+
+    def _setup() -> float:
+        output = subprocess.run(
+            [sys.executable, "-c", SETUP_SCRIPT, mode],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    benchmark.timed(_setup)
+
+
+async def test_benchmark_quirk_matching(benchmark, zigpy_device_from_quirk):
+    """Benchmark matching the raw devices of all quirks against the registry."""
+    raw_devices = [
+        zigpy_device_from_quirk(quirk, apply_quirk=False) for quirk in ALL_QUIRK_CLASSES
+    ]
+
+    def _match():
+        for raw_device in raw_devices:
+            zq.get_device(raw_device)
+
+    benchmark(_match, iterations=5, devices=len(raw_devices))
+
+
+@pytest.mark.parametrize(
+    "quirk, endpoint_id, cluster_id, frame",
+    (
+        pytest.param(
+            zhaquirks.tuya.ts0601_dimmer.TuyaDoubleSwitchDimmer,
+            1,
+            0xEF00,
+            b"\x09\xe0\x02\x0b\x33\x01\x01\x00\x01\x01\x02\x02\x00\x04\x00\x00\x01\xf4",
+            id="tuya_ef00",
+        ),
+        pytest.param(
+            zhaquirks.xiaomi.aqara.motion_aq2.MotionAQ2,
+            1,
+            0x0000,
+            b"\x1c_\x11\x12\n"
+            + bytes.fromhex(
+                "050042166C756D692E73656E736F725F6D6F74696F6E2E61713201FF42210121950B"
+                "0328160421A83105214400062401000000000A217CBE6410000B210900"
+            ),
+            id="xiaomi_ff01",
+        ),
+        pytest.param(
+            zhaquirks.xiaomi.aqara.smoke.LumiSensorSmokeAcn03,
+            1,
+            0xFCC0,
+            bytes.fromhex(
+                "1C5F11E10AF700413E0121360C0328190421A81305211E0006240200000000082111"
+                "010A2100000C20016620036720016821A800A0210000A12000A22000A32000A42000"
+                "A52000"
+            ),
+            id="xiaomi_00f7",
+        ),
+        pytest.param(
+            zhaquirks.philips.rwl022.PhilipsRWL022,
+            1,
+            0xFC00,
+            b"\x1d\x0b\x10\x0e\x00\x01\x00\x00\x30\x02\x00\x00\x00",
+            id="philips_remote",
+        ),
+    ),
+)
+async def test_benchmark_handle_frame(
+    benchmark, zigpy_device_from_quirk, *, quirk, endpoint_id, cluster_id, frame
+):
+    """Benchmark deserializing and handling a received frame."""
+    device = zigpy_device_from_quirk(quirk)
+    cluster = device.endpoints[endpoint_id].in_clusters.get(
+        cluster_id
+    ) or device.endpoints[endpoint_id].out_clusters.get(cluster_id)
+    listener = mock.Mock()
+    cluster.add_listener(listener)
+
+    packet = t.ZigbeePacket(
+        profile_id=260,
+        cluster_id=cluster_id,
+        src_ep=endpoint_id,
+        dst_ep=endpoint_id,
+        data=t.SerializableBytes(frame),
+    )
+
+    # the frame must reach the quirk, not fail to deserialize
+    device.packet_received(packet)
+    assert listener.mock_calls
+
+    benchmark(lambda: device.packet_received(packet), iterations=1000)
+
+
+@pytest.mark.parametrize(
+    "quirk, endpoint_id, cluster_name, attributes",
+    (
+        pytest.param(
+            zhaquirks.tuya.ts0601_dimmer.TuyaDoubleSwitchDimmer,
+            1,
+            "level",
+            {"minimum_level": 51},
+            id="tuya_mcu",
+        ),
+        pytest.param(
+            zhaquirks.xiaomi.aqara.smoke.LumiSensorSmokeAcn03,
+            1,
+            "opple_cluster",
+            {"buzzer_manual_mute": 1},
+            id="xiaomi_opple",
+        ),
+    ),
+)
+async def test_benchmark_write_attributes(
+    benchmark, zigpy_device_from_quirk, *, quirk, endpoint_id, cluster_name, attributes
+):
+    """Benchmark `write_attributes` until the frame is sent."""
+    device = zigpy_device_from_quirk(quirk)
+    cluster = getattr(device.endpoints[endpoint_id], cluster_name)
+
+    with mock.patch.object(
+        device,
+        "request",
+        mock.AsyncMock(
+            return_value=[[foundation.WriteAttributesStatusRecord(0)]],
+        ),
+    ) as request:
+
+        async def _write():
+            await cluster.write_attributes(attributes)
+            # Tuya datapoints are sent from a task
+            await wait_for_zigpy_tasks()
+
+        await benchmark.run_async(_write, iterations=1000)
+
+    assert request.call_count
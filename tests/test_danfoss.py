@@ -1,7 +1,9 @@
 """Tests the Danfoss quirk (all tests were written for the Popp eT093WRO)."""
 
+import asyncio
 from unittest import mock
 
+import pytest
 from zigpy.quirks import CustomCluster
 import zigpy.types as t
 from zigpy.zcl import foundation
@@ -237,3 +239,61 @@ async def test_customized_standardcluster(zigpy_device_from_quirk):
         assert result
         assert fail
         assert reports == [656]
+
+
+async def test_customized_standardcluster_concurrent(zigpy_device_from_quirk):
+    """Test manufacturer specific and standard requests are sent together."""
+    device = zigpy_device_from_quirk(zhaquirks.danfoss.thermostat.DanfossThermostat)
+    cluster = device.endpoints[1].thermostat
+
+    manuf_attr = cluster.AttributeDefs.open_window_detection.id
+    std_attr = cluster.AttributeDefs.local_temperature.id
+    started = []
+    release = asyncio.Event()
+
+    async def mock_read_attributes(attr_ids, *args, manufacturer=None, **kwargs):
+        started.append(attr_ids)
+        await release.wait()
+        if attr_ids == [manuf_attr] and fail:
+            raise TimeoutError
+        return [
+            [
+                foundation.ReadAttributeRecord(
+                    attrid, foundation.Status.SUCCESS, foundation.TypeValue()
+                )
+                for attrid in attr_ids
+            ]
+        ]
+
+    with mock.patch.object(
+        CustomCluster, "_read_attributes", side_effect=mock_read_attributes
+    ):
+        # both requests are in flight at the same time
+        fail = False
+        task = asyncio.create_task(cluster._read_attributes([std_attr, manuf_attr]))
+        await asyncio.sleep(0.01)
+        assert started == [[manuf_attr], [std_attr]]
+        release.set()
+        (records,) = await task
+        assert [r.attrid for r in records] == [manuf_attr, std_attr]
+
+        # a failing request marks its attributes as failed
+        fail = True
+        (records,) = await cluster._read_attributes([std_attr, manuf_attr])
+        assert [(r.attrid, r.status) for r in records] == [
+            (manuf_attr, foundation.Status.FAILURE),
+            (std_attr, foundation.Status.SUCCESS),
+        ]
+
+        # without the other request succeeding, the error is raised
+        with pytest.raises(TimeoutError):
+            await cluster._read_attributes([manuf_attr])
+
+        # the plain mixin sends the requests one after the other
+        started.clear()
+        with (
+            mock.patch.object(type(cluster), "split_concurrently", False),
+            pytest.raises(TimeoutError),
+        ):
+            await cluster._read_attributes([std_attr, manuf_attr])
+        assert started == [[manuf_attr]]
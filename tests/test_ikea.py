@@ -1,5 +1,6 @@
 """Tests for Ikea Starkvind quirks."""
 
+import asyncio
 from unittest import mock
 
 import pytest
@@ -7,7 +8,7 @@ from zigpy.zcl import foundation
 from zigpy.zcl.clusters.general import Basic, PowerConfiguration
 from zigpy.zcl.clusters.measurement import PM25
 
-from tests.common import ClusterListener
+from tests.common import ClusterListener, wait_for_zigpy_tasks
 import zhaquirks
 import zhaquirks.ikea.starkvind
 from zhaquirks.ikea.starkvind import IkeaAirpurifier
@@ -224,7 +225,7 @@ async def test_double_power_config_firmware(
         # battery pct might be updated again when the attribute read returned new firmware, check pct not doubled then
         # if firmware turned out to be old or still unknown, do not update battery pct again, as we doubled it already
         assert len(power_listener.attribute_updates) == expected_pct_updates
-        if expected_pct_updates > 2:
+        if expected_pct_updates == 2:
             assert power_listener.attribute_updates[1] == (battery_pct_id, pct_correct)
 
         # reset mocks for testing when sw_build_id is known next
@@ -250,3 +251,59 @@ async def test_double_power_config_firmware(
         # check log output if we expect a warning
         if expect_log_warning:
             assert f"sw_build_id is not a number: {firmware} for device" in caplog.text
+
+
+async def test_double_power_config_coalesced_reads(zigpy_device_from_quirk):
+    """Test battery reports share one sw_build_id read and the parsed firmware."""
+
+    device = zigpy_device_from_quirk(zhaquirks.ikea.fivebtnremote.IkeaTradfriRemote1)
+
+    basic_cluster = device.endpoints[1].basic
+    sw_build_id = Basic.AttributeDefs.sw_build_id.id
+
+    power_cluster = device.endpoints[1].power
+    power_listener = ClusterListener(power_cluster)
+    battery_pct_id = PowerConfiguration.AttributeDefs.battery_percentage_remaining.id
+
+    read_done = asyncio.Event()
+
+    async def mock_read(attributes, manufacturer=None):
+        await read_done.wait()
+        records = [
+            foundation.ReadAttributeRecord(
+                attr, foundation.Status.SUCCESS, foundation.TypeValue(None, "2.3.075")
+            )
+            for attr in attributes
+        ]
+        return (records,)
+
+    with mock.patch.object(
+        basic_cluster, "_read_attributes", mock.AsyncMock(side_effect=mock_read)
+    ) as request_mock:
+        power_cluster.update_attribute(battery_pct_id, 20)
+        power_cluster.update_attribute(battery_pct_id, 30)
+        await asyncio.sleep(0)
+        read_done.set()
+        await wait_for_zigpy_tasks()
+
+        assert request_mock.call_count == 1
+
+    # the reports are doubled in order once the read returned old firmware
+    assert power_listener.attribute_updates == [
+        (battery_pct_id, 20),
+        (battery_pct_id, 30),
+        (battery_pct_id, 40),
+        (battery_pct_id, 60),
+    ]
+
+    # the firmware is parsed again only when sw_build_id changes
+    with mock.patch("zhaquirks.ikea._LOGGER.warning") as warning_mock:
+        basic_cluster.update_attribute(sw_build_id, "a.b")
+        assert power_cluster._is_firmware_new()
+        assert power_cluster._is_firmware_new()
+        assert warning_mock.call_count == 1
+
+        basic_cluster.update_attribute(sw_build_id, "2.4.5")
+        assert power_cluster._is_firmware_new()
+        basic_cluster.update_attribute(sw_build_id, "2.3.075")
+        assert not power_cluster._is_firmware_new()
@@ -0,0 +1,84 @@
+"""Tests for the multi-press detector."""
+
+import asyncio
+from unittest import mock
+
+from zhaquirks.multipress import MultiPressDetector
+from zhaquirks.scheduler import get_deadline_scheduler
+
+
+async def test_multi_press_detector_presses():
+    """Test counting presses, with a maximum number of presses."""
+
+    on_presses = mock.Mock()
+    detector = MultiPressDetector(on_presses, window=0.02, max_presses=3)
+
+    assert detector.press() == 1
+    assert detector.press() == 2
+    assert detector in get_deadline_scheduler()
+    on_presses.assert_not_called()
+
+    await asyncio.sleep(0.04)
+    on_presses.assert_called_once_with(2)
+
+    # the maximum ends the sequence right away
+    on_presses.reset_mock()
+    for _ in range(3):
+        detector.press()
+    on_presses.assert_called_once_with(3)
+    assert detector not in get_deadline_scheduler()
+
+
+async def test_multi_press_detector_late_deadline():
+    """Test a press after the window starts a new sequence under loop load."""
+
+    loop = asyncio.get_running_loop()
+    on_presses = mock.Mock()
+    detector = MultiPressDetector(on_presses, window=0.02)
+
+    with mock.patch.object(loop, "time", return_value=100.0):
+        detector.press()
+    with mock.patch.object(loop, "time", return_value=100.5):
+        detector.press()
+
+    on_presses.assert_called_once_with(1)
+    assert detector.count == 1
+
+    detector.cancel()
+    assert detector.count == 0
+
+
+async def test_multi_press_detector_hold():
+    """Test holding and releasing a button."""
+
+    on_presses = mock.Mock()
+    on_hold = mock.Mock()
+    on_release = mock.Mock()
+    detector = MultiPressDetector(
+        on_presses,
+        window=0.02,
+        hold_time=0.03,
+        on_hold=on_hold,
+        on_release=on_release,
+    )
+
+    # a short press does not hold
+    detector.down()
+    detector.up()
+    await asyncio.sleep(0.05)
+    on_presses.assert_called_once_with(1)
+    on_hold.assert_not_called()
+
+    # a press followed by a hold reports the press first
+    on_presses.reset_mock()
+    detector.press()
+    detector.down()
+    await asyncio.sleep(0.05)
+    on_presses.assert_called_once_with(1)
+    on_hold.assert_called_once_with()
+    assert detector.held
+
+    detector.up()
+    assert not detector.held
+    assert on_release.call_count == 1
+    assert on_release.call_args[0][0] >= 0.03
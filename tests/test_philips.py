@@ -1,5 +1,6 @@
 """Tests for Philips quirks."""
 
+import asyncio
 from unittest import mock
 
 import pytest
@@ -33,7 +34,13 @@ from zhaquirks.const import (
     TURN_ON,
 )
 import zhaquirks.philips
-from zhaquirks.philips import Button, ButtonPressQueue, PhilipsRemoteCluster, PressType
+from zhaquirks.philips import (
+    Button,
+    ButtonPressQueue,
+    PhilipsRemoteCluster,
+    PhilipsRwlRemoteCluster,
+    PressType,
+)
 from zhaquirks.philips.rdm002 import PhilipsRDM002
 from zhaquirks.philips.rom001 import PhilipsROM001
 from zhaquirks.philips.rwl022 import PhilipsRWL022
@@ -628,7 +635,7 @@ def test_PhilipsRemoteCluster_long_press(
         (4),
     ),
 )
-def test_ButtonPressQueue_presses_without_pause(button_presses):
+async def test_ButtonPressQueue_presses_without_pause(button_presses):
     """Test ButtonPressQueue presses without pause in between presses."""
 
     q = ButtonPressQueue()
@@ -637,14 +644,10 @@ def test_ButtonPressQueue_presses_without_pause(button_presses):
     for _ in range(button_presses):
         q.press(cb)
 
-    # await cluster.button_press_queue._task
-    # Instead of awaiting the job, significantly extending the time
-    # these tests need, we just abort it and call the callback
-    # ourselves.
-    assert q._task is not None
-    q._task.cancel()
-    q._ms_last_click = 0
-    q._callback(q._click_counter)
+    assert q.count == button_presses
+    cb.assert_not_called()
+
+    await asyncio.sleep(0.07)
     cb.assert_called_once_with(button_presses)
 
 
@@ -665,7 +668,7 @@ async def test_ButtonPressQueue_presses_with_pause(press_sequence):
     for seq in press_sequence:
         for _ in range(seq):
             q.press(cb)
-        await q._task
+        await asyncio.sleep(0.07)
 
     assert cb.call_count == len(press_sequence)
 
@@ -676,6 +679,36 @@ async def test_ButtonPressQueue_presses_with_pause(press_sequence):
     cb.assert_has_calls(calls)
 
 
+async def test_PhilipsRemoteCluster_multi_press_threshold(zigpy_device_from_quirk):
+    """Test the multi-press threshold can be configured per quirk."""
+
+    device = zigpy_device_from_quirk(PhilipsRWL022)
+    cluster = device.endpoints[1].philips_remote_cluster
+    assert cluster.button_press_queue[1]._ms_threshold == 300
+
+    class FastRemoteCluster(PhilipsRwlRemoteCluster):
+        MULTI_PRESS_THRESHOLD_MS = 50
+
+    cluster = FastRemoteCluster(device.endpoints[1])
+    listener = mock.MagicMock()
+    cluster.add_listener(listener)
+
+    cluster.handle_cluster_request(ZCLHeader(), [1, 0, 2, 0, 0])
+    cluster.handle_cluster_request(ZCLHeader(), [1, 0, 2, 0, 0])
+    await asyncio.sleep(0.07)
+
+    listener.zha_send_event.assert_called_once_with(
+        "on_double_press",
+        {
+            "button": "on",
+            "press_type": "double_press",
+            "command_id": None,
+            "duration": 0,
+            "args": [1, 0, 4, 0, 0],
+        },
+    )
+
+
 def test_rdm002_triggers():
     """Ensure RDM002 triggers won't break."""
 
@@ -5,7 +5,12 @@ from __future__ import annotations
 import collections
 import importlib
 import json
+import os
 from pathlib import Path
+import subprocess
+import sys
+import threading
+import tracemalloc
 from unittest import mock
 
 import pytest
@@ -54,6 +59,13 @@ from zhaquirks.const import (
 )
 import zhaquirks.konke
 import zhaquirks.philips
+from zhaquirks.quirk_index import (
+    LazyQuirkLoader,
+    build_index,
+    iter_quirk_modules,
+    load_index,
+)
+from zhaquirks.quirk_profiler import QuirkImportProfiler
 from zhaquirks.xiaomi import XIAOMI_NODE_DESC
 import zhaquirks.xiaomi.aqara.vibration_aq1
 
@@ -569,6 +581,462 @@ class TestReplacementISWZPR1WP13(CustomDevice):
     assert type(zq.get_device(device)).__name__ == "TestReplacementISWZPR1WP13"
 
 
+CACHED_CUSTOM_QUIRK = '''
+"""Custom quirk for the cache tests."""
+from zigpy.quirks import CustomDevice
+from zigpy.zcl.clusters.general import Basic, OnOff
+
+from zhaquirks.const import ENDPOINTS, INPUT_CLUSTERS, MODELS_INFO, OUTPUT_CLUSTERS
+
+
+class CachedCustomDevice(CustomDevice):
+    """Custom device for the cache tests."""
+
+    signature = {
+        MODELS_INFO: [("Cached Manufacturer", "Cached Model")],
+        ENDPOINTS: {1: {INPUT_CLUSTERS: [Basic.cluster_id], OUTPUT_CLUSTERS: []}},
+    }
+
+    replacement = {
+        ENDPOINTS: {
+            1: {INPUT_CLUSTERS: [Basic.cluster_id, OnOff.cluster_id]},
+        }
+    }
+'''
+
+
+def test_custom_quirk_cache(zigpy_device_mock, tmp_path: Path) -> None:
+    """Ensure unchanged custom quirks are only executed for matching devices."""
+
+    custom_quirks = tmp_path / "custom_zha_quirks"
+    custom_quirks.mkdir()
+    (custom_quirks / "cached_quirk.py").write_text(CACHED_CUSTOM_QUIRK)
+    cache_path = tmp_path / "custom_quirks_cache.json"
+
+    def _setup():
+        zhaquirks.setup(
+            custom_quirks_path=str(custom_quirks),
+            custom_quirks_cache_path=str(cache_path),
+        )
+
+    device = zigpy_device_mock()
+    device.manufacturer = "Cached Manufacturer"
+    device.model = "Cached Model"
+    device.add_endpoint(1).add_input_cluster(zcl.clusters.general.Basic.cluster_id)
+
+    with mock.patch(
+        "zhaquirks._load_custom_quirk_module",
+        wraps=zhaquirks._load_custom_quirk_module,
+    ) as load_module:
+        # The first start executes the module and fills the cache
+        _setup()
+        assert load_module.call_count == 1
+
+        cache = json.loads(cache_path.read_text())
+        entry = cache["modules"][str(custom_quirks / "cached_quirk.py")]
+        assert entry["modname"] == "cached_quirk"
+        assert entry["signatures"] == [["Cached Manufacturer", "Cached Model"]]
+        assert entry["deferrable"] is True
+        assert entry["load_time"] >= 0
+
+        # The next start defers the module until a matching device is seen
+        load_module.reset_mock()
+        _setup()
+        assert load_module.call_count == 0
+        assert not zq.get_quirk_list("Cached Manufacturer", "Cached Model")
+
+        quirked = zq.get_device(device)
+        assert load_module.call_count == 1
+        assert type(quirked).__name__ == "CachedCustomDevice"
+
+        # Touching the file without changing it keeps the cache valid
+        load_module.reset_mock()
+        stat = (custom_quirks / "cached_quirk.py").stat()
+        os.utime(
+            custom_quirks / "cached_quirk.py",
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9),
+        )
+        _setup()
+        assert load_module.call_count == 0
+
+        # Changed modules are executed again
+        (custom_quirks / "cached_quirk.py").write_text(CACHED_CUSTOM_QUIRK + "\n")
+        _setup()
+        assert load_module.call_count == 1
+
+    zhaquirks.setup()
+
+
+def test_quirk_import_profiler(tmp_path: Path) -> None:
+    """Ensure the import profiler records every quirk module."""
+
+    custom_quirks = tmp_path / "custom_zha_quirks"
+    custom_quirks.mkdir()
+    (custom_quirks / "profiled_quirk.py").write_text(CACHED_CUSTOM_QUIRK)
+
+    profiler = QuirkImportProfiler()
+    zhaquirks.setup(custom_quirks_path=str(custom_quirks), profiler=profiler)
+    zhaquirks.setup()
+
+    assert not tracemalloc.is_tracing()
+    assert {"zhaquirks.bosch.motion", "profiled_quirk"} <= profiler.profiles.keys()
+
+    profile = profiler.profiles["profiled_quirk"]
+    assert profile.load_time > 0
+    assert profile.memory_peak > 0
+    assert (profile.v1_quirks, profile.v2_quirks) == (1, 0)
+
+    report = profiler.report("v1_quirks")
+    assert report[0].v1_quirks >= report[-1].v1_quirks
+
+    packages = {p.module: p for p in profiler.report(package_depth=2)}
+    assert packages["zhaquirks.bosch"].load_time >= (
+        profiler.profiles["zhaquirks.bosch.motion"].load_time
+    )
+
+    assert json.loads(profiler.to_json("module"))[0].keys() == {
+        "module",
+        "load_time",
+        "memory",
+        "memory_peak",
+        "v1_quirks",
+        "v2_quirks",
+    }
+    table = profiler.format_table("load_time", limit=3).splitlines()
+    assert len(table) == 4
+    assert table[0].split()[0] == "module"
+
+    with pytest.raises(ValueError):
+        profiler.report("foo")
+
+
+def test_quirk_index_up_to_date() -> None:
+    """Ensure the shipped quirk index matches the registered quirks."""
+
+    assert load_index() == build_index(), "Run `script/generate_quirk_index`"
+
+
+def test_lazy_quirk_loading(zigpy_device_from_quirk) -> None:
+    """Ensure lazy loading imports quirk modules only for looked up devices."""
+
+    device = zigpy_device_from_quirk(
+        zhaquirks.centralite.cl_3310S.CentraLite3310S, apply_quirk=False
+    )
+
+    with mock.patch(
+        "zhaquirks.quirk_index.importlib.import_module",
+        wraps=importlib.import_module,
+    ) as import_module:
+        zhaquirks.setup(lazy=True)
+
+        loader = zhaquirks._SETUP_STATE.lazy_loader
+        assert loader is not None
+        assert {c.args[0] for c in import_module.mock_calls} == set(loader.eager)
+        assert "zhaquirks.centralite.cl_3310S" not in loader.loaded_modules
+
+        import_module.reset_mock()
+        assert (
+            type(zq.get_device(device)) is zhaquirks.centralite.cl_3310S.CentraLite3310S
+        )
+        assert "zhaquirks.centralite.cl_3310S" in loader.loaded_modules
+        import_module.assert_any_call("zhaquirks.centralite.cl_3310S")
+
+        # Modules are only imported once
+        import_module.reset_mock()
+        zq.get_device(device)
+        import_module.assert_not_called()
+
+    # Eager setup removes the loader again
+    zhaquirks.setup()
+    assert zhaquirks._SETUP_STATE.lazy_loader is None
+    assert "get_device" not in vars(zq.DEVICE_REGISTRY)
+
+
+def test_lazy_quirk_loading_missing_index(tmp_path: Path, caplog) -> None:
+    """Ensure lazy loading falls back to importing everything without an index."""
+
+    with mock.patch(
+        "zhaquirks.load_index",
+        side_effect=lambda: load_index(tmp_path / "quirk_index.json"),
+    ):
+        zhaquirks.setup(lazy=True)
+
+    assert zhaquirks._SETUP_STATE.lazy_loader is None
+    assert "Unable to load quirk index" in caplog.text
+
+
+def test_background_quirk_loading(zigpy_device_from_quirk) -> None:
+    """Ensure quirks can be registered in the background."""
+
+    device = zigpy_device_from_quirk(
+        zhaquirks.centralite.cl_3310S.CentraLite3310S, apply_quirk=False
+    )
+    release = threading.Event()
+    load_all = LazyQuirkLoader.load_all
+
+    def _blocked_load_all(self, modnames):
+        release.wait(5)
+        return load_all(self, modnames)
+
+    with mock.patch.object(LazyQuirkLoader, "load_all", _blocked_load_all):
+        future = zhaquirks.setup(background=True)
+        loader = zhaquirks._SETUP_STATE.lazy_loader
+
+        # Handlers for uninitialized devices are registered synchronously
+        assert "zhaquirks.xiaomi" in loader.loaded_modules
+        assert not future.done()
+
+        # Devices looked up before the background import finished load on demand
+        assert (
+            type(zq.get_device(device)) is zhaquirks.centralite.cl_3310S.CentraLite3310S
+        )
+        assert "zhaquirks.centralite.cl_3310S" in loader.loaded_modules
+
+        release.set()
+        assert future.result(timeout=30) is None
+
+    assert set(iter_quirk_modules()) <= loader.loaded_modules
+
+    # Re-running setup stops a running background import
+    loader.uninstall()
+    loader.loaded_modules.clear()
+    loader.load_all(["zhaquirks.bosch.motion"])
+    assert not loader.loaded_modules
+
+    zhaquirks.setup()
+
+
+def test_lazy_quirk_loading_waits_for_import(zigpy_device_from_quirk, caplog) -> None:
+    """Ensure a module being imported by another thread is not skipped."""
+
+    modname = "zhaquirks.centralite.cl_3310S"
+    device = zigpy_device_from_quirk(
+        zhaquirks.centralite.cl_3310S.CentraLite3310S, apply_quirk=False
+    )
+    registry = DeviceRegistry()
+    loader = LazyQuirkLoader(load_index(), registry)
+    loader.install()
+    started = threading.Event()
+    release = threading.Event()
+    import_module = importlib.import_module
+    lookups = []
+
+    def _slow_import(name):
+        if name == modname:
+            started.set()
+            release.wait(5)
+            registry.add_to_registry(zhaquirks.centralite.cl_3310S.CentraLite3310S)
+        return import_module(name)
+
+    with mock.patch(
+        "zhaquirks.quirk_index.importlib.import_module", side_effect=_slow_import
+    ):
+        background = threading.Thread(target=loader.load_all, args=([modname],))
+        background.start()
+        assert started.wait(5)
+
+        lookup = threading.Thread(
+            target=lambda: lookups.append(registry.get_device(device))
+        )
+        lookup.start()
+        lookup.join(0.1)
+
+        # The lookup waits for the import instead of seeing the module as loaded
+        assert lookup.is_alive()
+        assert modname not in loader.loaded_modules
+
+        release.set()
+        background.join(5)
+        lookup.join(5)
+
+    assert not lookup.is_alive()
+    assert modname in loader.loaded_modules
+    assert [type(device) for device in lookups] == [
+        zhaquirks.centralite.cl_3310S.CentraLite3310S
+    ]
+    assert "Unexpected exception" not in caplog.text
+
+
+def test_lazy_quirk_loading_import_error(caplog) -> None:
+    """Ensure modules failing to import are retried and do not stop the others."""
+
+    loader = LazyQuirkLoader(load_index(), DeviceRegistry())
+    import_module = importlib.import_module
+
+    def _failing_import(name):
+        if name == "zhaquirks.bosch.motion":
+            raise RuntimeError("Broken quirk")
+        return import_module(name)
+
+    with mock.patch(
+        "zhaquirks.quirk_index.importlib.import_module", side_effect=_failing_import
+    ):
+        loader.load_all(["zhaquirks.bosch.motion", "zhaquirks.centralite.cl_3310S"])
+
+    assert "Unexpected exception importing quirks module" in caplog.text
+    assert loader.loaded_modules == {"zhaquirks.centralite.cl_3310S"}
+
+    loader.load_all(["zhaquirks.bosch.motion"])
+    assert "zhaquirks.bosch.motion" in loader.loaded_modules
+
+
+def test_lazy_quirk_loading_order() -> None:
+    """Ensure lazily imported quirks match in the order of an eager import."""
+
+    registry = DeviceRegistry()
+    index = {
+        "modules": ["zhaquirks.first", "zhaquirks.second"],
+        "eager": [],
+        "manufacturer_model": {
+            "Manufacturer": {
+                "Model": ["zhaquirks.first", "zhaquirks.second"],
+                "Other model": ["zhaquirks.second"],
+            }
+        },
+        "manufacturer": {},
+        "model": {},
+    }
+    loader = LazyQuirkLoader(index, registry)
+    quirks = {}
+
+    def _import(name):
+        quirks[name] = type("Quirk", (), {"__module__": name})
+        registry.registry["Manufacturer"]["Model"].insert(0, quirks[name])
+
+    # A custom quirk always takes precedence
+    custom_quirk = type("Quirk", (), {"__module__": "custom_quirk"})
+    registry.registry["Manufacturer"]["Model"].insert(0, custom_quirk)
+
+    with mock.patch(
+        "zhaquirks.quirk_index.importlib.import_module", side_effect=_import
+    ):
+        # The later module is imported first by a lookup of another model
+        loader.load("Manufacturer", "Other model")
+        loader.load("Manufacturer", "Model")
+
+    assert registry.registry["Manufacturer"]["Model"] == [
+        custom_quirk,
+        quirks["zhaquirks.second"],
+        quirks["zhaquirks.first"],
+    ]
+
+
+_LOOKUP_SCRIPT = """
+import asyncio, json, logging, sys
+from unittest import mock
+
+import zigpy.device
+import zigpy.types as t
+from zigpy.quirks import DEVICE_REGISTRY
+
+import zhaquirks
+
+errors = []
+handler = logging.Handler(logging.ERROR)
+handler.emit = lambda record: errors.append(record.getMessage())
+logging.getLogger().addHandler(handler)
+
+
+async def main():
+    future = zhaquirks.setup(lazy=sys.argv[1] == "lazy", background=sys.argv[1] == "background")
+    matches = []
+    for desc in json.load(sys.stdin):
+        device = zigpy.device.Device(mock.MagicMock(), t.EUI64(bytes(8)), 0x1234)
+        device.manufacturer = desc["manufacturer"]
+        device.model = desc["model"]
+        for endpoint_id, endpoint_desc in desc["endpoints"].items():
+            endpoint = device.add_endpoint(int(endpoint_id))
+            endpoint.profile_id = endpoint_desc["profile_id"]
+            endpoint.device_type = endpoint_desc["device_type"]
+            for cluster_id in endpoint_desc["in"]:
+                endpoint.add_input_cluster(cluster_id)
+            for cluster_id in endpoint_desc["out"]:
+                endpoint.add_output_cluster(cluster_id)
+        quirk = type(DEVICE_REGISTRY.get_device(device))
+        matches.append(f"{quirk.__module__}.{quirk.__qualname__}")
+    if future is not None:
+        await asyncio.wrap_future(future)
+    json.dump({"matches": matches, "errors": errors}, sys.stdout)
+
+
+asyncio.run(main())
+"""
+
+
+def _describe_signature(manufacturer: str, model: str, endpoints: dict) -> dict:
+    return {
+        "manufacturer": manufacturer,
+        "model": model,
+        "endpoints": {
+            endpoint_id: {
+                "profile_id": endpoint.get(PROFILE_ID, zigpy.profiles.zha.PROFILE_ID),
+                "device_type": endpoint.get(DEVICE_TYPE, 0xFEDB),
+                "in": list(endpoint.get(INPUT_CLUSTERS, [])),
+                "out": list(endpoint.get(OUTPUT_CLUSTERS, [])),
+            }
+            for endpoint_id, endpoint in endpoints.items()
+        },
+    }
+
+
+def test_lazy_quirk_loading_fresh_interpreter() -> None:
+    """Ensure lazy and background setup match devices like an eager setup.
+
+    The other tests import every quirk module, so only a new interpreter really
+    imports modules lazily.
+    """
+
+    devices = []
+
+    # v1 quirks of several modules overlapping for a manufacturer and model
+    for manufacturer, models in zq.DEVICE_REGISTRY.registry.items():
+        for model, quirks in models.items():
+            if manufacturer is None or model is None:
+                continue
+            if len({quirk.__module__ for quirk in quirks}) < 2:
+                continue
+            devices.extend(
+                _describe_signature(manufacturer, model, quirk.signature[ENDPOINTS])
+                for quirk in quirks
+            )
+
+    # v2 quirks of modules cloning quirk builders
+    tuya_endpoint = {
+        1: {INPUT_CLUSTERS: [zcl.clusters.general.Basic.cluster_id, 0xEF00]}
+    }
+    for manufacturer, model in (
+        ("_TZE200_ar0slwnd", "TS0601"),
+        ("_TZE204_chbyv06x", "TS0601"),
+        ("_TZE200_yqgbrdyo", "TS0601"),
+        ("_TZE200_lvkk0hdg", "TS0601"),
+        ("NodOn", "SIN-4-FP-21"),
+    ):
+        assert (manufacturer, model) in zq.DEVICE_REGISTRY._registry_v2
+        devices.append(_describe_signature(manufacturer, model, tuya_endpoint))
+
+    # Lookups in reverse order import later modules first
+    devices.reverse()
+
+    results = {}
+    for mode in ("eager", "lazy", "background"):
+        process = subprocess.run(
+            [sys.executable, "-c", _LOOKUP_SCRIPT, mode],
+            input=json.dumps(devices),
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=Path(zhaquirks.__file__).parent.parent,
+            timeout=300,
+        )
+        assert process.returncode == 0, process.stderr
+        results[mode] = json.loads(process.stdout)
+        assert results[mode]["errors"] == []
+
+    assert results["lazy"]["matches"] == results["eager"]["matches"]
+    assert results["background"]["matches"] == results["eager"]["matches"]
+    assert "zigpy.quirks.v2.CustomDeviceV2" in results["eager"]["matches"]
+
+
 def test_zigpy_custom_cluster_pollution() -> None:
     """Ensure all quirks subclass `CustomCluster`."""
     non_zigpy_clusters = {
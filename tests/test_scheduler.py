@@ -0,0 +1,186 @@
+"""Tests for the shared deadline scheduler."""
+
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+
+from tests.common import ClusterListener
+import zhaquirks
+from zhaquirks.scheduler import (
+    DeadlineScheduler,
+    DeadlineStore,
+    cluster_persist_key,
+    get_deadline_scheduler,
+    set_deadline_store,
+)
+import zhaquirks.xiaomi.aqara.motion_aq2
+
+
+async def test_deadline_scheduler():
+    """Test scheduling, retriggering and cancelling deadlines."""
+
+    loop = asyncio.get_running_loop()
+    scheduler = DeadlineScheduler(loop)
+    calls = []
+
+    scheduler.schedule("a", 0.02, lambda: calls.append("a"))
+    scheduler.schedule("b", 0.01, lambda: calls.append("b"))
+    scheduler.schedule("c", 0.01, lambda: calls.append("c"))
+    assert scheduler.pending == len(scheduler) == 3
+    assert "a" in scheduler
+
+    # retriggering later keeps the queued heap entry
+    heap_size = len(scheduler._heap)
+    scheduler.schedule("a", 0.04, lambda: calls.append("a2"))
+    assert len(scheduler._heap) == heap_size
+    assert scheduler.cancel("c")
+    assert not scheduler.cancel("c")
+
+    await asyncio.sleep(0.03)
+    assert calls == ["b"]
+    assert scheduler.pending == 1
+
+    await asyncio.sleep(0.03)
+    assert calls == ["b", "a2"]
+    assert scheduler.pending == 0
+    assert scheduler._handle is None
+
+
+async def test_deadline_scheduler_earlier_retrigger():
+    """Test moving a deadline earlier, also after cancelling it."""
+
+    scheduler = DeadlineScheduler(asyncio.get_running_loop())
+    calls = []
+
+    scheduler.schedule("a", 10, lambda: calls.append(1))
+    scheduler.cancel("a")
+    scheduler.schedule("a", 20, lambda: calls.append(2))
+    scheduler.schedule("a", 0.01, lambda: calls.append(3))
+    scheduler.schedule("a", 0.02, lambda: calls.append(4))
+
+    await asyncio.sleep(0.05)
+    assert calls == [4]
+    assert scheduler.when("a") is None
+
+
+async def test_deadline_scheduler_callback_error():
+    """Test failing callbacks do not stop other deadlines."""
+
+    scheduler = DeadlineScheduler(asyncio.get_running_loop())
+    callback = mock.Mock()
+
+    scheduler.schedule("a", 0, mock.Mock(side_effect=RuntimeError))
+    scheduler.schedule("b", 0, callback)
+    # deadlines scheduled by callbacks run on the next timer
+    scheduler.schedule("c", 0, lambda: scheduler.schedule("c", 0, callback))
+
+    await asyncio.sleep(0.01)
+    assert callback.call_count == 2
+    assert scheduler.pending == 0
+
+
+async def test_get_deadline_scheduler():
+    """Test the scheduler is shared per event loop."""
+
+    loop = asyncio.get_running_loop()
+    assert get_deadline_scheduler() is get_deadline_scheduler(loop)
+
+    other_loop = asyncio.new_event_loop()
+    assert get_deadline_scheduler(other_loop) is not get_deadline_scheduler(loop)
+    other_loop.close()
+
+
+def test_deadline_store(tmp_path):
+    """Test loading and saving the deadline store."""
+
+    path = tmp_path / "deadlines.json"
+    store = DeadlineStore(path)
+    store.load()
+    assert store.deadlines == {}
+
+    store.set("a", 1.5)
+    store.set("b", 2.5)
+    store.remove("b")
+    store.save()
+
+    store = DeadlineStore(path)
+    store.load()
+    assert store.deadlines == {"a": 1.5}
+
+    path.write_text("invalid")
+    store.load()
+    assert store.deadlines == {}
+
+
+def test_deadline_store_flush(tmp_path):
+    """Test pending changes are flushed and the store is flushed on exit."""
+
+    store = DeadlineStore(tmp_path / "deadlines.json")
+    store.flush()
+    assert not store.path.exists()
+
+    store.set("a", 1.5)
+    store.flush()
+    saved = DeadlineStore(store.path)
+    saved.load()
+    assert saved.deadlines == {"a": 1.5}
+
+    with mock.patch("zhaquirks.scheduler.atexit") as atexit:
+        set_deadline_store(store)
+        atexit.register.assert_called_once_with(store.flush)
+
+        set_deadline_store(None)
+        atexit.unregister.assert_called_once_with(store.flush)
+
+
+async def test_deadline_store_restore(tmp_path, zigpy_device_from_quirk):
+    """Test pending resets are persisted and restored after a restart."""
+
+    store = DeadlineStore(tmp_path / "deadlines.json", save_delay=0)
+    set_deadline_store(store)
+
+    try:
+        device = zigpy_device_from_quirk(zhaquirks.xiaomi.aqara.motion_aq2.MotionAQ2)
+        occupancy_cluster = device.endpoints[1].occupancy
+        occupancy_key = cluster_persist_key(occupancy_cluster, "reset")
+        motion_key = cluster_persist_key(device.endpoints[1].ias_zone, "reset")
+
+        occupancy_cluster.update_attribute(0x0000, 1)
+        assert set(store.deadlines) == {occupancy_key, motion_key}
+        assert store.deadlines[occupancy_key] == pytest.approx(
+            time.time() + occupancy_cluster.reset_s, abs=1
+        )
+
+        # all changes are written together
+        await asyncio.sleep(0.05)
+        saved = DeadlineStore(store.path)
+        saved.load()
+        assert saved.deadlines == store.deadlines
+
+        # restart with the occupancy reset already due and the motion one pending
+        get_deadline_scheduler().cancel(occupancy_cluster)
+        get_deadline_scheduler().cancel(device.endpoints[1].ias_zone)
+        store.deadlines = {occupancy_key: time.time() - 5, motion_key: time.time() + 60}
+
+        device = zigpy_device_from_quirk(zhaquirks.xiaomi.aqara.motion_aq2.MotionAQ2)
+        replaced_motion_cluster = device.endpoints[1].ias_zone
+        assert replaced_motion_cluster in get_deadline_scheduler()
+
+        # a device replacing it takes the pending reset over instead of restoring it
+        device = zigpy_device_from_quirk(zhaquirks.xiaomi.aqara.motion_aq2.MotionAQ2)
+        occupancy_listener = ClusterListener(device.endpoints[1].occupancy)
+        motion_cluster = device.endpoints[1].ias_zone
+        assert motion_cluster in get_deadline_scheduler()
+        assert replaced_motion_cluster not in get_deadline_scheduler()
+        assert len(get_deadline_scheduler()) == 2  # the occupancy and motion resets
+
+        await asyncio.sleep(0.01)
+        assert occupancy_listener.attribute_updates == [(0x0000, 0)]
+        assert set(store.deadlines) == {motion_key}
+
+        get_deadline_scheduler().cancel(motion_cluster)
+        assert store.deadlines == {}
+    finally:
+        set_deadline_store(None)
@@ -0,0 +1,111 @@
+"""Tests for single-flight reads and memoized derived values."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+from zigpy.zcl.clusters.general import Basic
+
+from zhaquirks.singleflight import SingleFlight, derived_from, read_attributes_once
+import zhaquirks.tuya.ts0601_dimmer
+
+
+async def test_single_flight():
+    """Test concurrent calls for a key share one call."""
+
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def _call(value):
+        calls.append(value)
+        started.set()
+        await release.wait()
+        return value
+
+    first = asyncio.ensure_future(single_flight.run("a", lambda: _call(1)))
+    second = asyncio.ensure_future(single_flight.run("a", lambda: _call(2)))
+    other = asyncio.ensure_future(single_flight.run("b", lambda: _call(3)))
+    await started.wait()
+    assert "a" in single_flight
+    assert len(single_flight) == 2
+
+    # cancelling a caller does not cancel the shared call
+    first.cancel()
+    release.set()
+    assert await second == 1
+    assert await other == 3
+    assert first.cancelled()
+    assert sorted(calls) == [1, 3]
+    assert len(single_flight) == 0
+
+    # a finished call is not shared with later calls
+    assert await single_flight.run("a", lambda: _call(4)) == 4
+
+
+async def test_single_flight_error():
+    """Test an error of the shared call is raised to all callers."""
+
+    single_flight = SingleFlight()
+
+    async def _fail():
+        await asyncio.sleep(0)
+        raise RuntimeError
+
+    results = await asyncio.gather(
+        single_flight.run("a", _fail),
+        single_flight.run("a", _fail),
+        return_exceptions=True,
+    )
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert "a" not in single_flight
+
+
+async def test_read_attributes_once(zigpy_device_from_quirk):
+    """Test concurrent reads of the same attributes are sent once."""
+
+    device = zigpy_device_from_quirk(
+        zhaquirks.tuya.ts0601_dimmer.TuyaSingleSwitchDimmer
+    )
+    basic_cluster = device.endpoints[1].basic
+
+    with mock.patch.object(
+        basic_cluster, "_read_attributes", mock.AsyncMock(return_value=([],))
+    ) as request_mock:
+        await asyncio.gather(
+            read_attributes_once(basic_cluster, [4, 5]),
+            read_attributes_once(basic_cluster, [4, 5]),
+            read_attributes_once(basic_cluster, [5, 4]),
+        )
+
+    assert request_mock.call_count == 2
+
+
+@pytest.mark.parametrize("value", (None, "", 0))
+def test_derived_from(value):
+    """Test a derived value is recomputed only when its source changes."""
+
+    class Owner:
+        source = value
+
+        @derived_from(lambda self: self.source)
+        def derived(self, source):
+            """Derive a value."""
+            compute(source)
+            return repr(source)
+
+    compute = mock.Mock()
+    owner = Owner()
+
+    assert owner.derived() == repr(value)
+    assert owner.derived() == repr(value)
+    assert compute.call_count == 1
+
+    owner.source = Basic.AttributeDefs.sw_build_id.id
+    assert owner.derived() == repr(owner.source)
+    assert compute.call_count == 2
+
+    # memoized per instance
+    assert Owner().derived() == repr(value)
+    assert compute.call_count == 3
@@ -0,0 +1,132 @@
+"""Tests for rolling-window telemetry aggregation."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+import zigpy.types as t
+
+from tests.common import ClusterListener
+import zhaquirks
+from zhaquirks.scheduler import get_deadline_scheduler
+from zhaquirks.telemetry import (
+    SampleRing,
+    TelemetryStats,
+    set_default_aggregation_window,
+)
+import zhaquirks.tuya.ts0601_din_power
+
+zhaquirks.setup()
+
+
+def test_sample_ring():
+    """Test the ring buffer keeps the most recent samples."""
+
+    ring = SampleRing(3)
+    assert ring.last is None
+    assert ring.samples() == []
+
+    for value in range(5):
+        ring.append(float(value), value * 10)
+
+    assert len(ring) == 3
+    assert ring.last == (4.0, 40.0)
+    assert ring.samples() == [(2.0, 20.0), (3.0, 30.0), (4.0, 40.0)]
+
+
+async def test_telemetry_disabled(zigpy_device_from_quirk):
+    """Test updates go straight to the cache without an aggregation window."""
+
+    device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_din_power.TuyaPowerMeter)
+    cluster = device.endpoints[1].electrical_measurement
+    listener = ClusterListener(cluster)
+
+    cluster.power_reported(10)
+    cluster.power_reported(20)
+    assert listener.attribute_updates == [
+        (cluster.POWER_ID, 10),
+        (cluster.POWER_ID, 20),
+    ]
+    assert cluster.raw_value(cluster.POWER_ID) == 20
+
+
+async def test_telemetry_aggregated(zigpy_device_from_quirk):
+    """Test measurements are aggregated over the window, with power integrated."""
+
+    device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_din_power.TuyaPowerMeter)
+    cluster = device.endpoints[1].electrical_measurement
+    cluster.aggregation_window = 10
+    listener = ClusterListener(cluster)
+    stats_listener = mock.Mock(spec=["telemetry_aggregated"])
+    cluster.add_listener(stats_listener)
+
+    loop = asyncio.get_running_loop()
+    for when, power in ((100.0, 100), (101.0, 200), (102.0, 301)):
+        with mock.patch.object(loop, "time", return_value=when):
+            cluster.power_reported(power)
+
+    # only the first value is written right away
+    assert listener.attribute_updates == [(cluster.POWER_ID, 100)]
+    assert cluster.raw_value(cluster.POWER_ID) == 301
+    assert cluster.raw_samples(cluster.POWER_ID) == [
+        (100.0, 100.0),
+        (101.0, 200.0),
+        (102.0, 301.0),
+    ]
+    assert (cluster, "telemetry") in get_deadline_scheduler()
+
+    cluster.flush_telemetry()
+    assert (cluster, "telemetry") not in get_deadline_scheduler()
+    # the mean of integer values is rounded to the integer type of the attribute
+    assert listener.attribute_updates[1:] == [(cluster.POWER_ID, 200)]
+    assert type(listener.attribute_updates[1][1]) is t.int16s
+    stats_listener.telemetry_aggregated.assert_called_once_with(
+        cluster.POWER_ID,
+        TelemetryStats(
+            count=3,
+            minimum=100,
+            maximum=301,
+            mean=pytest.approx(601 / 3),
+            last=301,
+            energy=pytest.approx((150 + 250.5) / 3600),
+        ),
+    )
+
+
+async def test_telemetry_aggregated_float(zigpy_device_from_quirk):
+    """Test the mean of scaled float values is written as is."""
+
+    device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_din_power.TuyaPowerMeter)
+    cluster = device.endpoints[1].electrical_measurement
+    cluster.aggregation_window = 10
+    listener = ClusterListener(cluster)
+
+    for voltage in (230.1, 230.4):
+        cluster.voltage_reported(voltage)
+    cluster.flush_telemetry()
+
+    assert listener.attribute_updates[1:] == [
+        (cluster.VOLTAGE_ID, pytest.approx(230.25))
+    ]
+
+
+async def test_telemetry_throttled(zigpy_device_from_quirk):
+    """Test counters only write their last value once per window."""
+
+    set_default_aggregation_window(0.02)
+    try:
+        device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_din_power.TuyaPowerMeter)
+        cluster = device.endpoints[1].smartenergy_metering
+        listener = ClusterListener(cluster)
+
+        for energy in (1.0, 1.5, 2.0):
+            cluster.energy_deliver_reported(energy)
+        assert listener.attribute_updates == [(cluster.CURRENT_DELIVERED_ID, 1.0)]
+
+        await asyncio.sleep(0.05)
+        assert listener.attribute_updates == [
+            (cluster.CURRENT_DELIVERED_ID, 1.0),
+            (cluster.CURRENT_DELIVERED_ID, 2.0),
+        ]
+    finally:
+        set_default_aggregation_window(None)
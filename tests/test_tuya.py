@@ -1,5 +1,6 @@
 """Tests for Tuya quirks."""
 
+import asyncio
 import base64
 import datetime
 import struct
@@ -339,6 +340,7 @@ class TuyaTestManufCluster(TuyaManufClusterAttributes):
 
     attributes = TuyaManufClusterAttributes.attributes.copy()
     attributes[617] = ("test_attribute", t.uint32_t, True)
+    attributes[618] = ("test_attribute_2", t.uint32_t, True)
 
 
 class TuyaTestDevice(CustomDevice):
@@ -414,6 +416,50 @@ async def test_tuya_send_attribute(zigpy_device_from_quirk, quirk):
         ]
 
 
+@pytest.mark.parametrize("quirk", (TuyaTestDevice,))
+async def test_tuya_send_attributes_pipelined(zigpy_device_from_quirk, quirk):
+    """Test the commands of several attributes are sent concurrently."""
+
+    test_dev = zigpy_device_from_quirk(quirk)
+    tuya_cluster = test_dev.endpoints[1].tuya_manufacturer
+    tuya_cluster.max_inflight_writes = 2
+    sent = []
+    release = asyncio.Event()
+
+    async def request(*args, sequence, data, **kwargs):
+        sent.append(sequence)
+        await release.wait()
+        if data[5] == 0x6A and fail:
+            raise TimeoutError
+        return foundation.Status.SUCCESS
+
+    with mock.patch.object(tuya_cluster.endpoint, "request", side_effect=request):
+        fail = False
+        task = asyncio.create_task(
+            tuya_cluster.write_attributes({617: 1, 618: 2, "test_attribute": 3})
+        )
+        await asyncio.sleep(0.01)
+
+        # the commands are built in order, two of them are in flight
+        assert sent == [1, 2]
+        release.set()
+        (status,) = await task
+        assert sent == [1, 2, 3]
+        assert status == [
+            foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)
+        ]
+
+        # failed commands are reported per attribute
+        fail = True
+        (status,) = await tuya_cluster.write_attributes({617: 1, 618: 2})
+        assert status == [
+            foundation.WriteAttributesStatusRecord(foundation.Status.FAILURE, 618)
+        ]
+
+        with pytest.raises(TimeoutError):
+            await tuya_cluster.write_attributes({618: 2})
+
+
 @pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_trv.ZonnsmartTV01_ZG,))
 async def test_zonnsmart_state_report(zigpy_device_from_quirk, quirk):
     """Test thermostatic valves standard reporting from incoming commands."""
@@ -1,5 +1,6 @@
 """Tests for TuyaQuirkBuilder."""
 
+import asyncio
 from unittest import mock
 
 import pytest
@@ -13,6 +14,8 @@ from tests.common import ClusterListener, wait_for_zigpy_tasks
 import zhaquirks
 from zhaquirks.tuya import (
     TUYA_QUERY_DATA,
+    TuyaCommand,
+    TuyaDatapointData,
     TuyaPowerConfigurationCluster,
     TuyaPowerConfigurationCluster2AAA,
 )
@@ -303,3 +306,108 @@ async def test_tuya_spell(device_mock, read_attr_spell, data_query_spell):
             messages += 1
 
         request_mock.reset_mock()
+
+
+async def test_tuya_dp_report_policy(device_mock):
+    """Test the report policies of Tuya DPs."""
+
+    registry = DeviceRegistry()
+
+    (
+        TuyaQuirkBuilder(device_mock.manufacturer, device_mock.model, registry=registry)
+        .tuya_dp_attribute(dp_id=9, attribute_name="unchanged")
+        .tuya_dp_report_policy(dp_id=9, skip_unchanged=True)
+        .tuya_dp_attribute(dp_id=10, attribute_name="deadband")
+        .tuya_dp_report_policy(dp_id=10, deadband=5)
+        .tuya_dp_attribute(dp_id=11, attribute_name="interval")
+        .tuya_dp_report_policy(dp_id=11, min_interval=0.05)
+        .tuya_dp_attribute(dp_id=12, attribute_name="default")
+        .skip_configuration()
+        .add_to_registry()
+    )
+
+    quirked = registry.get_device(device_mock)
+    tuya_cluster = quirked.endpoints[1].tuya_manufacturer
+    tuya_listener = ClusterListener(tuya_cluster)
+
+    def report(dp_id, *values):
+        for value in values:
+            tuya_cluster.handle_get_data(
+                TuyaCommand(
+                    status=0,
+                    tsn=1,
+                    datapoints=[TuyaDatapointData(dp_id, t.uint32_t(value))],
+                )
+            )
+
+    def updates(attribute_name):
+        attr_id = tuya_cluster.attributes_by_name[attribute_name].id
+        return [v for a, v in tuya_listener.attribute_updates if a == attr_id]
+
+    report(9, 1, 1, 2, 2, 1)
+    assert updates("unchanged") == [1, 2, 1]
+
+    report(10, 100, 104, 96, 105, 110, 106)
+    assert updates("deadband") == [100, 105, 110]
+
+    report(12, 1, 1, 1)
+    assert updates("default") == [1, 1, 1]
+
+    # reports within the interval are deferred, only the latest one is applied
+    report(11, 1, 2, 3)
+    assert updates("interval") == [1]
+    await asyncio.sleep(0.1)
+    assert updates("interval") == [1, 3]
+
+    # dropped or superseded deferred reports are not applied
+    report(11, 4)
+    await asyncio.sleep(0.1)
+    report(11, 5)
+    assert updates("interval") == [1, 3, 4, 5]
+    assert not tuya_cluster._dp_pending_reports
+
+
+def test_tuya_quirkbuilder_shared_classes():
+    """Test identical generated clusters are shared between quirks."""
+
+    registry = DeviceRegistry()
+
+    def build(model, scale=10, battery_qty=2):
+        entry = (
+            TuyaQuirkBuilder("_TZE200_shared", model, registry=registry)
+            .tuya_battery(
+                dp_id=4, battery_type=BatterySize.AAA, battery_qty=battery_qty
+            )
+            .tuya_temperature(dp_id=1, scale=scale)
+            .tuya_dp_attribute(dp_id=9, attribute_name="foo")
+            .skip_configuration()
+            .add_to_registry()
+        )
+        power_cfg = entry.adds_metadata[0].cluster
+        replacement = entry.replaces_metadata[0].add.cluster
+        return power_cfg, replacement
+
+    power_cfg, replacement = build("model_1")
+    assert build("model_2") == (power_cfg, replacement)
+
+    # converters with other values or other batteries are not shared
+    power_cfg2, replacement2 = build("model_3", scale=100, battery_qty=3)
+    assert power_cfg2 is not power_cfg
+    assert replacement2 is not replacement
+    assert replacement2.AttributeDefs.foo is replacement.AttributeDefs.foo
+    assert replacement2.dp_to_attribute[1].converter(2) == 200
+
+    # integer and float scales convert differently
+    _, replacement3 = build("model_4", scale=10.0)
+    assert replacement3 is not replacement
+
+    # attribute definitions are shared regardless of the order attributes are added
+    def build_attributes(model, dps):
+        builder = TuyaQuirkBuilder("_TZE200_shared", model, registry=registry)
+        for dp_id in dps:
+            builder.tuya_dp_attribute(dp_id=dp_id, attribute_name=f"attr_{dp_id}")
+        entry = builder.skip_configuration().add_to_registry()
+        return entry.replaces_metadata[0].add.cluster.AttributeDefs.__bases__
+
+    dps = list(range(20, 36))
+    assert build_attributes("model_5", dps) == build_attributes("model_6", dps[::-1])
@@ -11,10 +11,14 @@ from zhaquirks.tuya import (
     TUYA_GET_DATA,
     TUYA_SET_DATA_RESPONSE,
     TUYA_SET_TIME,
+    DPConverter,
+    PowerOnState,
     TuyaCommand,
     TuyaData,
     TuyaDatapointData,
+    TuyaDPType,
     TuyaNewManufCluster,
+    compile_dp_converter,
 )
 
 
@@ -206,6 +210,47 @@ def test_tuya_data_unknown():
         r.payload = 0
 
 
+@pytest.mark.parametrize(
+    "data",
+    (
+        b"\x00\x01",
+        b"\x00\x7f\x01\x02\x00\x04\xff\xff\xff\xf6\x02\x01\x00\x01\x01",
+        b"\x00\x02\x03\x04\x00\x01\x02\x65\x05\x00\x02\x00\xff\x06\x03\x00\x03abc",
+        b"\x01\x03\x10\x00\x00\x03\x01\x02\x46\x11\x06\x00\x01\x00",
+    ),
+)
+def test_tuya_command_deserialize(data):
+    """Test the TuyaCommand decoder matches the generic struct parsing."""
+
+    command, rest = TuyaCommand.deserialize(data)
+    expected, expected_rest = t.Struct.deserialize.__func__(TuyaCommand, data)
+
+    assert rest == expected_rest == b""
+    assert command == expected
+    assert command.serialize() == data
+    for datapoint, expected_datapoint in zip(
+        command.datapoints, expected.datapoints, strict=True
+    ):
+        assert type(datapoint.dp) is type(expected_datapoint.dp)
+        assert type(datapoint.data.raw) is type(expected_datapoint.data.raw)
+        if datapoint.data.dp_type <= TuyaDPType.BITMAP:
+            assert datapoint.data.payload == expected_datapoint.data.payload
+            assert type(datapoint.data.payload) is type(expected_datapoint.data.payload)
+
+
+@pytest.mark.parametrize(
+    "data", (b"", b"\x00", b"\x00\x01\x02", b"\x00\x01\x02\x02\x00\x04\x00")
+)
+def test_tuya_command_deserialize_short(data):
+    """Test the TuyaCommand decoder rejects truncated data."""
+
+    with pytest.raises(ValueError):
+        TuyaCommand.deserialize(data)
+
+    with pytest.raises(ValueError):
+        t.Struct.deserialize.__func__(TuyaCommand, data)
+
+
 @pytest.mark.parametrize(
     "cmd_id, handler_name, args",
     (
@@ -291,3 +336,47 @@ def test_tuya_cluster_request_no_handler(default_rsp_mock, TuyaCluster):
 
     assert default_rsp_mock.call_count == 1
     assert default_rsp_mock.call_args[1]["status"] == zcl_f.Status.UNSUP_CLUSTER_COMMAND
+
+
+def test_dp_converter():
+    """Test declarative datapoint converters."""
+
+    assert DPConverter()(5) == 5
+    assert DPConverter(scale=10)(5) == 50
+    assert DPConverter(scale=-1, offset=100)(30) == 70
+    assert DPConverter(invert=True)(0) is True
+    assert DPConverter(bitmask=0x0F00)(0x1234) == 0x02
+    assert DPConverter(clamp=(0, 100))(120) == 100
+    assert DPConverter(clamp=(0, None))(-5) == 0
+    assert DPConverter(scale=0.5, clamp=(None, 10))(40) == 10
+    assert DPConverter(enum_map=PowerOnState)(2) is PowerOnState.LastState
+    assert DPConverter(enum_map={0: "off", 1: "on"})(1) == "on"
+    assert DPConverter(enum_map={0: 0}, default=1)(7) == 1
+
+    # values missing from a mapping without a default are passed through
+    assert DPConverter(enum_map={0: "off"})(1) == 1
+
+    # converters can be introspected, compared and hashed
+    converter = DPConverter(scale=10, enum_map={0: 1})
+    assert converter.scale == 10
+    assert converter == DPConverter(scale=10, enum_map={0: 1})
+    assert hash(converter) == hash(DPConverter(scale=10, enum_map={0: 1}))
+    assert converter != DPConverter(scale=100, enum_map={0: 1})
+
+
+def test_compile_dp_converter():
+    """Test compiling converters of datapoint mappings."""
+
+    assert compile_dp_converter(None) is None
+
+    def func(x):
+        return x + 1
+
+    assert compile_dp_converter(func) is func
+
+    converter = DPConverter(scale=2)
+    assert compile_dp_converter(converter) is converter._convert
+
+    # a tuple converts the value for every attribute of the mapping
+    multi = compile_dp_converter((converter, None, func))
+    assert multi(3) == (6, 3, 4)
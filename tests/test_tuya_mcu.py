@@ -1,14 +1,22 @@
 """Tests for Tuya quirks."""
 
+import asyncio
 import datetime
 from unittest import mock
 
 import pytest
+import zigpy.types as t
 from zigpy.zcl import foundation
 
 from tests.common import ClusterListener, MockDatetime
 import zhaquirks
-from zhaquirks.tuya import TUYA_MCU_VERSION_RSP, TUYA_SET_TIME, TuyaDPType
+from zhaquirks.tuya import (
+    TUYA_MCU_VERSION_RSP,
+    TUYA_SET_TIME,
+    TuyaCommand,
+    TuyaDatapointData,
+    TuyaDPType,
+)
 from zhaquirks.tuya.mcu import (
     ATTR_MCU_VERSION,
     TUYA_MCU_CONNECTION_STATUS,
@@ -375,3 +383,141 @@ async def test_tuya_mcu_classes():
         TuyaClusterData(manufacturer="xiaomi")
     with pytest.raises(ValueError):
         TuyaClusterData(manufacturer=b"")
+
+
+@pytest.mark.parametrize(
+    "quirk", (zhaquirks.tuya.ts0601_dimmer.TuyaDoubleSwitchDimmer,)
+)
+async def test_tuya_dp_mapping_index(zigpy_device_from_quirk, quirk):
+    """Test the attribute to datapoint index of TuyaMCUCluster."""
+
+    tuya_device = zigpy_device_from_quirk(quirk)
+    tuya_cluster = tuya_device.endpoints[1].tuya_manufacturer
+    dp_to_attribute = tuya_cluster.dp_to_attribute
+
+    def _linear_scan(endpoint_id, attribute_name):
+        return {
+            dp: mapping
+            for dp, mapping in dp_to_attribute.items()
+            if (
+                attribute_name == mapping.attribute_name
+                or (
+                    isinstance(mapping.attribute_name, tuple)
+                    and attribute_name in mapping.attribute_name
+                )
+            )
+            and (
+                (mapping.endpoint_id is None and endpoint_id == 1)
+                or endpoint_id == mapping.endpoint_id
+            )
+        }
+
+    for endpoint_id in (1, 2, 3, 7):
+        for attribute_name in ("on_off", "current_level", "minimum_level", "foo"):
+            assert tuya_cluster.get_dp_mapping(
+                endpoint_id, attribute_name
+            ) == _linear_scan(endpoint_id, attribute_name)
+
+    assert list(tuya_cluster.get_dp_mapping(1, "current_level")) == [2]
+
+    class TupleCluster(TuyaMCUCluster):
+        """Cluster with a tuple mapping."""
+
+    # the index follows dp_to_attribute assigned after class creation once invalidated
+    TupleCluster.dp_to_attribute = {
+        5: zhaquirks.tuya.mcu.DPToAttributeMapping(
+            "level", ("current_level", "minimum_level"), endpoint_id=2
+        ),
+        6: zhaquirks.tuya.mcu.DPToAttributeMapping("on_off", "on_off"),
+    }
+    TupleCluster.invalidate_dp_attribute_index()
+    index = TupleCluster._get_dp_attribute_index()
+    assert [dp for _, dp, _ in index[(2, "current_level")]] == [5]
+    assert [dp for _, dp, _ in index[(2, "minimum_level")]] == [5]
+    assert [dp for _, dp, _ in index[(None, "on_off")]] == [6]
+    assert TupleCluster._get_dp_attribute_index() is index
+
+    # changes in place are picked up after invalidating as well
+    TupleCluster.dp_to_attribute[7] = zhaquirks.tuya.mcu.DPToAttributeMapping(
+        "level", "current_level", endpoint_id=2
+    )
+    TupleCluster.invalidate_dp_attribute_index()
+    index = TupleCluster._get_dp_attribute_index()
+    assert [dp for _, dp, _ in index[(2, "current_level")]] == [5, 7]
+
+
+@pytest.mark.parametrize(
+    "quirk", (zhaquirks.tuya.ts0601_dimmer.TuyaDoubleSwitchDimmer,)
+)
+async def test_tuya_coalesce_writes(zigpy_device_from_quirk, quirk):
+    """Test datapoint writes coalesced into set_data frames."""
+
+    tuya_device = zigpy_device_from_quirk(quirk)
+    tuya_cluster = tuya_device.endpoints[1].tuya_manufacturer
+    level_cluster = tuya_device.endpoints[1].level
+    tuya_cluster.coalesce_writes_window = 0
+
+    with mock.patch.object(tuya_cluster, "command") as m1:
+        await level_cluster.write_attributes(
+            {"minimum_level": 51, "bulb_type": 1}, manufacturer=None
+        )
+        await level_cluster.write_attributes({"minimum_level": 102})
+        assert m1.call_count == 0
+
+        await asyncio.sleep(0)
+        assert m1.call_count == 1
+
+        tuya_command = m1.call_args[0][1]
+        assert [dpd.dp for dpd in tuya_command.datapoints] == [3, 4]
+        assert tuya_command.datapoints[0].data.payload == 400
+        assert tuya_command.datapoints[1].data.payload == 1
+        assert level_cluster.get("minimum_level") == 102
+
+    # frames are split at the payload size, 9 bytes per value datapoint
+    tuya_cluster.max_payload_size = 5 + 2 + 2 * 9
+    datapoints = [TuyaDatapointData(dp, t.uint32_t(dp)) for dp in range(1, 6)]
+    tuya_commands = tuya_cluster._pack_datapoints(datapoints)
+    assert [[dpd.dp for dpd in cmd.datapoints] for cmd in tuya_commands] == [
+        [1, 2],
+        [3, 4],
+        [5],
+    ]
+    assert len({cmd.tsn for cmd in tuya_commands}) == 3
+
+
+@pytest.mark.parametrize(
+    "quirk", (zhaquirks.tuya.ts0601_dimmer.TuyaDoubleSwitchDimmer,)
+)
+async def test_tuya_dp_dispatch(zigpy_device_from_quirk, quirk):
+    """Test the resolved data point targets of TuyaNewManufCluster."""
+
+    tuya_device = zigpy_device_from_quirk(quirk)
+    tuya_cluster = tuya_device.endpoints[1].tuya_manufacturer
+    level_listener = ClusterListener(tuya_device.endpoints[2].level)
+
+    def report(dp, value):
+        tuya_cluster.handle_get_data(
+            TuyaCommand(
+                status=0, tsn=1, datapoints=[TuyaDatapointData(dp, t.uint32_t(value))]
+            )
+        )
+
+    report(8, 1000)
+    assert level_listener.attribute_updates == [(0x0000, 255)]
+    dispatch = tuya_cluster._dp_dispatch[8]
+    assert dispatch.cluster is tuya_device.endpoints[2].level
+
+    report(8, 500)
+    assert level_listener.attribute_updates == [(0x0000, 255), (0x0000, 127)]
+    assert tuya_cluster._dp_dispatch[8] is dispatch
+
+    # targets are resolved again once the cluster is replaced
+    level_cluster = tuya_device.endpoints[2].level
+    level_cluster = tuya_device.endpoints[2].add_input_cluster(
+        level_cluster.cluster_id, type(level_cluster)(tuya_device.endpoints[2])
+    )
+    level_listener = ClusterListener(level_cluster)
+    report(8, 0)
+    assert level_listener.attribute_updates == [(0x0000, 0)]
+    assert tuya_cluster._dp_dispatch[8].cluster is level_cluster
+    assert list(tuya_cluster._dp_dispatch) == [8]
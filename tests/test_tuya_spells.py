@@ -1,10 +1,12 @@
 """Tests for Tuya spells."""
 
+import asyncio
 from unittest import mock
 
 import pytest
 import zigpy
 from zigpy.profiles import zha
+import zigpy.types as t
 from zigpy.zcl import foundation
 from zigpy.zcl.clusters.general import Basic, OnOff
 
@@ -22,6 +24,11 @@ from zhaquirks.tuya import (
     TuyaNewManufCluster,
     TuyaZBOnOffAttributeCluster,
 )
+from zhaquirks.tuya.spell import (
+    SpellScheduler,
+    get_spell_scheduler,
+    set_spell_scheduler,
+)
 import zhaquirks.tuya.ts0601_valve
 
 zhaquirks.setup()
@@ -157,3 +164,107 @@ def test_tuya_spell_devices_valid():
             pytest.fail(
                 f"{quirk} set Tuya data query spell but has no cluster subclassing `TuyaNewManufCluster` on endpoint 1"
             )
+
+
+def _spell_device(ieee: str, router: bool) -> mock.Mock:
+    """Return a mock device for the spell scheduler."""
+    return mock.Mock(
+        ieee=t.EUI64.convert(ieee),
+        node_desc=mock.Mock(is_mains_powered=router, is_router=router),
+    )
+
+
+async def test_tuya_spell_scheduler_concurrency():
+    """Test spells are cast with bounded concurrency, routers first."""
+
+    scheduler = SpellScheduler(max_concurrent=1)
+    release = asyncio.Event()
+    order = []
+
+    async def _spell(name):
+        order.append(name)
+        await release.wait()
+
+    first = _spell_device("00:00:00:00:00:00:00:01", router=False)
+    end_device = _spell_device("00:00:00:00:00:00:00:02", router=False)
+    router = _spell_device("00:00:00:00:00:00:00:03", router=True)
+
+    tasks = [asyncio.ensure_future(scheduler.cast(first, lambda: _spell("first")))]
+    await asyncio.sleep(0)
+    tasks += [
+        asyncio.ensure_future(scheduler.cast(end_device, lambda: _spell("end"))),
+        asyncio.ensure_future(scheduler.cast(router, lambda: _spell("router"))),
+    ]
+    await asyncio.sleep(0)
+    assert order == ["first"]
+    assert scheduler.active == 1
+    assert scheduler.waiting == 2
+
+    release.set()
+    assert await asyncio.gather(*tasks) == [True, True, True]
+    assert order == ["first", "router", "end"]
+    assert scheduler.active == 0
+    assert scheduler.stats[router.ieee].successes == 1
+
+
+async def test_tuya_spell_scheduler_retry():
+    """Test failing spells are retried with backoff, without holding a slot."""
+
+    scheduler = SpellScheduler(max_concurrent=1, retries=2, backoff=0.01)
+    device = _spell_device("00:00:00:00:00:00:00:01", router=True)
+    spell = mock.AsyncMock(side_effect=[asyncio.TimeoutError, RuntimeError, None])
+
+    with mock.patch("asyncio.sleep", wraps=asyncio.sleep) as sleep_mock:
+        assert await scheduler.cast(device, spell)
+    assert [call.args[0] for call in sleep_mock.mock_calls] == [0.01, 0.02]
+
+    stats = scheduler.stats[device.ieee]
+    assert (stats.attempts, stats.failures, stats.successes) == (3, 2, 1)
+    assert stats.last_error is None
+    assert scheduler.active == 0
+
+    # the error of the last attempt is raised once all attempts failed
+    spell = mock.AsyncMock(side_effect=RuntimeError("failed"))
+    with pytest.raises(RuntimeError):
+        await scheduler.cast(device, spell)
+    assert spell.await_count == 3
+    assert stats.last_error == "RuntimeError('failed')"
+    assert scheduler.active == 0
+
+
+async def test_tuya_spell_skipped_for_same_firmware(zigpy_device_from_quirk):
+    """Test the spell is only cast again after the firmware of a device changed."""
+
+    device = zigpy_device_from_quirk(TuyaTestSpellDevice)
+    basic_cluster = device.endpoints[1].basic
+    basic_cluster.update_attribute(Basic.AttributeDefs.app_version.id, 0x40)
+
+    # an explicit reconfiguration always casts the spell by default
+    with mock.patch.object(device, "cast_spells", mock.AsyncMock()) as spell_mock:
+        await device.apply_custom_configuration()
+        await device.apply_custom_configuration()
+        assert spell_mock.await_count == 2
+
+    set_spell_scheduler(SpellScheduler(skip_same_firmware=True))
+    try:
+        device = zigpy_device_from_quirk(TuyaTestSpellDevice)
+        basic_cluster = device.endpoints[1].basic
+
+        with mock.patch.object(device, "cast_spells", mock.AsyncMock()) as spell_mock:
+            # the firmware is unknown, so the spell is always cast
+            await device.apply_custom_configuration()
+            await device.apply_custom_configuration()
+            assert spell_mock.await_count == 2
+
+            basic_cluster.update_attribute(Basic.AttributeDefs.app_version.id, 0x40)
+            await device.apply_custom_configuration()
+            await device.apply_custom_configuration()
+            assert spell_mock.await_count == 3
+
+            basic_cluster.update_attribute(Basic.AttributeDefs.app_version.id, 0x41)
+            await device.apply_custom_configuration()
+            assert spell_mock.await_count == 4
+
+        assert get_spell_scheduler().stats[device.ieee].skips == 1
+    finally:
+        set_spell_scheduler(SpellScheduler())
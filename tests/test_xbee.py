@@ -1,8 +1,10 @@
 """Test XBee device."""
 
+import asyncio
 from unittest import mock
 
 import pytest
+import zigpy.exceptions
 from zigpy.zcl import foundation
 from zigpy.zcl.clusters.general import AnalogOutput, Basic, LevelControl, OnOff
 
@@ -16,7 +18,9 @@ from zhaquirks.xbee import (
     XBEE_DATA_ENDPOINT,
     XBEE_IO_CLUSTER,
     XBEE_PROFILE_ID,
+    ATRequestTable,
 )
+from zhaquirks.xbee.types import IOSample
 from zhaquirks.xbee.xbee3_io import XBee3Sensor
 from zhaquirks.xbee.xbee_io import XBeeSensor
 
@@ -190,6 +194,73 @@ async def test_receive_serial_data(zigpy_device_from_quirk):
     )
 
 
+async def test_serial_stream(zigpy_device_from_quirk):
+    """Test streaming serial data in frames to and from an XBee device."""
+
+    xbee3_device = zigpy_device_from_quirk(XBee3Sensor)
+    in_flight = 0
+    max_in_flight = 0
+    frames = []
+
+    async def mock_request(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        frames.append(args[6])  # the frame data
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return foundation.Status.SUCCESS, "message sent"
+
+    xbee3_device.application.request.reset_mock()
+    xbee3_device.application.request.configure_mock(side_effect=mock_request)
+
+    reader, writer = xbee3_device.open_serial_stream(chunk_size=10, window=2)
+    payload = bytes(range(256)) * 2
+    writer.write(payload[:100])
+    writer.write(payload[100:])
+    await writer.drain()
+
+    assert b"".join(frames) == payload
+    assert {len(frame) for frame in frames[:-1]} == {10}
+    assert max_in_flight == 2
+
+    # incoming frames are collected in the reader
+    for data in (b"\xffTest ", b"UART data"):
+        xbee3_device.handle_message(
+            XBEE_PROFILE_ID,
+            XBEE_DATA_CLUSTER,
+            XBEE_DATA_ENDPOINT,
+            XBEE_DATA_ENDPOINT,
+            data,
+        )
+    assert await reader.readexactly(6) == b"\xffTest "
+
+    # errors sending are raised when draining
+    xbee3_device.application.request.configure_mock(
+        side_effect=zigpy.exceptions.DeliveryError("failed")
+    )
+    writer.write(b"more data")
+    with pytest.raises(zigpy.exceptions.DeliveryError):
+        await writer.drain()
+
+    writer.close()
+    assert writer.is_closing()
+    await writer.wait_closed()
+    assert await reader.read() == b"UART data"
+    with pytest.raises(RuntimeError):
+        writer.write(b"closed")
+
+    # frames are sent one at a time by default, so they can not be reordered
+    xbee3_device.application.request.configure_mock(side_effect=mock_request)
+    max_in_flight = 0
+    _, writer = xbee3_device.open_serial_stream(chunk_size=10)
+    writer.write(payload[:50])
+    await writer.drain()
+    assert max_in_flight == 1
+
+    xbee3_device.application.request.configure_mock(side_effect=None)
+
+
 @pytest.mark.parametrize(
     "command_id, request_value, request_data, response_data, response_command, response_value",
     (
@@ -501,6 +572,148 @@ async def test_remote_at_tx_failure(zigpy_device_from_quirk):
     xbee3_device.application.request.configure_mock(side_effect=None)
 
 
+async def test_remote_at_per_device_frames(zigpy_device_from_quirk):
+    """Test responses with the same frame id only resolve the request of their device."""
+
+    device_1 = zigpy_device_from_quirk(XBee3Sensor, ieee="00:00:00:00:00:00:00:01")
+    device_2 = zigpy_device_from_quirk(XBee3Sensor, ieee="00:00:00:00:00:00:00:02")
+
+    requests = [
+        asyncio.ensure_future(device.remote_at("TP")) for device in (device_1, device_2)
+    ]
+    await asyncio.sleep(0.01)
+    for device in (device_1, device_2):
+        assert (
+            device.endpoints[XBEE_AT_ENDPOINT]
+            .in_clusters[XBEE_AT_RESPONSE_CLUSTER]
+            .at_requests.pending
+            == 1
+        )
+
+    # both requests use frame id 1
+    device_2.handle_message(
+        XBEE_PROFILE_ID,
+        XBEE_AT_RESPONSE_CLUSTER,
+        XBEE_AT_ENDPOINT,
+        XBEE_AT_ENDPOINT,
+        b"\x01TP\x00\x00\x18",
+    )
+    assert await requests[1] == 24
+    assert not requests[0].done()
+
+    device_1.handle_message(
+        XBEE_PROFILE_ID,
+        XBEE_AT_RESPONSE_CLUSTER,
+        XBEE_AT_ENDPOINT,
+        XBEE_AT_ENDPOINT,
+        b"\x01TP\x00\xff\xfc",
+    )
+    assert await requests[0] == -4
+
+
+async def test_remote_at_expired(zigpy_device_from_quirk):
+    """Test requests are removed after timing out or being cancelled."""
+
+    xbee3_device = zigpy_device_from_quirk(XBee3Sensor)
+    at_requests = (
+        xbee3_device.endpoints[XBEE_AT_ENDPOINT]
+        .in_clusters[XBEE_AT_RESPONSE_CLUSTER]
+        .at_requests
+    )
+
+    with (
+        mock.patch("zhaquirks.xbee.REMOTE_AT_COMMAND_TIMEOUT", 0.01),
+        pytest.raises(TimeoutError),
+    ):
+        await xbee3_device.remote_at("TP")
+
+    request = asyncio.ensure_future(xbee3_device.remote_at("TP"))
+    await asyncio.sleep(0.01)
+    assert at_requests.pending == 1
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    await asyncio.sleep(0)
+
+    assert at_requests.pending == 0
+    assert at_requests.expired == 2
+
+    # late responses are ignored
+    xbee3_device.handle_message(
+        XBEE_PROFILE_ID,
+        XBEE_AT_RESPONSE_CLUSTER,
+        XBEE_AT_ENDPOINT,
+        XBEE_AT_ENDPOINT,
+        b"\x01TP\x00\x00\x18",
+    )
+
+
+async def test_remote_at_batch(zigpy_device_from_quirk):
+    """Test batched remote AT commands run in a bounded window and apply once."""
+
+    xbee3_device = zigpy_device_from_quirk(XBee3Sensor)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_remote_at(nwk, command, *args, apply_changes, encryption):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if command == "D9":
+            raise RuntimeError("AT Command response: INVALID_COMMAND")
+        return args[0] if args else None
+
+    with mock.patch.object(
+        xbee3_device.application,
+        "remote_at_command",
+        create=True,
+        side_effect=mock_remote_at,
+    ) as m1:
+        commands = [(f"D{pin}", 3) for pin in range(10)] + ["IS"]
+        results = await xbee3_device.remote_at_batch(commands, window=3)
+
+        assert results[:9] == [3] * 9
+        assert isinstance(results[9], RuntimeError)
+        assert results[10] is None
+        assert max_in_flight == 3
+
+        # changes are applied once, at the end
+        assert m1.call_count == len(commands) + 1
+        assert all(not call.kwargs["apply_changes"] for call in m1.mock_calls[:-1])
+        assert m1.mock_calls[-1] == mock.call(
+            0x1234, "AC", apply_changes=True, encryption=False
+        )
+
+        m1.reset_mock()
+        await xbee3_device.remote_at_batch([("IR", 1000)], write=True)
+        assert m1.mock_calls[-1] == mock.call(
+            0x1234, "WR", apply_changes=True, encryption=False
+        )
+
+
+async def test_at_request_table():
+    """Test frame ids are allocated without reusing pending ones."""
+
+    table = ATRequestTable()
+    futures = {}
+    for _ in range(ATRequestTable.MAX_FRAME_ID):
+        frame_id, future = table.allocate()
+        futures[frame_id] = future
+    assert sorted(futures) == list(range(1, 256))
+
+    with pytest.raises(RuntimeError):
+        table.allocate()
+
+    # frame ids wrap around to the ones answered meanwhile
+    table.pop(3).set_result(None)
+    table.pop(200).set_result(None)
+    assert table.allocate()[0] == 3
+    assert table.allocate()[0] == 200
+    assert table.pending == 255
+
+
 async def test_io_sample_report(zigpy_device_from_quirk):
     """Test DigitalIOCluster cluster."""
 
@@ -543,6 +756,56 @@ async def test_io_sample_report(zigpy_device_from_quirk):
     assert analog_listeners[4].attribute_updates[0] == (0x0055, 3.305)
 
 
+async def test_io_sample_report_multiple_sets(zigpy_device_from_quirk):
+    """Test IO sample reports with multiple sample sets only update changed pins."""
+
+    xbee3_device = zigpy_device_from_quirk(XBee3Sensor)
+    digital_listener = ClusterListener(xbee3_device.endpoints[0xD0].on_off)
+    analog_listener = ClusterListener(xbee3_device.endpoints[0xD1].analog_input)
+
+    for data in (
+        # two sets of DIO0 and AD1
+        b"\x02\x00\x01\x02\x00\x01\x00\x66\x00\x01\x00\xcc",
+        # a single set with the values of the last set
+        b"\x01\x00\x01\x02\x00\x01\x00\xcc",
+        # three sets, DIO0 going low
+        b"\x03\x00\x01\x02\x00\x01\x00\xcc\x00\x00\x00\xcc\x00\x00\x00\x66",
+    ):
+        xbee3_device.handle_message(
+            XBEE_PROFILE_ID,
+            XBEE_IO_CLUSTER,
+            XBEE_DATA_ENDPOINT,
+            XBEE_DATA_ENDPOINT,
+            data,
+        )
+
+    assert digital_listener.attribute_updates == [(0x0000, 1), (0x0000, 0)]
+    assert [value for _, value in analog_listener.attribute_updates] == [
+        0x66 / 10.23,
+        0xCC / 10.23,
+        0x66 / 10.23,
+    ]
+
+
+def test_io_sample_deserialize():
+    """Test deserializing IO samples with multiple and invalid sample sets."""
+
+    sample, rest = IOSample.deserialize(
+        b"\x02\x80\x01\x80\x40\x01\x0c\xe4\x00\x00\x0c\xe9\xaa"
+    )
+    assert rest == b"\xaa"
+    assert sample == sample.sample_sets[-1]
+    assert [s["digital_samples"][0] for s in sample.sample_sets] == [1, 0]
+    assert [s["analog_samples"][7] for s in sample.sample_sets] == [3300, 3305]
+    # the 16th bit of the digital mask is not a pin
+    assert len(sample["digital_samples"]) == 15
+    assert sample["digital_samples"][14] is None
+
+    for data in (b"\x00\x00\x01\x00", b"\x02\x00\x01\x00\x00\x01", b"\x01"):
+        with pytest.raises(ValueError):
+            IOSample.deserialize(data)
+
+
 async def test_io_sample_report_on_at_response(zigpy_device_from_quirk):
     """Test update samples on non-native IS command response."""
 
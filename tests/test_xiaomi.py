@@ -127,6 +127,44 @@ def test_basic_cluster_deserialize_wrong_len_2():
     assert deserialized[1]
 
 
+def test_basic_cluster_deserialize_cached_offsets():
+    """Test reports of a known model and layout skip the interpretation search."""
+    cluster = BasicCluster(mock.MagicMock())
+    cluster.endpoint.device.model = "lumi.sensor_wleak.aq1"
+
+    hdr = b"\x1c_\x11\x12\n"
+    data = b'\x05\x00B\x15lumi.sensor_wleak.aq1\x01\xffB"\x01!\xb3\x0b\x03('
+    data += b"\x17\x04!\xa8C\x05!\xa7\x00\x06$\x00\x00\x00\x00\x00\x08!\x04"
+    data += b"\x02\n!\x00\x00d\x10\x01"
+
+    attrs, offsets = cluster._find_attr_report_interpretation(data)
+    assert attrs == next(iter(cluster._interpret_attr_reports(data)))
+    assert offsets == (-1,)
+
+    cluster._attr_report_offsets.clear()
+    _, expected = cluster.deserialize(hdr + data)
+    assert cluster._attr_report_offsets == {("lumi.sensor_wleak.aq1", len(data)): (-1,)}
+
+    # the next report with the same layout but other values uses the cached offsets
+    data2 = data.replace(b"\xb3\x0b", b"\xb4\x0b")
+    with mock.patch.object(
+        cluster,
+        "_find_attr_report_interpretation",
+        wraps=cluster._find_attr_report_interpretation,
+    ) as find:
+        _, reports = cluster.deserialize(hdr + data2)
+        assert find.call_count == 0
+        assert len(reports[0]) == len(expected[0]) == 2
+
+        # cached offsets that do not fit fall back to the search
+        cluster._attr_report_offsets[("lumi.sensor_wleak.aq1", len(data))] = (1,)
+        _, reports = cluster.deserialize(hdr + data)
+        assert find.call_count == 1
+        assert reports == expected
+
+    cluster._attr_report_offsets.clear()
+
+
 @pytest.mark.parametrize(
     "quirk",
     (
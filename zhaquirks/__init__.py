@@ -3,17 +3,23 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import contextlib
+import functools
 import importlib
+from importlib.machinery import ModuleSpec
 import importlib.util
 import logging
 import pathlib
 import pkgutil
 import sys
+import time
 import typing
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import zigpy.device
 import zigpy.endpoint
+import zigpy.quirks
 from zigpy.quirks import DEVICE_REGISTRY, CustomCluster, CustomDevice
 import zigpy.types as t
 from zigpy.util import ListenableMixin
@@ -47,6 +53,23 @@ from .const import (
     ZHA_SEND_EVENT,
     ZONE_STATUS_CHANGE_COMMAND,
 )
+from .quirk_cache import (
+    CachedQuirkModule,
+    CustomQuirkCache,
+    file_hash,
+    registered_signatures,
+)
+from .quirk_index import LazyQuirkLoader, iter_quirk_modules, load_index
+from .scheduler import (
+    DeadlineStore,
+    cluster_persist_key,
+    get_deadline_scheduler,
+    set_deadline_store,
+)
+from .telemetry import set_default_aggregation_window
+
+if TYPE_CHECKING:
+    from .quirk_profiler import QuirkImportProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -255,10 +278,21 @@ class _Motion(CustomCluster, IasZone):
         """Init."""
         super().__init__(*args, **kwargs)
         self._loop = asyncio.get_running_loop()
-        self._timer_handle = None
+        self._scheduler = get_deadline_scheduler(self._loop)
+        self._scheduler.restore(
+            self, cluster_persist_key(self, "reset"), self._turn_off
+        )
+
+    def _schedule_reset(self):
+        """(Re)start the reset timer."""
+        self._scheduler.schedule(
+            self,
+            self.reset_s,
+            self._turn_off,
+            persist_key=cluster_persist_key(self, "reset"),
+        )
 
     def _turn_off(self):
-        self._timer_handle = None
         self.debug("%s - Resetting motion sensor", self.endpoint.device.ieee)
         self.listener_event(
             CLUSTER_COMMAND, 253, ZONE_STATUS_CHANGE_COMMAND, [OFF, 0, 0, 0]
@@ -284,9 +318,7 @@ class MotionWithReset(_Motion):
         """Handle the cluster command."""
         # check if the command is for a zone status change of ZoneStatus.Alarm_1 or ZoneStatus.Alarm_2
         if hdr.command_id == ZONE_STATUS_CHANGE_COMMAND and args[0] & 3:
-            if self._timer_handle:
-                self._timer_handle.cancel()
-            self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+            self._schedule_reset()
             if self.send_occupancy_event:
                 self.endpoint.device.occupancy_bus.listener_event(OCCUPANCY_EVENT)
 
@@ -308,11 +340,7 @@ class MotionOnEvent(_Motion):
         )
 
         self.debug("%s - Received motion event message", self.endpoint.device.ieee)
-
-        if self._timer_handle:
-            self._timer_handle.cancel()
-
-        self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+        self._schedule_reset()
 
 
 class _Occupancy(CustomCluster, OccupancySensing):
@@ -323,11 +351,22 @@ class _Occupancy(CustomCluster, OccupancySensing):
     def __init__(self, *args, **kwargs):
         """Init."""
         super().__init__(*args, **kwargs)
-        self._timer_handle = None
         self._loop = asyncio.get_running_loop()
+        self._scheduler = get_deadline_scheduler(self._loop)
+        self._scheduler.restore(
+            self, cluster_persist_key(self, "reset"), self._turn_off
+        )
+
+    def _schedule_reset(self):
+        """(Re)start the reset timer."""
+        self._scheduler.schedule(
+            self,
+            self.reset_s,
+            self._turn_off,
+            persist_key=cluster_persist_key(self, "reset"),
+        )
 
     def _turn_off(self):
-        self._timer_handle = None
         self._update_attribute(OCCUPANCY_STATE, OFF)
 
 
@@ -342,11 +381,7 @@ class OccupancyOnEvent(_Occupancy):
     def occupancy_event(self):
         """Occupancy event."""
         self._update_attribute(OCCUPANCY_STATE, ON)
-
-        if self._timer_handle:
-            self._timer_handle.cancel()
-
-        self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+        self._schedule_reset()
 
 
 class OccupancyWithReset(_Occupancy):
@@ -356,10 +391,8 @@ class OccupancyWithReset(_Occupancy):
         super()._update_attribute(attrid, value)
 
         if attrid == OCCUPANCY_STATE and value == ON:
-            if self._timer_handle:
-                self._timer_handle.cancel()
             self.endpoint.device.motion_bus.listener_event(MOTION_EVENT)
-            self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+            self._schedule_reset()
 
 
 class QuickInitDevice(CustomDevice):
@@ -446,41 +479,349 @@ class NoReplyMixin:
         return rsp
 
 
-def setup(custom_quirks_path: str | None = None) -> None:
-    """Register all quirks with zigpy, including optional custom quirks."""
+class ManufacturerSpecificSplitCluster(CustomCluster):
+    """Cluster separating manufacturer specific and standard attributes.
+
+    Some firmwares reject standard attributes in requests with a manufacturer code.
+    Attribute reads and reporting configuration are therefore split into a request
+    for the manufacturer specific and one for the standard attributes. With
+    `split_concurrently`, both requests are sent together instead of one after the
+    other, saving a round trip on sleepy devices with short wake windows.
+    """
+
+    split_concurrently: bool = False
+
+    def _is_manufacturer_specific_attr(self, attrid: int) -> bool:
+        """Return whether an attribute must be sent with the manufacturer code."""
+        return self.attributes[attrid].is_manufacturer_specific
+
+    @staticmethod
+    def combine_results(*result_lists):
+        """Combine results from 1 or more result lists from zigbee commands."""
+        success_global = []
+        failure_global = []
+        for result in result_lists:
+            if len(result) == 1:
+                success_global.extend(result[0])
+            elif len(result) == 2:
+                success_global.extend(result[0])
+                failure_global.extend(result[1])
+
+        if failure_global:
+            return [success_global, failure_global]
+        else:
+            return [success_global]
+
+    async def split_command(
+        self,
+        records: list[Any],
+        func: typing.Callable,
+        extract_attrid: typing.Callable[[Any], int],
+        *args,
+        failed_result: typing.Callable[[list[Any]], list] | None = None,
+        **kwargs,
+    ):
+        """Split execution of command in one for manufacturer specific and one for standard attributes.
+
+        When sent concurrently and only one of the requests fails, `failed_result`
+        builds the result of its records, otherwise the error is raised.
+        """
+        records_specific = [
+            e for e in records if self._is_manufacturer_specific_attr(extract_attrid(e))
+        ]
+        records_standard = [
+            e
+            for e in records
+            if not self._is_manufacturer_specific_attr(extract_attrid(e))
+        ]
+        requests = [r for r in (records_specific, records_standard) if r]
+
+        if not self.split_concurrently or len(requests) < 2:
+            results = [await func(r, *args, **kwargs) for r in requests]
+            return self.combine_results(*results)
+
+        results = await asyncio.gather(
+            *(func(r, *args, **kwargs) for r in requests), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+
+        if errors and (
+            failed_result is None
+            or len(errors) == len(results)
+            or not all(isinstance(e, Exception) for e in errors)
+        ):
+            raise errors[0]
+
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                self.debug("Split request for %s failed: %r", requests[i], result)
+                results[i] = failed_result(requests[i])
+
+        return self.combine_results(*results)
+
+    async def _configure_reporting(self, records, *args, **kwargs):
+        """Configure reporting ZCL foundation command."""
+        return await self.split_command(
+            records,
+            super()._configure_reporting,
+            lambda x: x.attrid,
+            *args,
+            failed_result=lambda records: [
+                [
+                    foundation.ConfigureReportingResponseRecord(
+                        status=foundation.Status.FAILURE,
+                        direction=record.direction,
+                        attrid=record.attrid,
+                    )
+                    for record in records
+                ]
+            ],
+            **kwargs,
+        )
+
+    async def _read_attributes(self, attr_ids, *args, **kwargs):
+        """Read attributes ZCL foundation command."""
+        return await self.split_command(
+            attr_ids,
+            super()._read_attributes,
+            lambda x: x,
+            *args,
+            failed_result=lambda attr_ids: [
+                [
+                    foundation.ReadAttributeRecord(
+                        attrid=attrid, status=foundation.Status.FAILURE
+                    )
+                    for attrid in attr_ids
+                ]
+            ],
+            **kwargs,
+        )
+
+
+class _SetupState:
+    """Mutable state of `setup()`, shared between its calls."""
+
+    lazy_loader: LazyQuirkLoader | None = None
+
+
+_SETUP_STATE = _SetupState()
+
+
+def _load_custom_quirk_module(modname: str, spec: ModuleSpec) -> float | None:
+    """Execute a custom quirk module, returning its load time or `None` on error."""
+    start = time.perf_counter()
+
+    try:
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[modname] = module
+        spec.loader.exec_module(module)
+    except Exception:
+        _LOGGER.exception("Unexpected exception importing custom quirk %r", modname)
+        return None
+
+    load_time = time.perf_counter() - start
+    _LOGGER.debug("Loaded custom quirk module %r in %0.3fs", modname, load_time)
+
+    return load_time
+
+
+def setup(
+    custom_quirks_path: str | None = None,
+    *,
+    lazy: bool = False,
+    custom_quirks_cache_path: str | None = None,
+    profiler: QuirkImportProfiler | None = None,
+    background: bool = False,
+    deadline_store_path: str | None = None,
+    telemetry_aggregation_window: float | None = None,
+) -> concurrent.futures.Future[None] | None:
+    """Register all quirks with zigpy, including optional custom quirks.
+
+    With `lazy`, only the quirk modules that can not be matched by manufacturer and
+    model are imported upfront. The rest are imported through the shipped quirk index
+    when a matching device is looked up in the device registry.
+
+    With `custom_quirks_cache_path`, the signatures registered by every custom quirk
+    module are cached on disk. Unchanged custom quirk modules are then only executed
+    once a matching device is looked up.
+
+    With a `profiler`, the time, memory and registry entries of every quirk module
+    imported are recorded, including modules loaded lazily later on. Memory is only
+    traced during `setup()` itself.
+
+    With `background`, only the modules needed upfront are imported synchronously
+    (like `lazy`) and the remaining quirk modules are imported in a background thread.
+    The returned future completes once all quirks are registered. Devices looked up
+    before then have their quirks imported on demand.
+
+    With `deadline_store_path`, pending resets of self-resetting clusters are kept
+    in that file and restored once per device when its clusters are created again.
+    The store is written shortly after changes and flushed when the interpreter
+    exits. Call `flush()` on `get_deadline_store()` to write it right away, e.g.
+    when shutting down without exiting.
+
+    With `telemetry_aggregation_window`, electrical measurement and metering
+    clusters supporting it report the mean of their measurements over that many
+    seconds, instead of every value reported by the device.
+    """
+    if deadline_store_path is not None:
+        deadline_store = DeadlineStore(pathlib.Path(deadline_store_path))
+        deadline_store.load()
+        set_deadline_store(deadline_store)
+
+    if telemetry_aggregation_window is not None:
+        set_default_aggregation_window(telemetry_aggregation_window)
 
     if custom_quirks_path is not None:
         DEVICE_REGISTRY.purge_custom_quirks(custom_quirks_path)
 
-    # Import all quirks in the `zhaquirks` package first
-    for _importer, modname, _ispkg in pkgutil.walk_packages(
-        path=__path__,
-        prefix=__name__ + ".",
-    ):
-        _LOGGER.debug("Loading quirks module %r", modname)
-        importlib.import_module(modname)
+    if _SETUP_STATE.lazy_loader is not None:
+        _SETUP_STATE.lazy_loader.uninstall()
+        _SETUP_STATE.lazy_loader = None
+
+    if profiler is not None:
+        profiler.start()
 
-    if custom_quirks_path is None:
-        return
+    try:
+        index = load_index() if lazy or background else None
 
-    path = pathlib.Path(custom_quirks_path)
+        if index is not None:
+            _SETUP_STATE.lazy_loader = LazyQuirkLoader(index, profiler=profiler)
+            _SETUP_STATE.lazy_loader.load_eager()
+        else:
+            # Import all quirks in the `zhaquirks` package first
+            for _importer, modname, _ispkg in pkgutil.walk_packages(
+                path=__path__,
+                prefix=__name__ + ".",
+            ):
+                _LOGGER.debug("Loading quirks module %r", modname)
+                with _profile(profiler, modname):
+                    importlib.import_module(modname)
+
+        if custom_quirks_path is not None:
+            _setup_custom_quirks(
+                pathlib.Path(custom_quirks_path),
+                (
+                    None
+                    if custom_quirks_cache_path is None
+                    else CustomQuirkCache(pathlib.Path(custom_quirks_cache_path))
+                ),
+                profiler,
+            )
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+    if _SETUP_STATE.lazy_loader is not None:
+        _SETUP_STATE.lazy_loader.install()
+
+    if not background:
+        return None
+
+    if index is None:
+        # Everything was imported synchronously
+        future: concurrent.futures.Future[None] = concurrent.futures.Future()
+        future.set_result(None)
+        return future
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="zhaquirks"
+    )
+    future = executor.submit(_SETUP_STATE.lazy_loader.load_all, iter_quirk_modules())
+    executor.shutdown(wait=False)
+
+    return future
+
+
+def _profile(
+    profiler: QuirkImportProfiler | None, modname: str
+) -> contextlib.AbstractContextManager[None]:
+    """Profile a module import if profiling is enabled."""
+    if profiler is None:
+        return contextlib.nullcontext()
+
+    return profiler.profile(modname)
+
+
+def _setup_custom_quirks(
+    path: pathlib.Path,
+    cache: CustomQuirkCache | None,
+    profiler: QuirkImportProfiler | None = None,
+) -> None:
+    """Load custom quirks, deferring cached modules to the lazy quirk loader."""
     _LOGGER.debug("Loading custom quirks from %r", path)
 
     loaded = False
 
+    if cache is not None:
+        cache.load()
+
     # Treat the custom quirk path (e.g. `/config/custom_quirks/`) itself as a module
-    for importer, modname, _ispkg in pkgutil.walk_packages(path=[str(path)]):
+    for importer, modname, ispkg in pkgutil.walk_packages(path=[str(path)]):
         _LOGGER.debug("Loading custom quirk module %r", modname)
 
-        try:
-            spec = importer.find_spec(modname)
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[modname] = module
-            spec.loader.exec_module(module)
-        except Exception:
-            _LOGGER.exception("Unexpected exception importing custom quirk %r", modname)
-        else:
+        spec = importer.find_spec(modname)
+        file = pathlib.Path(spec.origin)
+        entry = None
+
+        # Packages are always executed, `walk_packages` needs them to recurse
+        if cache is not None and not ispkg:
+            entry = cache.get(file, modname)
+
+        if entry is not None and entry.deferrable:
+            _LOGGER.debug("Deferring cached custom quirk module %r", modname)
+
+            if _SETUP_STATE.lazy_loader is None:
+                _SETUP_STATE.lazy_loader = LazyQuirkLoader(profiler=profiler)
+
+            _SETUP_STATE.lazy_loader.defer(
+                modname,
+                entry.signatures,
+                functools.partial(_load_custom_quirk_module, modname, spec),
+            )
             loaded = True
+            continue
+
+        mtime_ns = sha256 = None
+
+        if cache is not None:
+            with contextlib.suppress(OSError):
+                mtime_ns = file.stat().st_mtime_ns
+                sha256 = file_hash(file)
+
+        num_handlers = len(zigpy.quirks._uninitialized_device_message_handlers)
+        with _profile(profiler, modname):
+            load_time = _load_custom_quirk_module(modname, spec)
+
+        if load_time is None:
+            continue
+
+        loaded = True
+
+        if cache is None or sha256 is None:
+            continue
+
+        signatures = registered_signatures(modname, file)
+        cache.set(
+            file,
+            CachedQuirkModule(
+                modname=modname,
+                mtime_ns=mtime_ns,
+                sha256=sha256,
+                signatures=signatures,
+                deferrable=(
+                    not ispkg
+                    and bool(signatures)
+                    and (None, None) not in signatures
+                    and num_handlers
+                    == len(zigpy.quirks._uninitialized_device_message_handlers)
+                ),
+                load_time=load_time,
+            ),
+        )
+
+    if cache is not None:
+        cache.save()
 
     if loaded:
         _LOGGER.warning(
@@ -28,14 +28,12 @@ Broken ZCL attributes:
     0x0204 - TemperatureDisplayMode (0x0000): Writing doesn't seem to do anything
 """
 
-from collections.abc import Callable
 from datetime import UTC, datetime
 import time
-from typing import Any
 
 from zigpy import types
 from zigpy.profiles import zha
-from zigpy.quirks import CustomCluster, CustomDevice
+from zigpy.quirks import CustomDevice
 from zigpy.zcl.clusters.general import (
     Basic,
     Identify,
@@ -48,6 +46,7 @@ from zigpy.zcl.clusters.homeautomation import Diagnostic
 from zigpy.zcl.clusters.hvac import Thermostat, UserInterface
 from zigpy.zcl.foundation import ZCLAttributeDef, ZCLCommandDef
 
+from zhaquirks import ManufacturerSpecificSplitCluster
 from zhaquirks.const import (
     DEVICE_TYPE,
     ENDPOINTS,
@@ -158,72 +157,16 @@ class DanfossPreheatCommandEnum(types.enum8):
     Force = 0
 
 
-class CustomizedStandardCluster(CustomCluster):
+class CustomizedStandardCluster(ManufacturerSpecificSplitCluster):
     """Danfoss customized standard clusters by adding custom attributes.
 
     Danfoss doesn't allow all standard attributes when manufacturer specific is requested.
     Therefore, this subclass separates manufacturer specific and standard attributes for Zigbee commands allowing
     manufacturer specific to be passed for specific attributes, but not for standard attributes.
+    Both requests are sent together to fit in the short wake windows of the TRVs.
     """
 
-    @staticmethod
-    def combine_results(*result_lists):
-        """Combine results from 1 or more result lists from zigbee commands."""
-        success_global = []
-        failure_global = []
-        for result in result_lists:
-            if len(result) == 1:
-                success_global.extend(result[0])
-            elif len(result) == 2:
-                success_global.extend(result[0])
-                failure_global.extend(result[1])
-
-        if failure_global:
-            return [success_global, failure_global]
-        else:
-            return [success_global]
-
-    async def split_command(
-        self,
-        records: list[Any],
-        func: Callable,
-        extract_attrid: Callable[[Any], int],
-        *args,
-        **kwargs,
-    ):
-        """Split execution of command in one for manufacturer specific and one for standard attributes."""
-        records_specific = [
-            e
-            for e in records
-            if self.attributes[extract_attrid(e)].is_manufacturer_specific
-        ]
-        records_standard = [
-            e
-            for e in records
-            if not self.attributes[extract_attrid(e)].is_manufacturer_specific
-        ]
-
-        result_specific = (
-            await func(records_specific, *args, **kwargs) if records_specific else []
-        )
-
-        result_standard = (
-            await func(records_standard, *args, **kwargs) if records_standard else []
-        )
-
-        return self.combine_results(result_specific, result_standard)
-
-    async def _configure_reporting(self, records, *args, **kwargs):
-        """Configure reporting ZCL foundation command."""
-        return await self.split_command(
-            records, super()._configure_reporting, lambda x: x.attrid, *args, **kwargs
-        )
-
-    async def _read_attributes(self, attr_ids, *args, **kwargs):
-        """Read attributes ZCL foundation command."""
-        return await self.split_command(
-            attr_ids, super()._read_attributes, lambda x: x, *args, **kwargs
-        )
+    split_concurrently = True
 
 
 class DanfossThermostatCluster(CustomizedStandardCluster, Thermostat):
@@ -8,6 +8,7 @@ from zigpy.zcl import foundation
 from zigpy.zcl.clusters.general import Basic, PowerConfiguration, Scenes
 
 from zhaquirks import EventableCluster
+from zhaquirks.singleflight import derived_from, read_attributes_once
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -207,14 +208,19 @@ class DoublingPowerConfigClusterIKEA(CustomCluster, PowerConfiguration):
     async def bind(self):
         """Bind cluster and read the sw_build_id for later use."""
         result = await super().bind()
-        await self.endpoint.basic.read_attributes([Basic.AttributeDefs.sw_build_id.id])
+        await read_attributes_once(
+            self.endpoint.basic, [Basic.AttributeDefs.sw_build_id.id]
+        )
         return result
 
-    def _is_firmware_new(self):
-        """Check if new firmware is installed that does not require battery doubling."""
-        # get sw_build_id from attribute cache if available
-        sw_build_id = self.endpoint.basic.get(Basic.AttributeDefs.sw_build_id.id)
+    @derived_from(
+        lambda self: self.endpoint.basic.get(Basic.AttributeDefs.sw_build_id.id)
+    )
+    def _is_firmware_new(self, sw_build_id):
+        """Check if new firmware is installed that does not require battery doubling.
 
+        The result is memoized until the cached sw_build_id changes.
+        """
         # sw_build_id is not cached or empty, so we consider it new firmware for now
         if not sw_build_id:
             return True
@@ -244,15 +250,17 @@ class DoublingPowerConfigClusterIKEA(CustomCluster, PowerConfiguration):
 
     async def _read_fw_and_update_battery_pct(self, reported_battery_pct):
         """Read firmware version and update battery percentage remaining if necessary."""
-        # read sw_build_id from device
-        await self.endpoint.basic.read_attributes([Basic.AttributeDefs.sw_build_id.id])
+        # read sw_build_id from device, sharing the read with other battery reports
+        await read_attributes_once(
+            self.endpoint.basic, [Basic.AttributeDefs.sw_build_id.id]
+        )
 
         # check if sw_build_id was read successfully and old firmware is installed
-        # if so, update cache with reported battery percentage (doubled)
+        # if so, update cache with reported battery percentage (doubled by _update_attribute)
         if not self._is_firmware_new():
             self._update_attribute(
                 PowerConfiguration.AttributeDefs.battery_percentage_remaining.id,
-                reported_battery_pct * 2,
+                reported_battery_pct,
             )
 
     def _update_attribute(self, attrid, value):
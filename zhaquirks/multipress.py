@@ -0,0 +1,136 @@
+"""Multi-press and hold detection for remote buttons."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from zhaquirks.scheduler import DeadlineScheduler, get_deadline_scheduler
+
+
+class MultiPressDetector:
+    """Derive multi-press and hold events of a button from presses and releases.
+
+    Timing uses the event loop clock and all deadlines run on the shared deadline
+    scheduler, so no task or timer is created per press. Devices reporting short
+    presses themselves call `press()`, devices reporting the button state call
+    `down()` and `up()`.
+    """
+
+    def __init__(
+        self,
+        on_presses: Callable[[int], None],
+        *,
+        window: float = 0.3,
+        max_presses: int | None = None,
+        hold_time: float | None = None,
+        on_hold: Callable[[], None] | None = None,
+        on_release: Callable[[float], None] | None = None,
+    ) -> None:
+        """Init the detector.
+
+        `on_presses` is called with the number of presses once no press followed
+        within `window` seconds, or right away after `max_presses`. With a
+        `hold_time`, a button down for that long calls `on_hold` and, once
+        released, `on_release` with the duration it was down.
+        """
+        self.window = window
+        self.max_presses = max_presses
+        self.hold_time = hold_time
+        self._on_presses = on_presses
+        self._on_hold = on_hold
+        self._on_release = on_release
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._scheduler: DeadlineScheduler | None = None
+        self._count = 0
+        self._last_press = 0.0
+        self._down_at: float | None = None
+        self._held = False
+
+    @property
+    def count(self) -> int:
+        """Number of presses in the pending sequence."""
+        return self._count
+
+    @property
+    def held(self) -> bool:
+        """Whether the button is currently held."""
+        return self._held
+
+    def _get_scheduler(self) -> DeadlineScheduler:
+        if self._scheduler is None:
+            self._loop = asyncio.get_running_loop()
+            self._scheduler = get_deadline_scheduler(self._loop)
+        return self._scheduler
+
+    def _now(self) -> float:
+        self._get_scheduler()
+        return self._loop.time()
+
+    def press(self) -> int:
+        """Register a short press, returning the number of presses so far."""
+        scheduler = self._get_scheduler()
+        now = self._now()
+
+        # the sequence ended, even if its deadline did not run yet
+        if self._count and now - self._last_press > self.window:
+            scheduler.cancel(self)
+            self._finish()
+
+        self._count += 1
+        self._last_press = now
+        count = self._count
+
+        if self.max_presses is not None and count >= self.max_presses:
+            scheduler.cancel(self)
+            self._finish()
+        else:
+            scheduler.schedule(self, self.window, self._finish)
+
+        return count
+
+    def down(self) -> None:
+        """Register the button going down."""
+        if self._down_at is not None:
+            return
+
+        self._down_at = self._now()
+        if self.hold_time is not None:
+            self._get_scheduler().schedule(self, self.hold_time, self._hold)
+
+    def up(self) -> None:
+        """Register the button going up."""
+        if self._down_at is None:
+            return
+
+        duration = self._now() - self._down_at
+        self._down_at = None
+
+        if self._held:
+            self._held = False
+            if self._on_release is not None:
+                self._on_release(duration)
+            return
+
+        self.press()
+
+    def cancel(self) -> None:
+        """Drop the pending sequence and hold without calling back."""
+        if self._scheduler is not None:
+            self._scheduler.cancel(self)
+
+        self._count = 0
+        self._down_at = None
+        self._held = False
+
+    def _finish(self) -> None:
+        count, self._count = self._count, 0
+        if count:
+            self._on_presses(count)
+
+    def _hold(self) -> None:
+        # presses before holding end their sequence
+        self._finish()
+        self._held = True
+        if self._on_hold is not None:
+            self._on_hold()
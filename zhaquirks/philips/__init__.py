@@ -1,9 +1,7 @@
 """Module for Philips quirks implementations."""
 
-import asyncio
 import itertools
 import logging
-import time
 from typing import Any, Final, Optional, Union
 
 from zigpy.quirks import CustomCluster
@@ -37,6 +35,7 @@ from zhaquirks.const import (
     TURN_ON,
     ZHA_SEND_EVENT,
 )
+from zhaquirks.multipress import MultiPressDetector
 
 PHILIPS = "Philips"
 SIGNIFY = "Signify Netherlands B.V."
@@ -74,32 +73,29 @@ class PhilipsBasicCluster(CustomCluster, Basic):
         await self.write_attributes(self.attr_config, manufacturer=0x100B)
 
 
-class ButtonPressQueue:
+class ButtonPressQueue(MultiPressDetector):
     """Philips button queue to derive multiple press events."""
 
-    def __init__(self):
+    def __init__(self, ms_threshold: int = 300):
         """Init."""
-        self._ms_threshold = 300
-        self._ms_last_click = 0
-        self._click_counter = 1
+        super().__init__(self._send, window=ms_threshold / 1000)
         self._callback = lambda x: None
-        self._task = None
 
-    async def _job(self):
-        await asyncio.sleep(self._ms_threshold / 1000)
-        self._callback(self._click_counter)
+    @property
+    def _ms_threshold(self) -> float:
+        return self.window * 1000
+
+    @_ms_threshold.setter
+    def _ms_threshold(self, value: float) -> None:
+        self.window = value / 1000
+
+    def _send(self, click_count: int) -> None:
+        self._callback(click_count)
 
     def press(self, callback):
         """Process a button press."""
         self._callback = callback
-        now_ms = time.time() * 1000
-        if now_ms - self._ms_last_click > self._ms_threshold:
-            self._click_counter = 1
-        else:
-            self._task.cancel()
-            self._click_counter += 1
-        self._ms_last_click = now_ms
-        self._task = asyncio.ensure_future(self._job())
+        return super().press()
 
 
 class Button:
@@ -178,11 +174,15 @@ class PhilipsRemoteCluster(CustomCluster):
         PressType(SHORT_PRESS, COMMAND_PRESS),
         PressType(SHORT_RELEASE, COMMAND_M_SHORT_RELEASE),
     ]
+    # Maximum pause between presses of a multi-press, in milliseconds
+    MULTI_PRESS_THRESHOLD_MS: int = 300
 
     def __init__(self, endpoint, is_server=True):
         """Initialize button press queue for each button."""
         super().__init__(endpoint, is_server)
-        self.button_press_queue = {k: ButtonPressQueue() for k in self.BUTTONS}
+        self.button_press_queue = {
+            k: ButtonPressQueue(self.MULTI_PRESS_THRESHOLD_MS) for k in self.BUTTONS
+        }
 
     def handle_cluster_request(
         self,
@@ -0,0 +1,129 @@
+"""Persistent cache of the signatures registered by custom quirk modules."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+from zigpy.quirks import DEVICE_REGISTRY
+from zigpy.quirks.registry import DeviceRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+@dataclasses.dataclass
+class CachedQuirkModule:
+    """Cache entry of a single custom quirk module."""
+
+    modname: str
+    mtime_ns: int
+    sha256: str
+    signatures: list[tuple[str | None, str | None]]
+    deferrable: bool
+    load_time: float
+
+
+def file_hash(path: pathlib.Path) -> str:
+    """Return the SHA-256 of a file."""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def registered_signatures(
+    modname: str, path: pathlib.Path, registry: DeviceRegistry = DEVICE_REGISTRY
+) -> list[tuple[str | None, str | None]]:
+    """Return the (manufacturer, model) pairs a module registered quirks for."""
+    signatures = set()
+
+    for manufacturer, models in registry.registry.items():
+        for model, quirks in models.items():
+            if any(quirk.__module__ == modname for quirk in quirks):
+                signatures.add((manufacturer, model))
+
+    for (manufacturer, model), entries in registry._registry_v2.items():
+        if any(pathlib.Path(entry.quirk_file) == path for entry in entries):
+            signatures.add((manufacturer, model))
+
+    return sorted(signatures, key=lambda sig: (sig[0] or "", sig[1] or ""))
+
+
+class CustomQuirkCache:
+    """Custom quirk modules keyed by file path, validated by mtime and hash."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """Init the cache."""
+        self.path = path
+        self.modules: dict[str, CachedQuirkModule] = {}
+        self._seen: set[str] = set()
+
+    def load(self) -> None:
+        """Load the cache from disk, starting empty if it is missing or invalid."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data["version"] != CACHE_VERSION:
+                raise ValueError(f"Unknown cache version {data['version']!r}")
+
+            self.modules = {
+                file: CachedQuirkModule(
+                    **{
+                        **entry,
+                        "signatures": [tuple(sig) for sig in entry["signatures"]],
+                    }
+                )
+                for file, entry in data["modules"].items()
+            }
+        except FileNotFoundError:
+            self.modules = {}
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            _LOGGER.warning(
+                "Ignoring invalid custom quirk cache %s: %r", self.path, exc
+            )
+            self.modules = {}
+
+    def save(self) -> None:
+        """Write the cache to disk, dropping modules that no longer exist."""
+        data = {
+            "version": CACHE_VERSION,
+            "modules": {
+                file: dataclasses.asdict(entry)
+                for file, entry in sorted(self.modules.items())
+                if file in self._seen
+            },
+        }
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            _LOGGER.warning("Unable to write custom quirk cache %s: %r", self.path, exc)
+
+    def get(self, path: pathlib.Path, modname: str) -> CachedQuirkModule | None:
+        """Return the cache entry for a file if the file is unchanged."""
+        self._seen.add(str(path))
+        entry = self.modules.get(str(path))
+
+        if entry is None or entry.modname != modname:
+            return None
+
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+            if mtime_ns != entry.mtime_ns:
+                # The file was touched, only its contents matter
+                if file_hash(path) != entry.sha256:
+                    return None
+                entry.mtime_ns = mtime_ns
+        except OSError:
+            return None
+
+        return entry
+
+    def set(self, path: pathlib.Path, entry: CachedQuirkModule) -> None:
+        """Store the cache entry for a file."""
+        self._seen.add(str(path))
+        self.modules[str(path)] = entry
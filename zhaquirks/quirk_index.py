@@ -0,0 +1,349 @@
+"""Prebuilt (manufacturer, model) index for lazy quirk loading."""
+
+from __future__ import annotations
+
+import collections
+from collections.abc import Callable, Iterable
+import contextlib
+import importlib
+import json
+import logging
+import pathlib
+import pkgutil
+import threading
+from typing import TYPE_CHECKING, Any
+
+import zigpy.quirks
+from zigpy.quirks import DEVICE_REGISTRY
+from zigpy.quirks.registry import DeviceRegistry
+
+if TYPE_CHECKING:
+    from .quirk_profiler import QuirkImportProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_NAME = __package__
+PACKAGE_PATH = pathlib.Path(__file__).parent
+INDEX_PATH = PACKAGE_PATH / "quirk_index.json"
+INDEX_VERSION = 2
+
+
+def iter_quirk_modules() -> list[str]:
+    """Return the names of all modules in the `zhaquirks` package, in load order."""
+    return [
+        modname
+        for _importer, modname, _ispkg in pkgutil.walk_packages(
+            path=[str(PACKAGE_PATH)], prefix=PACKAGE_NAME + "."
+        )
+    ]
+
+
+def _module_from_path(path: pathlib.Path) -> str | None:
+    """Map a quirk source file to its module name within the package."""
+    try:
+        relative = pathlib.Path(path).resolve().relative_to(PACKAGE_PATH.resolve())
+    except ValueError:
+        return None
+
+    parts = list(relative.with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+
+    return ".".join([PACKAGE_NAME, *parts])
+
+
+def build_index(registry: DeviceRegistry = DEVICE_REGISTRY) -> dict[str, Any]:
+    """Build the quirk index from a registry with all quirk modules imported."""
+    order = {modname: i for i, modname in enumerate(iter_quirk_modules())}
+
+    manufacturer_model: dict[str, dict[str, set[str]]] = {}
+    manufacturer_only: dict[str, set[str]] = {}
+    model_only: dict[str, set[str]] = {}
+    eager: set[str] = set()
+    modules: set[str] = set()
+
+    def _add(manufacturer: str | None, model: str | None, modname: str | None):
+        if modname not in order:
+            # Custom quirks and quirks defined outside of the package
+            return
+
+        modules.add(modname)
+
+        if manufacturer is None and model is None:
+            eager.add(modname)
+        elif model is None:
+            manufacturer_only.setdefault(manufacturer, set()).add(modname)
+        elif manufacturer is None:
+            model_only.setdefault(model, set()).add(modname)
+        else:
+            manufacturer_model.setdefault(manufacturer, {}).setdefault(
+                model, set()
+            ).add(modname)
+
+    for manufacturer, models in registry.registry.items():
+        for model, quirks in models.items():
+            for quirk in quirks:
+                _add(manufacturer, model, quirk.__module__)
+
+    for (manufacturer, model), entries in registry._registry_v2.items():
+        for entry in entries:
+            _add(manufacturer, model, _module_from_path(entry.quirk_file))
+
+    # Modules hooking into zigpy outside of the registry must always be loaded
+    for handler in zigpy.quirks._uninitialized_device_message_handlers:
+        if handler.__module__ in order:
+            eager.add(handler.__module__)
+            modules.add(handler.__module__)
+
+    def _sorted(modnames: set[str]) -> list[str]:
+        return sorted(modnames, key=order.__getitem__)
+
+    return {
+        "version": INDEX_VERSION,
+        # Indexed modules in the order `setup()` imports them without an index
+        "modules": _sorted(modules),
+        "eager": _sorted(eager),
+        "manufacturer_model": {
+            manufacturer: {
+                model: _sorted(modnames) for model, modnames in sorted(models.items())
+            }
+            for manufacturer, models in sorted(manufacturer_model.items())
+        },
+        "manufacturer": {
+            manufacturer: _sorted(modnames)
+            for manufacturer, modnames in sorted(manufacturer_only.items())
+        },
+        "model": {
+            model: _sorted(modnames) for model, modnames in sorted(model_only.items())
+        },
+    }
+
+
+def load_index(path: pathlib.Path = INDEX_PATH) -> dict[str, Any] | None:
+    """Load the shipped quirk index, returning `None` if it is missing or stale."""
+    try:
+        index = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        _LOGGER.warning("Unable to load quirk index %s: %r", path, exc)
+        return None
+
+    if index.get("version") != INDEX_VERSION:
+        _LOGGER.warning("Ignoring quirk index %s with unknown version", path)
+        return None
+
+    return index
+
+
+def write_index(index: dict[str, Any], path: pathlib.Path = INDEX_PATH) -> None:
+    """Write the quirk index to disk."""
+    path.write_text(json.dumps(index, indent=1, sort_keys=True) + "\n", "utf-8")
+
+
+class LazyQuirkLoader:
+    """Import quirk modules only when a matching device is looked up.
+
+    Quirk modules can also be loaded from a background thread while the loader is
+    installed, devices looked up in the meantime load their quirks on demand. A
+    lookup waits for a module being imported by another thread to finish.
+    """
+
+    def __init__(
+        self,
+        index: dict[str, Any] | None = None,
+        registry: DeviceRegistry = DEVICE_REGISTRY,
+        *,
+        profiler: QuirkImportProfiler | None = None,
+    ) -> None:
+        """Init the loader."""
+        self.registry = registry
+        self.profiler = profiler
+        self.eager: list[str] = []
+        # Position of each package module in the eager import order
+        self.module_order: dict[str, int] = {}
+        self.loaded_modules: set[str] = set()
+        self._importing: set[str] = set()
+        self._modules: dict[tuple[str | None, str | None], list[str]] = (
+            collections.defaultdict(list)
+        )
+        self._keys: dict[str, list[tuple[str | None, str | None]]] = (
+            collections.defaultdict(list)
+        )
+        self._custom_loaders: dict[str, Callable[[], Any]] = {}
+        self._registry_get_device = None
+        self._lock = threading.RLock()
+        self._cancelled = False
+
+        if index is not None:
+            self.eager = index["eager"]
+            self.module_order = {
+                modname: i for i, modname in enumerate(index["modules"])
+            }
+
+            for manufacturer, models in index["manufacturer_model"].items():
+                for model, modnames in models.items():
+                    self._add(manufacturer, model, modnames)
+
+            for manufacturer, modnames in index["manufacturer"].items():
+                self._add(manufacturer, None, modnames)
+
+            for model, modnames in index["model"].items():
+                self._add(None, model, modnames)
+
+    def _add(
+        self, manufacturer: str | None, model: str | None, modnames: Iterable[str]
+    ) -> None:
+        for modname in modnames:
+            self._modules[manufacturer, model].append(modname)
+            self._keys[modname].append((manufacturer, model))
+
+    def defer(
+        self,
+        modname: str,
+        signatures: Iterable[tuple[str | None, str | None]],
+        load: Callable[[], Any],
+    ) -> None:
+        """Defer loading a module outside of the package until a device matches."""
+        self._custom_loaders[modname] = load
+
+        for manufacturer, model in signatures:
+            assert manufacturer is not None or model is not None
+            self._add(manufacturer, model, [modname])
+
+    def _import(self, modname: str) -> None:
+        # The lock is held for the whole import, so other threads looking up the
+        # module wait for it, and the registry is not mutated during lookups
+        with self._lock:
+            if modname in self.loaded_modules or modname in self._importing:
+                return
+
+            _LOGGER.debug("Loading quirks module %r", modname)
+            self._importing.add(modname)
+
+            try:
+                with (
+                    self.profiler.profile(modname)
+                    if self.profiler is not None
+                    else contextlib.nullcontext()
+                ):
+                    if modname in self._custom_loaders:
+                        self._custom_loaders[modname]()
+                    else:
+                        importlib.import_module(modname)
+            finally:
+                self._importing.discard(modname)
+
+            self.loaded_modules.add(modname)
+
+            # Restore the order quirks have when all modules are imported upfront
+            for manufacturer, model in self._keys.get(modname, ()):
+                quirks = self.registry.registry[manufacturer][model]
+                quirks[:] = sorted(quirks, key=self._quirk_order)
+
+    def _quirk_order(self, quirk: type) -> tuple[bool, int]:
+        # Quirks are registered in front of the others, so quirks imported last match
+        # first: custom quirks, then package quirks of later modules
+        modname = quirk.__module__
+        return (
+            modname.startswith(PACKAGE_NAME + "."),
+            -self.module_order.get(modname, -1),
+        )
+
+    def _try_import(self, modname: str) -> None:
+        """Import a module, logging errors so it is tried again on the next lookup."""
+        try:
+            self._import(modname)
+        except Exception:  # pylint: disable=broad-exception-caught
+            _LOGGER.exception(
+                "Unexpected exception importing quirks module %r", modname
+            )
+
+    def load_eager(self) -> None:
+        """Import the modules that can not be loaded on demand."""
+        for modname in self.eager:
+            self._import(modname)
+
+    def load_all(self, modnames: Iterable[str]) -> None:
+        """Import all given modules, stopping early once the loader is uninstalled.
+
+        Modules failing to import are logged and skipped, they are tried again when
+        a matching device is looked up.
+        """
+        for modname in modnames:
+            if self._cancelled:
+                _LOGGER.debug("Stopped loading quirks modules")
+                return
+
+            self._try_import(modname)
+
+    def modules_for(self, manufacturer: str | None, model: str | None) -> list[str]:
+        """Return the quirk modules that may match a manufacturer and model."""
+        modnames = dict.fromkeys(
+            [
+                *self._modules.get((manufacturer, model), ()),
+                *self._modules.get((manufacturer, None), ()),
+                *self._modules.get((None, model), ()),
+            ]
+        )
+
+        # Custom quirks are loaded last so they take precedence
+        return sorted(modnames, key=lambda modname: modname in self._custom_loaders)
+
+    def load(self, manufacturer: str | None, model: str | None) -> list[str]:
+        """Import all quirk modules for a manufacturer and model."""
+        with self._lock:
+            modnames = [
+                modname
+                for modname in self.modules_for(manufacturer, model)
+                if modname not in self.loaded_modules
+            ]
+
+            for modname in modnames:
+                self._try_import(modname)
+
+        return modnames
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> LazyQuirkLoader:
+        """Return the loader itself, it is shared like the registry it is installed in.
+
+        `QuirkBuilder.clone()` deep copies the registry, including the `get_device`
+        of the installed loader.
+        """
+        return self
+
+    def get_device(self, device):
+        """Load quirks for the device and then look it up in the registry."""
+        with self._lock:
+            if not isinstance(device, zigpy.quirks.BaseCustomDevice):
+                self.load(device.manufacturer, device.model)
+
+            return self._registry_get_device(device)
+
+    def install(self) -> None:
+        """Install the loader into device lookups of the registry."""
+        if self._registry_get_device is not None:
+            return
+
+        self._registry_get_device = self.registry.get_device
+        self.registry.get_device = self.get_device
+
+    def uninstall(self) -> None:
+        """Remove the loader from the registry and stop loading in the background."""
+        self._cancelled = True
+
+        if self._registry_get_device is None:
+            return
+
+        del self.registry.get_device
+        self._registry_get_device = None
+
+
+def main() -> None:
+    """Regenerate the shipped quirk index."""
+    for modname in iter_quirk_modules():
+        importlib.import_module(modname)
+
+    write_index(build_index())
+
+
+if __name__ == "__main__":
+    main()
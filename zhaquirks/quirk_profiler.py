@@ -0,0 +1,195 @@
+"""Profiler for the time, memory and quirks of every imported quirk module."""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterator
+import contextlib
+import dataclasses
+import json
+import sys
+import time
+import tracemalloc
+
+from zigpy.quirks import DEVICE_REGISTRY
+from zigpy.quirks.registry import DeviceRegistry
+
+import zhaquirks
+
+SORT_KEYS = (
+    "module",
+    "load_time",
+    "memory",
+    "memory_peak",
+    "v1_quirks",
+    "v2_quirks",
+)
+
+
+@dataclasses.dataclass
+class ModuleProfile:
+    """Import profile of a single quirk module.
+
+    Time and memory include the modules imported by the module itself.
+    """
+
+    module: str
+    load_time: float = 0.0
+    memory: int = 0
+    memory_peak: int = 0
+    v1_quirks: int = 0
+    v2_quirks: int = 0
+
+
+def _count_quirks(registry: DeviceRegistry) -> tuple[int, int]:
+    """Return the number of v1 and v2 registry entries."""
+    v1_quirks = sum(
+        len(quirks)
+        for models in registry.registry.values()
+        for quirks in models.values()
+    )
+    v2_quirks = sum(len(entries) for entries in registry._registry_v2.values())
+
+    return v1_quirks, v2_quirks
+
+
+class QuirkImportProfiler:
+    """Collect import profiles of quirk modules loaded by `zhaquirks.setup()`."""
+
+    def __init__(self, registry: DeviceRegistry = DEVICE_REGISTRY) -> None:
+        """Init the profiler."""
+        self.registry = registry
+        self.profiles: dict[str, ModuleProfile] = {}
+        self._depth = 0
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        """Start tracing memory allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        """Stop tracing memory allocations, if the profiler started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def profile(self, module: str) -> Iterator[None]:
+        """Profile the import of a module."""
+        # Nested imports are accounted to the outermost module
+        if self._depth:
+            yield
+            return
+
+        self._depth += 1
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        v1_before, v2_before = _count_quirks(self.registry)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            load_time = time.perf_counter() - start
+            v1_after, v2_after = _count_quirks(self.registry)
+
+            profile = self.profiles.setdefault(module, ModuleProfile(module))
+            profile.load_time += load_time
+            profile.v1_quirks += v1_after - v1_before
+            profile.v2_quirks += v2_after - v2_before
+
+            if tracing:
+                memory, memory_peak = tracemalloc.get_traced_memory()
+                profile.memory += memory - memory_before
+                profile.memory_peak = max(
+                    profile.memory_peak, memory_peak - memory_before
+                )
+
+    def report(
+        self, sort_by: str = "load_time", *, package_depth: int | None = None
+    ) -> list[ModuleProfile]:
+        """Return the module profiles, largest first.
+
+        With `package_depth`, profiles are summed per package, e.g. a depth of 2
+        gives one profile per vendor package like `zhaquirks.tuya`.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(
+                f"Invalid sort key {sort_by!r}, expected one of {SORT_KEYS}"
+            )
+
+        profiles = list(self.profiles.values())
+
+        if package_depth is not None:
+            packages: dict[str, ModuleProfile] = {}
+
+            for profile in profiles:
+                package = ".".join(profile.module.split(".")[:package_depth])
+                total = packages.setdefault(package, ModuleProfile(package))
+                total.load_time += profile.load_time
+                total.memory += profile.memory
+                total.memory_peak = max(total.memory_peak, profile.memory_peak)
+                total.v1_quirks += profile.v1_quirks
+                total.v2_quirks += profile.v2_quirks
+
+            profiles = list(packages.values())
+
+        return sorted(
+            profiles,
+            key=lambda profile: getattr(profile, sort_by),
+            reverse=sort_by != "module",
+        )
+
+    def to_json(self, sort_by: str = "load_time", **kwargs) -> str:
+        """Return the report as JSON."""
+        return json.dumps(
+            [dataclasses.asdict(p) for p in self.report(sort_by, **kwargs)], indent=1
+        )
+
+    def format_table(
+        self, sort_by: str = "load_time", limit: int | None = None, **kwargs
+    ) -> str:
+        """Return the report as a plain text table."""
+        profiles = self.report(sort_by, **kwargs)[:limit]
+        width = max([len("module"), *(len(p.module) for p in profiles)])
+
+        lines = [
+            f"{'module':<{width}} {'time (ms)':>10} {'memory (KiB)':>13}"
+            f" {'peak (KiB)':>11} {'v1':>5} {'v2':>5}"
+        ]
+        lines.extend(
+            f"{p.module:<{width}} {p.load_time * 1000:>10.2f} {p.memory / 1024:>13.1f}"
+            f" {p.memory_peak / 1024:>11.1f} {p.v1_quirks:>5} {p.v2_quirks:>5}"
+            for p in profiles
+        )
+
+        return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Profile `zhaquirks.setup()` and write the report to stdout."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sort", choices=SORT_KEYS, default="load_time")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--package-depth", type=int, default=None)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--custom-quirks-path", default=None)
+    args = parser.parse_args(argv)
+
+    profiler = QuirkImportProfiler()
+    zhaquirks.setup(custom_quirks_path=args.custom_quirks_path, profiler=profiler)
+
+    if args.json:
+        report = profiler.to_json(args.sort, package_depth=args.package_depth)
+    else:
+        report = profiler.format_table(
+            args.sort, args.limit, package_depth=args.package_depth
+        )
+
+    sys.stdout.write(report + "\n")
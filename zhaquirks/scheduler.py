@@ -0,0 +1,336 @@
+"""Shared deadline scheduler for self-resetting clusters."""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+from collections.abc import Callable, Hashable
+import heapq
+import itertools
+import json
+import logging
+import os
+import pathlib
+import time
+import weakref
+
+_LOGGER = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+
+
+class DeadlineStore:
+    """Wall clock deadlines persisted across restarts in a single file.
+
+    Changes are written together after `save_delay` seconds, so devices retriggering
+    their deadlines do not cause a write each. `flush()` writes pending changes
+    right away, the store set with `set_deadline_store()` is flushed on exit.
+    """
+
+    def __init__(self, path: pathlib.Path, save_delay: float = 5.0) -> None:
+        """Init the store."""
+        self.path = path
+        self.save_delay = save_delay
+        self.deadlines: dict[str, float] = {}
+        self._save_handle: asyncio.TimerHandle | None = None
+        self._dirty = False
+
+    def load(self) -> None:
+        """Load the deadlines from disk, starting empty if the file is invalid."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data["version"] != STORE_VERSION:
+                raise ValueError(f"Unknown store version {data['version']!r}")
+            self.deadlines = {
+                str(key): float(when) for key, when in data["deadlines"].items()
+            }
+        except FileNotFoundError:
+            self.deadlines = {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            _LOGGER.warning("Ignoring invalid deadline store %s: %r", self.path, exc)
+            self.deadlines = {}
+
+    def save(self) -> None:
+        """Write the deadlines to disk."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+
+        self._dirty = False
+        self._write(json.dumps({"version": STORE_VERSION, "deadlines": self.deadlines}))
+
+    def flush(self) -> None:
+        """Write the deadlines to disk if they changed since the last write."""
+        if self._dirty:
+            self.save()
+
+    def _write(self, data: str) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp_path.write_text(data, encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            _LOGGER.warning("Unable to write deadline store %s: %r", self.path, exc)
+
+    def _save_later(self) -> None:
+        self._dirty = True
+        if self._save_handle is not None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._save_handle = loop.call_later(self.save_delay, self._save_in_executor)
+
+    def _save_in_executor(self) -> None:
+        self._save_handle = None
+        self._dirty = False
+        data = json.dumps({"version": STORE_VERSION, "deadlines": self.deadlines})
+        asyncio.get_running_loop().run_in_executor(None, self._write, data)
+
+    def get(self, key: str) -> float | None:
+        """Return the stored wall clock deadline of a key."""
+        return self.deadlines.get(key)
+
+    def set(self, key: str, when: float) -> None:
+        """Store the wall clock deadline of a key."""
+        self.deadlines[key] = when
+        self._save_later()
+
+    def remove(self, key: str) -> None:
+        """Remove the deadline of a key."""
+        if self.deadlines.pop(key, None) is not None:
+            self._save_later()
+
+
+class _DeadlineSettings:
+    """Mutable settings shared by all deadline schedulers."""
+
+    store: DeadlineStore | None = None
+
+
+_SETTINGS = _DeadlineSettings()
+
+
+def set_deadline_store(store: DeadlineStore | None) -> None:
+    """Set the store persisting deadlines scheduled with a `persist_key`.
+
+    The store is flushed when the interpreter exits, as its delayed writes would
+    otherwise be lost.
+    """
+    if _SETTINGS.store is not None:
+        atexit.unregister(_SETTINGS.store.flush)
+
+    _SETTINGS.store = store
+
+    if store is not None:
+        atexit.register(store.flush)
+
+
+def get_deadline_store() -> DeadlineStore | None:
+    """Return the store persisting deadlines, if any."""
+    return _SETTINGS.store
+
+
+def cluster_persist_key(cluster, name: str) -> str:
+    """Return a persist key for a deadline of a cluster of a device."""
+    endpoint = cluster.endpoint
+    return f"{endpoint.device.ieee}/{endpoint.endpoint_id}/{cluster.cluster_id:#06x}/{name}"
+
+
+class DeadlineScheduler:
+    """Run callbacks at deadlines with a single event loop timer.
+
+    Deadlines are kept in a heap keyed by an owner, e.g. a cluster. Moving a
+    deadline later, like retriggering a motion reset, only updates the owner's
+    deadline: the stale heap entry is requeued when it comes due.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Init the scheduler."""
+        self._loop = loop
+        self._deadlines: dict[Hashable, tuple[float, Callable[[], None]]] = {}
+        self._persist_keys: dict[Hashable, str] = {}
+        # the key holding the deadline of each persist key
+        self._persist_owners: dict[str, Hashable] = {}
+        self._heap: list[tuple[float, int, Hashable]] = []
+        # the heap entry of each key, other entries of the key are stale
+        self._queued: dict[Hashable, tuple[float, int]] = {}
+        self._counter = itertools.count()
+        self._handle: asyncio.TimerHandle | None = None
+        self._running = False
+
+    def __len__(self) -> int:
+        """Return the number of pending deadlines."""
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return whether a deadline is pending for the key."""
+        return key in self._deadlines
+
+    @property
+    def pending(self) -> int:
+        """Number of pending deadlines."""
+        return len(self._deadlines)
+
+    def when(self, key: Hashable) -> float | None:
+        """Return the pending deadline of a key in event loop time."""
+        entry = self._deadlines.get(key)
+        return entry[0] if entry is not None else None
+
+    def schedule(
+        self,
+        key: Hashable,
+        delay: float,
+        callback: Callable[[], None],
+        *,
+        persist_key: str | None = None,
+    ) -> None:
+        """Call `callback` after `delay` seconds, replacing the key's deadline.
+
+        With a `persist_key`, the deadline is kept in the deadline store so it can
+        be restored with `restore()` after a restart.
+        """
+        if persist_key is not None:
+            self._release_persist_key(persist_key, key)
+
+        self.schedule_at(key, self._loop.time() + delay, callback)
+
+        if persist_key is not None:
+            self._persist_keys[key] = persist_key
+            self._persist_owners[persist_key] = key
+            if (store := get_deadline_store()) is not None:
+                store.set(persist_key, time.time() + delay)
+
+    def schedule_at(self, key: Hashable, when: float, callback: Callable[[], None]):
+        """Call `callback` at the event loop time `when`, replacing the key's deadline."""
+        self._deadlines[key] = (when, callback)
+        self._forget_persisted(key)
+
+        # a queued entry due no later than the new deadline requeues it when due
+        queued = self._queued.get(key)
+        if queued is not None and queued[0] <= when:
+            return
+
+        self._push(when, key)
+
+    def restore(
+        self, key: Hashable, persist_key: str, callback: Callable[[], None]
+    ) -> bool:
+        """Reschedule a persisted deadline, returning whether one was stored.
+
+        Deadlines that passed while not running are called as soon as possible. A
+        deadline is only restored once: restoring it for another key, e.g. the
+        cluster of a device replacing an older one, moves the pending deadline over.
+        """
+        owner = self._persist_owners.get(persist_key)
+        if owner is not None:
+            if owner != key:
+                when, _ = self._deadlines[owner]
+                self._release_persist_key(persist_key, key)
+                self.schedule_at(key, when, callback)
+                self._persist_keys[key] = persist_key
+                self._persist_owners[persist_key] = key
+            return True
+
+        store = get_deadline_store()
+        when = store.get(persist_key) if store is not None else None
+        if when is None:
+            return False
+
+        self.schedule(
+            key, max(when - time.time(), 0), callback, persist_key=persist_key
+        )
+        return True
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the deadline of a key, returning whether one was pending."""
+        self._queued.pop(key, None)
+        self._forget_persisted(key)
+        return self._deadlines.pop(key, None) is not None
+
+    def _forget_persisted(self, key: Hashable) -> None:
+        persist_key = self._persist_keys.pop(key, None)
+        if persist_key is None:
+            return
+
+        del self._persist_owners[persist_key]
+        if (store := get_deadline_store()) is not None:
+            store.remove(persist_key)
+
+    def _release_persist_key(self, persist_key: str, key: Hashable) -> None:
+        """Drop the deadline of another key holding the persist key, keeping it stored."""
+        owner = self._persist_owners.get(persist_key)
+        if owner is None or owner == key:
+            return
+
+        del self._persist_owners[persist_key]
+        del self._persist_keys[owner]
+        self._queued.pop(owner, None)
+        self._deadlines.pop(owner, None)
+
+    def _push(self, when: float, key: Hashable) -> None:
+        entry = (when, next(self._counter), key)
+        heapq.heappush(self._heap, entry)
+        self._queued[key] = entry[:2]
+        self._arm()
+
+    def _arm(self) -> None:
+        """Make sure the loop timer fires for the earliest heap entry."""
+        if self._running or not self._heap:
+            return
+
+        when = self._heap[0][0]
+        if self._handle is None or when < self._handle.when():
+            if self._handle is not None:
+                self._handle.cancel()
+            self._handle = self._loop.call_at(when, self._run)
+
+    def _run(self) -> None:
+        self._handle = None
+        self._running = True
+        now = self._loop.time()
+        # entries pushed by callbacks run on the next timer
+        last_seq = next(self._counter)
+
+        while self._heap and self._heap[0][0] <= now and self._heap[0][1] < last_seq:
+            queued_when, seq, key = heapq.heappop(self._heap)
+            if self._queued.get(key) != (queued_when, seq):
+                continue
+
+            del self._queued[key]
+            when, callback = self._deadlines[key]
+            if when > now:
+                self._push(when, key)
+                continue
+
+            del self._deadlines[key]
+            self._forget_persisted(key)
+            try:
+                callback()
+            except Exception:  # pylint: disable=broad-exception-caught
+                _LOGGER.exception("Error calling deadline callback %r", callback)
+
+        self._running = False
+        self._arm()
+
+
+_SCHEDULERS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, DeadlineScheduler] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_deadline_scheduler(
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> DeadlineScheduler:
+    """Return the deadline scheduler of an event loop, the running one by default."""
+    if loop is None:
+        loop = asyncio.get_running_loop()
+
+    try:
+        return _SCHEDULERS[loop]
+    except KeyError:
+        scheduler = _SCHEDULERS[loop] = DeadlineScheduler(loop)
+        return scheduler
@@ -0,0 +1,108 @@
+"""Single-flight attribute reads and memoized derived values for quirk clusters."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+import functools
+from typing import Any, TypeVar
+
+from zigpy.zcl import Cluster
+
+_T = TypeVar("_T")
+_UNSET = object()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight call.
+
+    Callers joining an in-flight call get its result or exception. Cancelling a
+    caller does not cancel the shared call for the others.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return whether a call for the key is in flight."""
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        """Return the number of calls in flight."""
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[_T]]) -> _T:
+        """Run `func` for the key, or join the call already in flight for it."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(functools.partial(self._done, key))
+
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+        # the caller that started the call may have been cancelled meanwhile
+        if not future.cancelled():
+            future.exception()
+
+
+_READS = SingleFlight()
+
+
+def read_attributes_key(
+    cluster: Cluster,
+    attributes: Iterable[int | str],
+    manufacturer: int | None = None,
+) -> tuple:
+    """Return the single-flight key of reading the attributes of the cluster."""
+    return cluster, tuple(attributes), manufacturer
+
+
+async def read_attributes_once(
+    cluster: Cluster,
+    attributes: Iterable[int | str],
+    *,
+    manufacturer: int | None = None,
+) -> Any:
+    """Read attributes of the cluster, sharing a read of the same attributes in flight.
+
+    The attributes are read in a single request in the given order, so a request
+    for other attributes or another order is never joined.
+    """
+    attributes = list(attributes)
+    return await _READS.run(
+        read_attributes_key(cluster, attributes, manufacturer),
+        lambda: cluster.read_attributes(attributes, manufacturer=manufacturer),
+    )
+
+
+def derived_from(
+    source: Callable[[Any], Hashable],
+) -> Callable[[Callable[[Any, Any], _T]], Callable[[Any], _T]]:
+    """Memoize a method computing a value from a source value of its instance.
+
+    `source` returns the source value, e.g. an attribute from the cache of a
+    cluster. The decorated method is called with it and only recomputed when it
+    changed, so an attribute update invalidates the memoized value.
+    """
+
+    def decorator(func: Callable[[Any, Any], _T]) -> Callable[[Any], _T]:
+        memo_name = f"_derived_{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(self) -> _T:
+            value = source(self)
+            memo_value, result = getattr(self, memo_name, (_UNSET, None))
+            if memo_value is _UNSET or memo_value != value:
+                result = func(self, value)
+                setattr(self, memo_name, (value, result))
+            return result
+
+        return wrapper
+
+    return decorator
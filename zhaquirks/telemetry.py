@@ -0,0 +1,288 @@
+"""Rolling-window aggregation of telemetry reported at a high rate."""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+import contextlib
+import dataclasses
+
+from zigpy.zcl.clusters.homeautomation import ElectricalMeasurement
+from zigpy.zcl.clusters.smartenergy import Metering
+
+from zhaquirks.scheduler import get_deadline_scheduler
+
+
+class _TelemetrySettings:
+    """Mutable settings shared by all aggregating clusters."""
+
+    default_window: float | None = None
+
+
+_SETTINGS = _TelemetrySettings()
+
+
+def set_default_aggregation_window(window: float | None) -> None:
+    """Set the aggregation window of clusters not setting their own, None disables."""
+    _SETTINGS.default_window = window
+
+
+def get_default_aggregation_window() -> float | None:
+    """Return the aggregation window of clusters not setting their own."""
+    return _SETTINGS.default_window
+
+
+class SampleRing:
+    """Ring buffer of the most recent timestamped samples of an attribute."""
+
+    __slots__ = ("_count", "_next", "_times", "_values")
+
+    def __init__(self, capacity: int) -> None:
+        """Init the buffer."""
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples in the buffer."""
+        return self._count
+
+    def append(self, when: float, value: float) -> None:
+        """Add a sample, replacing the oldest one if the buffer is full."""
+        self._times[self._next] = when
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._times)
+        self._count = min(self._count + 1, len(self._times))
+
+    @property
+    def last(self) -> tuple[float, float] | None:
+        """Return the most recent sample, if any."""
+        if not self._count:
+            return None
+        index = self._next - 1
+        return self._times[index], self._values[index]
+
+    def samples(self) -> list[tuple[float, float]]:
+        """Return the samples, oldest first."""
+        capacity = len(self._times)
+        start = (self._next - self._count) % capacity
+        return [
+            (self._times[index % capacity], self._values[index % capacity])
+            for index in range(start, start + self._count)
+        ]
+
+
+@dataclasses.dataclass(frozen=True)
+class TelemetryStats:
+    """Aggregate of the samples of an attribute in a window.
+
+    `energy` is only set for the power attribute of a cluster. It is the power
+    integrated over the window, in the unit of the attribute times hours.
+    """
+
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+    last: float
+    energy: float | None = None
+
+
+class _Window:
+    """Running aggregate of the samples of an attribute in the current window."""
+
+    __slots__ = ("count", "energy", "integral", "last", "maximum", "minimum", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.integral = True
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self.last = 0.0
+        self.energy = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.integral = self.integral and isinstance(value, int)
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.last = value
+
+
+class TelemetryAggregationMixin:
+    """Aggregate attribute updates of a cluster over a window of time.
+
+    Opt-in: aggregation is disabled unless `aggregation_window` is set, or a
+    default window is set with `set_default_aggregation_window()`. Updates of
+    `aggregated_attributes` are then collected and once per window the mean is
+    written to the attribute cache, with the `TelemetryStats` sent to listeners
+    through `telemetry_aggregated`. Updates of `throttled_attributes`, e.g.
+    counters, only write their last value once per window. The first value of
+    an attribute is written right away, so its sensor has a state. The mean of
+    integer values of an attribute with an integer type is rounded to that type,
+    quirks writing scaled float values keep their precision.
+
+    The most recent raw samples are kept in a ring buffer of `raw_samples_size`
+    samples per attribute, see `raw_value()` and `raw_samples()`.
+    """
+
+    aggregation_window: float | None = None
+    aggregated_attributes: frozenset[int] = frozenset()
+    throttled_attributes: frozenset[int] = frozenset()
+    power_attribute: int | None = None
+    raw_samples_size: int = 16
+
+    def _update_attribute(self, attrid, value):
+        """Collect updates of aggregated attributes while a window is set."""
+        window = self.aggregation_window
+        if window is None:
+            window = _SETTINGS.default_window
+
+        if (
+            window is None
+            or (
+                attrid not in self.aggregated_attributes
+                and attrid not in self.throttled_attributes
+            )
+            or not isinstance(value, (int, float))
+        ):
+            super()._update_attribute(attrid, value)
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            super()._update_attribute(attrid, value)
+            return
+
+        now = loop.time()
+        self._add_sample(attrid, now, value)
+
+        if attrid not in self._attr_cache:
+            super()._update_attribute(attrid, value)
+
+        scheduler = get_deadline_scheduler(loop)
+        if self._telemetry_key not in scheduler:
+            scheduler.schedule(self._telemetry_key, window, self.flush_telemetry)
+
+    @property
+    def _telemetry_key(self) -> tuple:
+        return self, "telemetry"
+
+    def _add_sample(self, attrid: int, now: float, value: float) -> None:
+        try:
+            rings, windows = self._telemetry
+        except AttributeError:
+            rings, windows = self._telemetry = {}, {}
+
+        ring = rings.get(attrid)
+        if ring is None:
+            ring = rings[attrid] = SampleRing(self.raw_samples_size)
+        window = windows.get(attrid)
+        if window is None:
+            window = windows[attrid] = _Window()
+
+        if attrid == self.power_attribute and (last := ring.last) is not None:
+            # trapezoidal integration since the previous sample, in hours
+            last_time, last_value = last
+            window.energy += (last_value + value) / 2 * (now - last_time) / 3600
+
+        ring.append(now, value)
+        window.add(value)
+
+    def flush_telemetry(self) -> None:
+        """Write the aggregates of the current window right away."""
+        try:
+            _, windows = self._telemetry
+        except AttributeError:
+            return
+
+        with contextlib.suppress(RuntimeError):
+            get_deadline_scheduler().cancel(self._telemetry_key)
+
+        for attrid, window in tuple(windows.items()):
+            del windows[attrid]
+            if attrid in self.throttled_attributes:
+                super()._update_attribute(attrid, window.last)
+                continue
+
+            stats = TelemetryStats(
+                count=window.count,
+                minimum=window.minimum,
+                maximum=window.maximum,
+                mean=window.total / window.count,
+                last=window.last,
+                energy=window.energy if attrid == self.power_attribute else None,
+            )
+            mean = stats.mean
+            if window.integral:
+                mean = self._as_attribute_type(attrid, mean)
+            super()._update_attribute(attrid, mean)
+            self.listener_event("telemetry_aggregated", attrid, stats)
+
+    def _as_attribute_type(self, attrid: int, value: float):
+        """Round a value to the type of the attribute if it is an integer type."""
+        attr_def = self.attributes.get(attrid)
+        if attr_def is not None and issubclass(attr_def.type, int):
+            return attr_def.type(round(value))
+        return value
+
+    def raw_value(self, attrid: int) -> float | None:
+        """Return the last raw value reported for an aggregated attribute."""
+        try:
+            ring = self._telemetry[0].get(attrid)
+        except AttributeError:
+            ring = None
+
+        if ring is None or ring.last is None:
+            return self._attr_cache.get(attrid)
+        return ring.last[1]
+
+    def raw_samples(self, attrid: int) -> list[tuple[float, float]]:
+        """Return the recent raw samples of an attribute, as event loop time and value."""
+        try:
+            rings, _ = self._telemetry
+        except AttributeError:
+            return []
+
+        ring = rings.get(attrid)
+        return ring.samples() if ring is not None else []
+
+
+class ElectricalMeasurementAggregationMixin(TelemetryAggregationMixin):
+    """Aggregate the instantaneous measurements of an electrical measurement cluster."""
+
+    aggregated_attributes = frozenset(
+        {
+            ElectricalMeasurement.AttributeDefs.ac_frequency.id,
+            ElectricalMeasurement.AttributeDefs.rms_voltage.id,
+            ElectricalMeasurement.AttributeDefs.rms_current.id,
+            ElectricalMeasurement.AttributeDefs.active_power.id,
+            ElectricalMeasurement.AttributeDefs.reactive_power.id,
+            ElectricalMeasurement.AttributeDefs.apparent_power.id,
+            ElectricalMeasurement.AttributeDefs.power_factor.id,
+        }
+    )
+    throttled_attributes = frozenset(
+        {
+            ElectricalMeasurement.AttributeDefs.total_active_power.id,
+            ElectricalMeasurement.AttributeDefs.total_reactive_power.id,
+        }
+    )
+    power_attribute = ElectricalMeasurement.AttributeDefs.active_power.id
+
+
+class MeteringAggregationMixin(TelemetryAggregationMixin):
+    """Aggregate the demand and throttle the summations of a metering cluster."""
+
+    aggregated_attributes = frozenset({Metering.AttributeDefs.instantaneous_demand.id})
+    throttled_attributes = frozenset(
+        {
+            Metering.AttributeDefs.current_summ_delivered.id,
+            Metering.AttributeDefs.current_summ_received.id,
+        }
+    )
+    power_attribute = Metering.AttributeDefs.instantaneous_demand.id
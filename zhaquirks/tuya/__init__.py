@@ -1,10 +1,13 @@
 """Tuya devices."""
 
-from collections.abc import Callable
+import asyncio
+from collections.abc import Callable, Mapping
 import dataclasses
 import datetime
 import enum
+import functools
 import logging
+import time
 from typing import Any, Optional, Union
 
 from zigpy.quirks import BaseCustomDevice, CustomCluster, CustomDevice
@@ -31,6 +34,12 @@ from zhaquirks.const import (
     SHORT_PRESS,
     ZHA_SEND_EVENT,
 )
+from zhaquirks.singleflight import read_attributes_once
+from zhaquirks.telemetry import (
+    ElectricalMeasurementAggregationMixin,
+    MeteringAggregationMixin,
+)
+from zhaquirks.tuya.spell import get_spell_scheduler
 
 # ---------------------------------------------------------
 # Tuya Custom Cluster ID
@@ -150,6 +159,49 @@ class TuyaDPType(t.enum8):
     BITMAP = 0x05
 
 
+def _int_decoder(int_type: type[t.FixedIntType]) -> Callable[[bytes], Any]:
+    """Return a decoder for a fixed size integer type, like `int_type.deserialize`."""
+    size = int_type._bits // 8
+    byteorder = int_type._byteorder
+    signed = int_type._signed
+
+    def decode(raw: bytes) -> t.FixedIntType:
+        if len(raw) < size:
+            raise ValueError(f"Data is too short to contain {size} bytes")
+        return int_type(int.from_bytes(raw[:size], byteorder, signed=signed))
+
+    return decode
+
+
+_BITMAP_DECODERS = {
+    1: _int_decoder(t.bitmap8),
+    2: _int_decoder(t.bitmap16),
+    4: _int_decoder(t.bitmap32),
+}
+
+
+def _decode_bitmap(raw: bytes) -> Union[t.bitmap8, t.bitmap16, t.bitmap32]:
+    try:
+        decode = _BITMAP_DECODERS[len(raw)]
+    except KeyError as exc:
+        raise ValueError(f"Wrong bitmap length: {len(raw)}") from exc
+    return decode(raw)
+
+
+_PAYLOAD_DECODERS: dict[TuyaDPType, Callable[[bytes], Any]] = {
+    TuyaDPType.RAW: lambda raw: raw,
+    TuyaDPType.BOOL: _int_decoder(t.Bool),
+    TuyaDPType.VALUE: _int_decoder(t.int32s_be),
+    TuyaDPType.STRING: lambda raw: t.CharacterString(raw.decode("utf8")),
+    TuyaDPType.ENUM: _int_decoder(t.enum8),
+    TuyaDPType.BITMAP: _decode_bitmap,
+}
+
+# Interned values of single byte fields, to skip type conversion on decoding
+_UINT8_VALUES = tuple(t.uint8_t(value) for value in range(256))
+_DP_TYPE_VALUES = tuple(TuyaDPType(value) for value in range(256))
+
+
 class TuyaData(t.Struct):
     """Tuya Data type."""
 
@@ -171,24 +223,11 @@ class TuyaData(t.Struct):
         t.LVBytes,
     ]:
         """Payload accordingly to data point type."""
-        if self.dp_type == TuyaDPType.VALUE:
-            return t.int32s_be.deserialize(self.raw)[0]
-        elif self.dp_type == TuyaDPType.BOOL:
-            return t.Bool.deserialize(self.raw)[0]
-        elif self.dp_type == TuyaDPType.STRING:
-            return t.CharacterString(self.raw.decode("utf8"))
-        elif self.dp_type == TuyaDPType.ENUM:
-            return t.enum8.deserialize(self.raw)[0]
-        elif self.dp_type == TuyaDPType.BITMAP:
-            bitmaps = {1: t.bitmap8, 2: t.bitmap16, 4: t.bitmap32}
-            try:
-                return bitmaps[len(self.raw)].deserialize(self.raw)[0]
-            except KeyError as exc:
-                raise ValueError(f"Wrong bitmap length: {len(self.raw)}") from exc
-        elif self.dp_type == TuyaDPType.RAW:
-            return self.raw
-        else:
-            raise ValueError(f"Unknown {self.dp_type} datapoint type")
+        try:
+            decode = _PAYLOAD_DECODERS[self.dp_type]
+        except KeyError:
+            raise ValueError(f"Unknown {self.dp_type} datapoint type") from None
+        return decode(self.raw)
 
     @payload.setter
     def payload(self, value):
@@ -293,6 +332,48 @@ class TuyaCommand(t.Struct):
     tsn: t.uint8_t
     datapoints: t.List[TuyaDatapointData]
 
+    @classmethod
+    def deserialize(cls, data: bytes) -> tuple["TuyaCommand", bytes]:
+        """Deserialize the command without the generic struct machinery.
+
+        Equivalent to `t.Struct.deserialize`, reports with many datapoints are
+        frequent enough for the generic field by field parsing to matter.
+        """
+        if cls is not TuyaCommand:
+            return super().deserialize(data)
+
+        if len(data) < 2:
+            raise ValueError(f"Data is too short to contain {cls.__name__}")
+
+        datapoints = cls.fields.datapoints.type()
+        offset = 2
+        while offset < len(data):
+            # dp, dp_type, function and the length of the raw data
+            if len(data) < offset + 4:
+                raise ValueError("Data is too short to contain TuyaDatapointData")
+            dp, dp_type, function, length = data[offset : offset + 4]
+            offset += 4 + length
+            if len(data) < offset:
+                raise ValueError("Data is too short")
+
+            tuya_data = object.__new__(TuyaData)
+            tuya_data.__dict__.update(
+                dp_type=_DP_TYPE_VALUES[dp_type],
+                function=_UINT8_VALUES[function],
+                raw=t.LVBytes(data[offset - length : offset]),
+            )
+            datapoint = object.__new__(TuyaDatapointData)
+            datapoint.__dict__.update(dp=_UINT8_VALUES[dp], data=tuya_data)
+            datapoints.append(datapoint)
+
+        command = object.__new__(cls)
+        command.__dict__.update(
+            status=_UINT8_VALUES[data[0]],
+            tsn=_UINT8_VALUES[data[1]],
+            datapoints=datapoints,
+        )
+        return command, b""
+
 
 class NoManufacturerCluster(CustomCluster):
     """Forces the NO manufacturer id in command."""
@@ -462,6 +543,9 @@ class TuyaManufCluster(CustomCluster):
 class TuyaManufClusterAttributes(TuyaManufCluster):
     """Manufacturer specific cluster for Tuya converting attributes <-> commands."""
 
+    # set_data frames sent at the same time by `write_attributes`
+    max_inflight_writes: int = 4
+
     def handle_cluster_request(
         self,
         hdr: foundation.ZCLHeader,
@@ -512,9 +596,14 @@ class TuyaManufClusterAttributes(TuyaManufCluster):
         )
 
     async def write_attributes(self, attributes, manufacturer=None):
-        """Defer attributes writing to the set_data tuya command."""
+        """Defer attributes writing to the set_data tuya command.
+
+        The commands of all records are built upfront and sent concurrently, with
+        at most `max_inflight_writes` frames in flight.
+        """
 
         records = self._write_attr_records(attributes)
+        payloads = []
 
         for record in records:
             cmd_payload = TuyaManufCluster.Command()
@@ -523,14 +612,42 @@ class TuyaManufClusterAttributes(TuyaManufCluster):
             cmd_payload.command_id = record.attrid
             cmd_payload.function = 0
             cmd_payload.data = record.value.value
+            payloads.append(cmd_payload)
+
+        command = super().command
+        semaphore = asyncio.Semaphore(max(self.max_inflight_writes, 1))
+
+        async def _send(cmd_payload):
+            async with semaphore:
+                await command(
+                    TUYA_SET_DATA,
+                    cmd_payload,
+                    manufacturer=manufacturer,
+                    expect_reply=False,
+                    tsn=cmd_payload.tsn,
+                )
 
-            await super().command(
-                TUYA_SET_DATA,
-                cmd_payload,
-                manufacturer=manufacturer,
-                expect_reply=False,
-                tsn=cmd_payload.tsn,
-            )
+        results = await asyncio.gather(
+            *(_send(cmd_payload) for cmd_payload in payloads), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+
+        if errors and (
+            len(errors) == len(results)
+            or not all(isinstance(e, Exception) for e in errors)
+        ):
+            raise errors[0]
+
+        if errors:
+            return [
+                [
+                    foundation.WriteAttributesStatusRecord(
+                        foundation.Status.FAILURE, record.attrid
+                    )
+                    for record, result in zip(records, results)
+                    if isinstance(result, Exception)
+                ]
+            ]
 
         return [[foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)]]
 
@@ -547,14 +664,28 @@ class BaseEnchantedDevice(BaseCustomDevice):
 
     async def apply_custom_configuration(self, *args, **kwargs):
         """Hooks device configuration to apply custom configuration."""
-        # cast Tuya spell
+        # cast Tuya spell, scheduled together with the spells of other devices
+        if self.tuya_spell_read_attributes or self.tuya_spell_data_query:
+            await get_spell_scheduler().cast(
+                self, self.cast_spells, self.spell_firmware
+            )
+
+        # also apply custom configuration to clusters if defined
+        await super().apply_custom_configuration(*args, **kwargs)
+
+    async def cast_spells(self):
+        """Cast all enabled Tuya spells."""
         if self.tuya_spell_read_attributes:
             await self.spell_attribute_reads()
         if self.tuya_spell_data_query:
             await self.spell_data_query()
 
-        # also apply custom configuration to clusters if defined
-        await super().apply_custom_configuration(*args, **kwargs)
+    def spell_firmware(self):
+        """Return the cached firmware version the spells are cast for, if known."""
+        basic_cluster = self.endpoints[1].in_clusters.get(Basic.cluster_id)
+        if basic_cluster is None:
+            return None
+        return basic_cluster.get(Basic.AttributeDefs.app_version.id)
 
     async def spell_attribute_reads(self):
         """Cast 'attribute read' spell, so the Tuya device works correctly."""
@@ -564,7 +695,7 @@ class BaseEnchantedDevice(BaseCustomDevice):
         )
         attr_to_read = [4, 0, 1, 5, 7, 0xFFFE]
         basic_cluster = self.endpoints[1].in_clusters[Basic.cluster_id]
-        await basic_cluster.read_attributes(attr_to_read)
+        await read_attributes_once(basic_cluster, attr_to_read)
         self.debug("Executed attribute read spell on Tuya device %s", self.ieee)
 
     async def spell_data_query(self):
@@ -1089,21 +1220,23 @@ DIVISOR = 0x0302
 
 
 # Tuya Zigbee Metering Cluster Correction Implementation
-class TuyaZBMeteringCluster(CustomCluster, Metering):
+class TuyaZBMeteringCluster(MeteringAggregationMixin, CustomCluster, Metering):
     """Divides the kWh for tuya."""
 
     _CONSTANT_ATTRIBUTES = {MULTIPLIER: 1, DIVISOR: 100}
 
 
 # Tuya Zigbee Metering Cluster Correction Implementation
-class TuyaZBMeteringClusterWithUnit(CustomCluster, Metering):
+class TuyaZBMeteringClusterWithUnit(MeteringAggregationMixin, CustomCluster, Metering):
     """Divides the kWh for tuya."""
 
     UNIT_OF_MEASURE = 0x0300
     _CONSTANT_ATTRIBUTES = {UNIT_OF_MEASURE: 0, MULTIPLIER: 1, DIVISOR: 100}
 
 
-class TuyaZBElectricalMeasurement(CustomCluster, ElectricalMeasurement):
+class TuyaZBElectricalMeasurement(
+    ElectricalMeasurementAggregationMixin, CustomCluster, ElectricalMeasurement
+):
     """Divides the Current for tuya."""
 
     AC_CURRENT_MULTIPLIER = 0x0602
@@ -1455,21 +1588,125 @@ class TuyaLevelControl(CustomCluster, LevelControl):
         return foundation.Status.UNSUP_CLUSTER_COMMAND
 
 
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _chain(steps: tuple[Callable[[Any], Any], ...]) -> Callable[[Any], Any]:
+    """Return a function applying the steps in order."""
+    if not steps:
+        return _identity
+    if len(steps) == 1:
+        return steps[0]
+
+    def convert(value: Any) -> Any:
+        for step in steps:
+            value = step(value)
+        return value
+
+    return convert
+
+
+@dataclasses.dataclass(frozen=True)
+class DPConverter:
+    """Declarative datapoint value converter.
+
+    The steps are applied in the order of the fields: extract the `bitmask` bits,
+    logically `invert`, multiply by `scale`, add `offset`, `clamp` to a
+    `(low, high)` range and finally look the value up in `enum_map`, either an
+    enum class or a mapping. Values missing from a mapping convert to `default`
+    if set and are passed through otherwise. The steps are prepared once, when
+    the converter is created.
+    """
+
+    bitmask: int | None = None
+    invert: bool = False
+    scale: float | None = None
+    offset: float | None = None
+    clamp: tuple[float | None, float | None] | None = None
+    enum_map: Any = dataclasses.field(default=None, hash=False)
+    default: Any = dataclasses.field(default=None, hash=False)
+    _convert: Callable[[Any], Any] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Prepare the conversion steps."""
+        steps: list[Callable[[Any], Any]] = []
+
+        if (bitmask := self.bitmask) is not None:
+            shift = max((bitmask & -bitmask).bit_length() - 1, 0)
+            steps.append(lambda x: (x & bitmask) >> shift)
+        if self.invert:
+            steps.append(lambda x: not x)
+        if (scale := self.scale) is not None:
+            steps.append(lambda x: x * scale)
+        if (offset := self.offset) is not None:
+            steps.append(lambda x: x + offset)
+        if self.clamp is not None:
+            low, high = self.clamp
+            if low is not None:
+                steps.append(lambda x: max(x, low))
+            if high is not None:
+                steps.append(lambda x: min(x, high))
+        if (enum_map := self.enum_map) is not None:
+            if not isinstance(enum_map, Mapping):
+                steps.append(enum_map)
+            elif (default := self.default) is None:
+                steps.append(lambda x: enum_map.get(x, x))
+            else:
+                steps.append(lambda x: enum_map.get(x, default))
+
+        object.__setattr__(self, "_convert", _chain(tuple(steps)))
+
+    def __call__(self, value: Any) -> Any:
+        """Convert a datapoint value."""
+        return self._convert(value)
+
+
+def compile_dp_converter(converter: Any) -> Callable[[Any], Any] | None:
+    """Return the function converting datapoint values of a mapping.
+
+    Besides a callable or `DPConverter`, mappings to several attributes can have a
+    tuple of converters, each converting the value for one attribute.
+    """
+    if converter is None:
+        return None
+
+    if isinstance(converter, DPConverter):
+        return converter._convert
+
+    if isinstance(converter, tuple):
+        funcs = tuple(compile_dp_converter(item) or _identity for item in converter)
+        return lambda x: tuple([func(x) for func in funcs])
+
+    return converter
+
+
 @dataclasses.dataclass
 class DPToAttributeMapping:
     """Container for datapoint to cluster attribute update mapping."""
 
     ep_attribute: str
     attribute_name: Union[str, tuple]
-    converter: Optional[
+    # a callable, a `DPConverter` or, for several attributes, a tuple of them
+    converter: Union[
         Callable[
             [
                 Any,
             ],
             Any,
-        ]
+        ],
+        tuple,
+        None,
     ] = None
     endpoint_id: Optional[int] = None
+    # report policy: drop reports with unchanged raw data, defer reports arriving
+    # within min_interval seconds of the last one and drop numeric reports within
+    # deadband of the last value
+    skip_unchanged: bool = False
+    min_interval: float | None = None
+    deadband: float | None = None
 
 
 @dataclasses.dataclass
@@ -1480,6 +1717,40 @@ class AttributeWithMask:
     mask: int
 
 
+@dataclasses.dataclass(frozen=True)
+class _DPDispatch:
+    """Resolved target of a data point to attribute mapping."""
+
+    dp_map: DPToAttributeMapping
+    cluster: CustomCluster
+    updaters: tuple[Callable[[Any], None], ...]
+    converter: Callable[[Any], Any] | None = None
+
+    @classmethod
+    def create(cls, dp_map: DPToAttributeMapping, cluster: CustomCluster):
+        """Resolve the attribute updaters of the mapping on the cluster."""
+        attribute_names = dp_map.attribute_name
+        if not isinstance(attribute_names, tuple):
+            attribute_names = (attribute_names,)
+
+        updaters = []
+        for attr_name in attribute_names:
+            attr = cluster.attributes_by_name.get(attr_name)
+            # clusters overriding `update_attribute` still get the attribute name
+            if (
+                attr is not None
+                and type(cluster).update_attribute is TuyaLocalCluster.update_attribute
+                and "update_attribute" not in cluster.__dict__
+            ):
+                updaters.append(functools.partial(cluster._update_attribute, attr.id))
+            else:
+                updaters.append(functools.partial(cluster.update_attribute, attr_name))
+
+        return cls(
+            dp_map, cluster, tuple(updaters), compile_dp_converter(dp_map.converter)
+        )
+
+
 class TuyaNewManufCluster(CustomCluster):
     """Tuya manufacturer specific cluster.
 
@@ -1538,7 +1809,13 @@ class TuyaNewManufCluster(CustomCluster):
     def __init__(self, *args, **kwargs):
         """Initialize the cluster and mark attributes as valid on LocalDataClusters."""
         super().__init__(*args, **kwargs)
-        for dp_map in self.dp_to_attribute.values():
+        self._dp_last_reports: dict[int, tuple[float, bytes, Any]] = {}
+        self._dp_pending_reports: dict[
+            int, tuple[asyncio.TimerHandle, TuyaDatapointData]
+        ] = {}
+        self._dp_dispatch: dict[int, _DPDispatch] = {}
+
+        for dp, dp_map in self.dp_to_attribute.items():
             # get the endpoint that is being mapped to
             endpoint = self.endpoint
             if dp_map.endpoint_id:
@@ -1627,30 +1904,108 @@ class TuyaNewManufCluster(CustomCluster):
         """Handle Time set request."""
         return foundation.Status.SUCCESS
 
+    def _get_dp_dispatch(self, dp: int) -> "_DPDispatch":
+        """Return the dispatch entry of a data point, resolving it if needed."""
+        dp_map = self.dp_to_attribute[dp]
+        endpoint = self.endpoint
+        if dp_map.endpoint_id:
+            endpoint = self.endpoint.device.endpoints[dp_map.endpoint_id]
+        cluster = getattr(endpoint, dp_map.ep_attribute)
+
+        # endpoints and clusters may be replaced after the first report
+        dispatch = self._dp_dispatch.get(dp)
+        if dispatch is None or dispatch.cluster is not cluster:
+            dispatch = self._dp_dispatch[dp] = _DPDispatch.create(dp_map, cluster)
+        return dispatch
+
     def _dp_2_attr_update(self, datapoint: TuyaDatapointData) -> None:
         """Handle data point to attribute report conversion."""
         try:
-            dp_map = self.dp_to_attribute[datapoint.dp]
+            dispatch = self._get_dp_dispatch(datapoint.dp)
         except KeyError:
             self.debug("No attribute mapping for %s data point", datapoint.dp)
             return
 
-        endpoint = self.endpoint
-        if dp_map.endpoint_id:
-            endpoint = self.endpoint.device.endpoints[dp_map.endpoint_id]
-        cluster = getattr(endpoint, dp_map.ep_attribute)
+        dp_map = dispatch.dp_map
+        if not self._dp_report_passes_policy(datapoint, dp_map):
+            return
+
+        cluster = dispatch.cluster
         value = datapoint.data.payload
-        if dp_map.converter:
-            value = dp_map.converter(value)
+        if dispatch.converter is not None:
+            value = dispatch.converter(value)
 
         if isinstance(dp_map.attribute_name, tuple):
-            for k, v in zip(dp_map.attribute_name, value):
+            for k, v, update in zip(dp_map.attribute_name, value, dispatch.updaters):
                 if isinstance(v, AttributeWithMask):
                     v = cluster.get(k, 0) & (~v.mask) | v.value
-                cluster.update_attribute(k, v)
+                update(v)
         else:
             if isinstance(value, AttributeWithMask):
                 value = (
                     cluster.get(dp_map.attribute_name, 0) & (~value.mask) | value.value
                 )
-            cluster.update_attribute(dp_map.attribute_name, value)
+            dispatch.updaters[0](value)
+
+    def _dp_report_passes_policy(
+        self, datapoint: TuyaDatapointData, dp_map: DPToAttributeMapping
+    ) -> bool:
+        """Apply the report policy of the mapping to a datapoint report."""
+        skip_unchanged = dp_map.skip_unchanged
+        min_interval = dp_map.min_interval
+        deadband = dp_map.deadband
+        if not (skip_unchanged or min_interval or deadband):
+            return True
+
+        now = time.monotonic()
+        raw = datapoint.data.raw
+        value = datapoint.data.payload if deadband else None
+        last = self._dp_last_reports.get(datapoint.dp)
+
+        if last is not None:
+            last_time, last_raw, last_value = last
+            if (skip_unchanged and raw == last_raw) or (
+                deadband
+                and isinstance(value, (int, float))
+                and isinstance(last_value, (int, float))
+                and abs(value - last_value) < deadband
+            ):
+                self.debug("Dropping report of %s data point", datapoint.dp)
+                self._cancel_pending_dp_report(datapoint.dp)
+                return False
+
+            if min_interval and now - last_time < min_interval:
+                if self._defer_dp_report(datapoint, min_interval - (now - last_time)):
+                    return False
+
+        self._cancel_pending_dp_report(datapoint.dp)
+        self._dp_last_reports[datapoint.dp] = (now, raw, value)
+        return True
+
+    def _defer_dp_report(self, datapoint: TuyaDatapointData, delay: float) -> bool:
+        """Apply the latest report of a data point once its minimum interval ends."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        pending = self._dp_pending_reports.get(datapoint.dp)
+        handle = (
+            pending[0]
+            if pending is not None
+            else loop.call_later(delay, self._apply_pending_dp_report, datapoint.dp)
+        )
+        self._dp_pending_reports[datapoint.dp] = (handle, datapoint)
+        self.debug("Deferring report of %s data point by %.3fs", datapoint.dp, delay)
+        return True
+
+    def _apply_pending_dp_report(self, dp: int) -> None:
+        """Apply a deferred data point report."""
+        _, datapoint = self._dp_pending_reports.pop(dp)
+        self._dp_2_attr_update(datapoint)
+
+    def _cancel_pending_dp_report(self, dp: int) -> None:
+        """Cancel a deferred data point report."""
+        pending = self._dp_pending_reports.pop(dp, None)
+        if pending is not None:
+            pending[0].cancel()
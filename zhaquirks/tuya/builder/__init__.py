@@ -1,7 +1,10 @@
 """Tuya QuirkBuilder."""
 
-from collections.abc import Callable
+from collections.abc import Callable, Hashable
+import dataclasses
 from enum import Enum
+import inspect
+import pathlib
 from typing import Any, Optional
 
 from zigpy.quirks import _DEVICE_REGISTRY
@@ -29,6 +32,7 @@ from zigpy.zcl.foundation import BaseAttributeDefs, ZCLAttributeDef
 from zhaquirks.tuya import (
     TUYA_CLUSTER_ID,
     BaseEnchantedDevice,
+    DPConverter,
     PowerConfiguration,
     TuyaLocalCluster,
     TuyaPowerConfigurationCluster,
@@ -52,6 +56,58 @@ BATTERY_VOLTAGES = {
     BatterySize.Unknown: None,
 }
 
+# Generated classes, shared by all quirks generating the same content
+_BATTERY_CLUSTERS: dict[tuple, type[TuyaPowerConfigurationCluster]] = {}
+_ATTRIBUTE_DEFS: dict[frozenset[ZCLAttributeDef], type[BaseAttributeDefs]] = {}
+_REPLACEMENT_CLUSTERS: dict[Hashable, type[TuyaMCUCluster]] = {}
+
+
+def _content_key(value: Any) -> Hashable:
+    """Return a key that is equal for values with the same content.
+
+    Functions compare by module, code and closure, so converters generated by
+    the builder for different quirks are equal when they convert alike.
+    """
+    if inspect.isfunction(value):
+        closure = []
+        for cell in value.__closure__ or ():
+            try:
+                closure.append(_content_key(cell.cell_contents))
+            except ValueError:
+                closure.append(None)
+
+        return (
+            value.__module__,
+            value.__code__,
+            _content_key(value.__defaults__),
+            tuple(closure),
+        )
+
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_content_key(v) for v in value))
+
+    if isinstance(value, dict):
+        return (dict, tuple((k, _content_key(v)) for k, v in value.items()))
+
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return (
+            type(value),
+            tuple(
+                _content_key(getattr(value, f.name))
+                for f in dataclasses.fields(value)
+                if f.compare
+            ),
+        )
+
+    try:
+        hash(value)
+    except TypeError:
+        # mutable values are kept alive by the generated class using them
+        return (type(value), id(value))
+
+    # 1, 1.0 and True are equal but convert differently
+    return (type(value), value)
+
 
 class TuyaCO2Concentration(CarbonDioxideConcentration, TuyaLocalCluster):
     """Tuya Carbon Dioxide concentration measurement."""
@@ -172,6 +228,11 @@ class TuyaQuirkBuilder(QuirkBuilder):
         self.new_attributes: set[foundation.ZCLAttributeDef] = set()
         super().__init__(manufacturer, model, registry)
 
+        # Point the quirk file at the caller instead of this builder module
+        caller = inspect.currentframe().f_back
+        self.quirk_file = pathlib.Path(caller.f_code.co_filename)
+        self.quirk_file_line = caller.f_lineno
+
     def _tuya_battery(
         self,
         dp_id: int,
@@ -183,7 +244,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             power_cfg.ep_attribute,
             PowerConfiguration.AttributeDefs.battery_percentage_remaining.name,
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(power_cfg)
         return self
@@ -205,25 +266,30 @@ class TuyaQuirkBuilder(QuirkBuilder):
         if not battery_voltage and (battery_type and battery_qty):
             battery_voltage = BATTERY_VOLTAGES.get(battery_type)
 
-        class TuyaPowerConfigurationClusterBattery(TuyaPowerConfigurationCluster):
-            """PowerConfiguration cluster for Tuya devices."""
+        key = (battery_type, battery_qty, battery_voltage)
+        power_cfg = _BATTERY_CLUSTERS.get(key)
 
-            _CONSTANT_ATTRIBUTES = {
-                PowerConfiguration.AttributeDefs.battery_size.id: battery_type,
-                PowerConfiguration.AttributeDefs.battery_rated_voltage.id: battery_voltage,
-                PowerConfiguration.AttributeDefs.battery_quantity.id: battery_qty,
-            }
+        if power_cfg is None:
 
-        return self._tuya_battery(
-            dp_id=dp_id, power_cfg=TuyaPowerConfigurationClusterBattery, scale=scale
-        )
+            class TuyaPowerConfigurationClusterBattery(TuyaPowerConfigurationCluster):
+                """PowerConfiguration cluster for Tuya devices."""
+
+                _CONSTANT_ATTRIBUTES = {
+                    PowerConfiguration.AttributeDefs.battery_size.id: battery_type,
+                    PowerConfiguration.AttributeDefs.battery_rated_voltage.id: battery_voltage,
+                    PowerConfiguration.AttributeDefs.battery_quantity.id: battery_qty,
+                }
+
+            power_cfg = _BATTERY_CLUSTERS[key] = TuyaPowerConfigurationClusterBattery
+
+        return self._tuya_battery(dp_id=dp_id, power_cfg=power_cfg, scale=scale)
 
     def tuya_contact(self, dp_id: int):
         """Add a Tuya IAS contact sensor."""
         self.tuya_ias(
             dp_id=dp_id,
             ias_cfg=TuyaIasContact,
-            converter=lambda x: IasZone.ZoneStatus.Alarm_1 if x != 0 else 0,
+            converter=DPConverter(enum_map={0: 0}, default=IasZone.ZoneStatus.Alarm_1),
         )
         return self
 
@@ -238,7 +304,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             co2_cfg.ep_attribute,
             CarbonDioxideConcentration.AttributeDefs.measured_value.name,
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(co2_cfg)
         return self
@@ -274,7 +340,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             pm25_cfg.ep_attribute,
             PM25.AttributeDefs.measured_value.name,
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(pm25_cfg)
         return self
@@ -284,7 +350,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
         self.tuya_ias(
             dp_id=dp_id,
             ias_cfg=TuyaIasGas,
-            converter=lambda x: IasZone.ZoneStatus.Alarm_1 if x == 0 else 0,
+            converter=DPConverter(enum_map={0: IasZone.ZoneStatus.Alarm_1}, default=0),
         )
         return self
 
@@ -293,7 +359,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
         self.tuya_ias(
             dp_id=dp_id,
             ias_cfg=TuyaIasFire,
-            converter=lambda x: IasZone.ZoneStatus.Alarm_1 if x == 0 else 0,
+            converter=DPConverter(enum_map={0: IasZone.ZoneStatus.Alarm_1}, default=0),
         )
         return self
 
@@ -324,7 +390,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             metering_cfg.ep_attribute,
             attribute_name="current_summ_delivered",
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(metering_cfg)
         return self
@@ -354,7 +420,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             rh_cfg.ep_attribute,
             "measured_value",
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(rh_cfg)
         return self
@@ -370,7 +436,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             soil_cfg.ep_attribute,
             "measured_value",
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(soil_cfg)
         return self
@@ -386,7 +452,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             temp_cfg.ep_attribute,
             "measured_value",
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(temp_cfg)
         return self
@@ -402,7 +468,7 @@ class TuyaQuirkBuilder(QuirkBuilder):
             dp_id,
             voc_cfg.ep_attribute,
             TuyaAirQualityVOC.AttributeDefs.measured_value.name,
-            converter=lambda x: x * scale,
+            converter=DPConverter(scale=scale),
         )
         self.adds(voc_cfg)
         return self
@@ -455,6 +521,27 @@ class TuyaQuirkBuilder(QuirkBuilder):
         self.tuya_data_point_handlers.update({dp_id: dp_handler})
         return self
 
+    def tuya_dp_report_policy(
+        self,
+        dp_id: int,
+        skip_unchanged: bool = False,
+        min_interval: float | None = None,
+        deadband: float | None = None,
+    ) -> QuirkBuilder:
+        """Set the report policy of an added Tuya DP.
+
+        Reports with unchanged raw data can be dropped, reports arriving within
+        `min_interval` seconds of the last one are deferred until the interval ends
+        and numeric reports within `deadband` of the last value are dropped.
+        """
+        self.tuya_dp_to_attribute[dp_id] = dataclasses.replace(
+            self.tuya_dp_to_attribute[dp_id],
+            skip_unchanged=skip_unchanged,
+            min_interval=min_interval,
+            deadband=deadband,
+        )
+        return self
+
     def tuya_dp_attribute(
         self,
         dp_id: int,
@@ -728,32 +815,56 @@ class TuyaQuirkBuilder(QuirkBuilder):
     def add_to_registry(
         self, replacement_cluster: TuyaMCUCluster = TuyaMCUCluster
     ) -> QuirksV2RegistryEntry:
-        """Build the quirks v2 registry entry."""
+        """Build the quirks v2 registry entry.
 
-        class NewAttributeDefs(TuyaMCUCluster.AttributeDefs):
-            """Attribute Definitions."""
-
-        for attr in self.new_attributes:
-            setattr(NewAttributeDefs, attr.name, attr)
+        Quirks with the same replacement cluster, attributes and datapoint mappings
+        share a single generated cluster class.
+        """
 
-        class TuyaReplacementCluster(replacement_cluster):  # type: ignore[valid-type]
-            """Replacement Tuya Cluster."""
+        attributes = frozenset(self.new_attributes)
+        NewAttributeDefs = _ATTRIBUTE_DEFS.get(attributes)
 
-            data_point_handlers: dict[int, str]
-            dp_to_attribute: dict[int, DPToAttributeMapping]
+        if NewAttributeDefs is None:
 
-            class AttributeDefs(NewAttributeDefs):
+            class NewAttributeDefs(TuyaMCUCluster.AttributeDefs):
                 """Attribute Definitions."""
 
-            async def write_attributes(self, attributes, manufacturer=None):
-                """Overwrite to force manufacturer code."""
+            for attr in sorted(attributes, key=lambda attr: attr.id):
+                setattr(NewAttributeDefs, attr.name, attr)
 
-                return await super().write_attributes(
-                    attributes, manufacturer=foundation.ZCLHeader.NO_MANUFACTURER_ID
-                )
+            _ATTRIBUTE_DEFS[attributes] = NewAttributeDefs
+
+        key = (
+            replacement_cluster,
+            attributes,
+            _content_key(self.tuya_data_point_handlers),
+            _content_key(self.tuya_dp_to_attribute),
+        )
+        TuyaReplacementCluster = _REPLACEMENT_CLUSTERS.get(key)
+
+        if TuyaReplacementCluster is None:
+
+            class TuyaReplacementCluster(replacement_cluster):  # type: ignore[valid-type]
+                """Replacement Tuya Cluster."""
+
+                data_point_handlers: dict[int, str]
+                dp_to_attribute: dict[int, DPToAttributeMapping]
+
+                class AttributeDefs(NewAttributeDefs):
+                    """Attribute Definitions."""
+
+                async def write_attributes(self, attributes, manufacturer=None):
+                    """Overwrite to force manufacturer code."""
+
+                    return await super().write_attributes(
+                        attributes,
+                        manufacturer=foundation.ZCLHeader.NO_MANUFACTURER_ID,
+                    )
 
-        TuyaReplacementCluster.data_point_handlers = self.tuya_data_point_handlers
-        TuyaReplacementCluster.dp_to_attribute = self.tuya_dp_to_attribute
+            TuyaReplacementCluster.data_point_handlers = self.tuya_data_point_handlers
+            TuyaReplacementCluster.dp_to_attribute = self.tuya_dp_to_attribute
+            TuyaReplacementCluster.invalidate_dp_attribute_index()
+            _REPLACEMENT_CLUSTERS[key] = TuyaReplacementCluster
 
         self.replaces(TuyaReplacementCluster)
         return super().add_to_registry()
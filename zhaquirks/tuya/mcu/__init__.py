@@ -1,5 +1,6 @@
 """Tuya MCU communications."""
 
+import asyncio
 from collections.abc import Callable
 import dataclasses
 import datetime
@@ -17,6 +18,7 @@ from zhaquirks.tuya import (
     TUYA_MCU_VERSION_RSP,
     TUYA_SET_DATA,
     TUYA_SET_TIME,
+    DPConverter,
     EnchantedDevice,  # noqa: F401
     NoManufacturerCluster,
     PowerOnState,
@@ -33,6 +35,10 @@ ATTR_MCU_VERSION = 0xEF00
 # manufacturer commands
 TUYA_MCU_CONNECTION_STATUS = 0x25
 
+# APS payload available without fragmentation, minus the ZCL header
+TUYA_MAX_PAYLOAD_SIZE = 82
+ZCL_MANUFACTURER_HEADER_SIZE = 5
+
 
 @dataclasses.dataclass
 class DPToAttributeMapping:
@@ -40,13 +46,16 @@ class DPToAttributeMapping:
 
     ep_attribute: str
     attribute_name: Union[str, tuple]
-    converter: Optional[
+    # a callable, a `DPConverter` or, for several attributes, a tuple of them
+    converter: Union[
         Callable[
             [
                 Any,
             ],
             Any,
-        ]
+        ],
+        tuple,
+        None,
     ] = None
     dp_converter: Optional[
         Callable[
@@ -57,6 +66,10 @@ class DPToAttributeMapping:
         ]
     ] = None
     endpoint_id: Optional[int] = None
+    # report policy, see `zhaquirks.tuya.DPToAttributeMapping`
+    skip_unchanged: bool = False
+    min_interval: float | None = None
+    deadband: float | None = None
 
 
 class TuyaClusterData(t.Struct):
@@ -130,6 +143,13 @@ class TuyaMCUCluster(TuyaAttributesCluster, TuyaNewManufCluster):
     set_time_offset = 1970  # MCU timestamp from 1/1/1970
     set_time_local_offset = None
 
+    # Datapoint writes are sent as one set_data frame each by default. With a
+    # window, writes are merged into as few frames as the payload size allows:
+    # 0 merges the writes of one event loop iteration (e.g. a multi-attribute
+    # write_attributes call), a positive value waits that many seconds.
+    coalesce_writes_window: float | None = None
+    max_payload_size: int = TUYA_MAX_PAYLOAD_SIZE
+
     class AttributeDefs(TuyaNewManufCluster.AttributeDefs):
         """Attribute Definitions."""
 
@@ -204,16 +224,87 @@ class TuyaMCUCluster(TuyaAttributesCluster, TuyaNewManufCluster):
         }
     )
 
+    def __init_subclass__(cls, **kwargs):
+        """Build the attribute to datapoint index of the subclass."""
+        super().__init_subclass__(**kwargs)
+        cls._dp_attribute_index = cls._build_dp_attribute_index()
+
+    @classmethod
+    def invalidate_dp_attribute_index(cls) -> None:
+        """Drop the attribute to datapoint index after changing `dp_to_attribute`.
+
+        Must be called when `dp_to_attribute` is replaced or changed after the class
+        was created, e.g. by the `TuyaQuirkBuilder`. The index is rebuilt on use.
+        """
+        if "_dp_attribute_index" in cls.__dict__:
+            del cls._dp_attribute_index
+
+    @classmethod
+    def _build_dp_attribute_index(
+        cls,
+    ) -> dict[tuple[int | None, str], list[tuple[int, int, DPToAttributeMapping]]]:
+        index = {}
+        for order, (dp, dp_mapping) in enumerate(cls.dp_to_attribute.items()):
+            attribute_names = dp_mapping.attribute_name
+            if not isinstance(attribute_names, tuple):
+                attribute_names = (attribute_names,)
+
+            for attribute_name in attribute_names:
+                index.setdefault((dp_mapping.endpoint_id, attribute_name), []).append(
+                    (order, dp, dp_mapping)
+                )
+
+        return index
+
+    @classmethod
+    def _get_dp_attribute_index(
+        cls,
+    ) -> dict[tuple[int | None, str], list[tuple[int, int, DPToAttributeMapping]]]:
+        """Return the (endpoint_id, attribute_name) -> [(order, dp, mapping)] index."""
+        index = cls.__dict__.get("_dp_attribute_index")
+        if index is None:
+            index = cls._dp_attribute_index = cls._build_dp_attribute_index()
+        return index
+
     def __init__(self, *args, **kwargs):
         """Init."""
         super().__init__(*args, **kwargs)
         # Cluster for endpoint: 1 (listen MCU commands)
         self.endpoint.device.command_bus = Bus()
         self.endpoint.device.command_bus.add_listener(self)
+        self._pending_datapoints: dict[
+            tuple[bool, int | None], dict[int, TuyaDatapointData]
+        ] = {}
+        self._flush_handle: asyncio.Handle | None = None
 
     def from_cluster_data(self, data: TuyaClusterData) -> Optional[TuyaCommand]:
         """Convert from cluster data to a tuya data payload."""
 
+        tuya_commands = []
+        for dp, mapping in self._cluster_data_dp_mapping(data).items():
+            cmd_payload = TuyaCommand()
+            cmd_payload.status = 0
+            cmd_payload.tsn = self.endpoint.device.application.get_sequence()
+            cmd_payload.datapoints = [self._to_datapoint(dp, mapping, data)]
+
+            tuya_commands.append(cmd_payload)
+        return tuya_commands
+
+    def _datapoints_from_cluster_data(
+        self, data: TuyaClusterData
+    ) -> list[TuyaDatapointData]:
+        """Convert from cluster data to tuya datapoints."""
+
+        return [
+            self._to_datapoint(dp, mapping, data)
+            for dp, mapping in self._cluster_data_dp_mapping(data).items()
+        ]
+
+    def _cluster_data_dp_mapping(
+        self, data: TuyaClusterData
+    ) -> dict[int, DPToAttributeMapping]:
+        """Search for the DPs mapped to the attribute of the cluster data."""
+
         dp_mapping = self.get_dp_mapping(data.endpoint_id, data.cluster_attr)
         self.debug("from_cluster_data: %s", dp_mapping)
         if len(dp_mapping) == 0:
@@ -222,37 +313,100 @@ class TuyaMCUCluster(TuyaAttributesCluster, TuyaNewManufCluster):
                 data.endpoint_id,
                 data.cluster_attr,
             )
-            return []
-
-        tuya_commands = []
-        for dp, mapping in dp_mapping.items():
-            cmd_payload = TuyaCommand()
-            cmd_payload.status = 0
-            cmd_payload.tsn = self.endpoint.device.application.get_sequence()
-
-            val = data.attr_value
-            if mapping.dp_converter:
-                args = []
-                if isinstance(mapping.attribute_name, tuple):
-                    endpoint = self.endpoint
-                    if mapping.endpoint_id:
-                        endpoint = endpoint.device.endpoints[mapping.endpoint_id]
-                    cluster = getattr(endpoint, mapping.ep_attribute)
-                    for attr in mapping.attribute_name:
-                        args.append(
-                            val if attr == data.cluster_attr else cluster.get(attr)
-                        )
-                else:
-                    args.append(val)
-                val = mapping.dp_converter(*args)
-            self.debug("value: %s", val)
-
-            dpd = TuyaDatapointData(dp, val)
-            self.debug("raw: %s", dpd.data.raw)
-            cmd_payload.datapoints = [dpd]
+        return dp_mapping
+
+    def _to_datapoint(
+        self, dp: int, mapping: DPToAttributeMapping, data: TuyaClusterData
+    ) -> TuyaDatapointData:
+        """Convert the cluster data value of a mapping to a tuya datapoint."""
+
+        val = data.attr_value
+        if mapping.dp_converter:
+            args = []
+            if isinstance(mapping.attribute_name, tuple):
+                endpoint = self.endpoint
+                if mapping.endpoint_id:
+                    endpoint = endpoint.device.endpoints[mapping.endpoint_id]
+                cluster = getattr(endpoint, mapping.ep_attribute)
+                for attr in mapping.attribute_name:
+                    args.append(val if attr == data.cluster_attr else cluster.get(attr))
+            else:
+                args.append(val)
+            val = mapping.dp_converter(*args)
+        self.debug("value: %s", val)
+
+        dpd = TuyaDatapointData(dp, val)
+        self.debug("raw: %s", dpd.data.raw)
+        return dpd
+
+    def _pack_datapoints(
+        self, datapoints: list[TuyaDatapointData]
+    ) -> list[TuyaCommand]:
+        """Pack datapoints into as few set_data payloads as fit the payload size."""
+
+        header_size = len(TuyaCommand(status=0, tsn=0, datapoints=[]).serialize())
+        limit = self.max_payload_size - ZCL_MANUFACTURER_HEADER_SIZE - header_size
+
+        frames: list[list[TuyaDatapointData]] = []
+        size = 0
+        for dpd in datapoints:
+            dp_size = len(dpd.serialize())
+            if not frames or size + dp_size > limit:
+                frames.append([])
+                size = 0
+            frames[-1].append(dpd)
+            size += dp_size
+
+        return [
+            TuyaCommand(
+                status=0,
+                tsn=self.endpoint.device.application.get_sequence(),
+                datapoints=frame,
+            )
+            for frame in frames
+        ]
 
-            tuya_commands.append(cmd_payload)
-        return tuya_commands
+    def _queue_datapoints(
+        self,
+        datapoints: list[TuyaDatapointData],
+        expect_reply: bool,
+        manufacturer: int | None,
+    ) -> None:
+        """Queue datapoints until the coalescing window ends."""
+
+        pending = self._pending_datapoints.setdefault((expect_reply, manufacturer), {})
+        for dpd in datapoints:
+            # a newer value of the same datapoint replaces the queued one
+            pending[dpd.dp] = dpd
+
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            if self.coalesce_writes_window:
+                self._flush_handle = loop.call_later(
+                    self.coalesce_writes_window, self._flush_datapoints
+                )
+            else:
+                self._flush_handle = loop.call_soon(self._flush_datapoints)
+
+    def _flush_datapoints(self) -> None:
+        """Send the queued datapoints."""
+
+        self._flush_handle = None
+        pending, self._pending_datapoints = self._pending_datapoints, {}
+
+        for (expect_reply, manufacturer), datapoints in pending.items():
+            tuya_commands = self._pack_datapoints(list(datapoints.values()))
+            self.debug("coalesced tuya_commands: %s", tuya_commands)
+
+            for tuya_command in tuya_commands:
+                self.create_catching_task(
+                    self.command(
+                        TUYA_SET_DATA,
+                        tuya_command,
+                        expect_reply=expect_reply,
+                        manufacturer=manufacturer,
+                    )
+                )
 
     def tuya_mcu_command(self, cluster_data: TuyaClusterData):
         """Tuya MCU command listener. Only manufacturer endpoint must listen to MCU commands."""
@@ -262,24 +416,34 @@ class TuyaMCUCluster(TuyaAttributesCluster, TuyaNewManufCluster):
             cluster_data,
         )
 
-        tuya_commands = self.from_cluster_data(cluster_data)
-        self.debug("tuya_commands: %s", tuya_commands)
-        if len(tuya_commands) == 0:
-            self.warning(
-                "no MCU command for data %s",
-                cluster_data,
+        if self.coalesce_writes_window is not None:
+            datapoints = self._datapoints_from_cluster_data(cluster_data)
+            if len(datapoints) == 0:
+                self.warning("no MCU command for data %s", cluster_data)
+                return
+
+            self._queue_datapoints(
+                datapoints, cluster_data.expect_reply, cluster_data.manufacturer
             )
-            return
-
-        for tuya_command in tuya_commands:
-            self.create_catching_task(
-                self.command(
-                    TUYA_SET_DATA,
-                    tuya_command,
-                    expect_reply=cluster_data.expect_reply,
-                    manufacturer=cluster_data.manufacturer,
+        else:
+            tuya_commands = self.from_cluster_data(cluster_data)
+            self.debug("tuya_commands: %s", tuya_commands)
+            if len(tuya_commands) == 0:
+                self.warning(
+                    "no MCU command for data %s",
+                    cluster_data,
+                )
+                return
+
+            for tuya_command in tuya_commands:
+                self.create_catching_task(
+                    self.command(
+                        TUYA_SET_DATA,
+                        tuya_command,
+                        expect_reply=cluster_data.expect_reply,
+                        manufacturer=cluster_data.manufacturer,
+                    )
                 )
-            )
 
         endpoint = self.endpoint.device.endpoints[cluster_data.endpoint_id]
         cluster = getattr(endpoint, cluster_data.cluster_name)
@@ -287,26 +451,21 @@ class TuyaMCUCluster(TuyaAttributesCluster, TuyaNewManufCluster):
 
     def get_dp_mapping(
         self, endpoint_id: int, attribute_name: str
-    ) -> Optional[tuple[int, DPToAttributeMapping]]:
-        """Search for the DP in dp_to_attribute."""
-
-        result = {}
-        for dp, dp_mapping in self.dp_to_attribute.items():
-            if (
-                attribute_name == dp_mapping.attribute_name
-                or (
-                    isinstance(dp_mapping.attribute_name, tuple)
-                    and attribute_name in dp_mapping.attribute_name
-                )
-            ) and (
-                (
-                    dp_mapping.endpoint_id is None
-                    and endpoint_id == self.endpoint.endpoint_id
-                )
-                or (endpoint_id == dp_mapping.endpoint_id)
-            ):
-                self.debug("get_dp_mapping --> found DP: %s", dp)
-                result[dp] = dp_mapping
+    ) -> dict[int, DPToAttributeMapping]:
+        """Search for the DPs mapped to an attribute in dp_to_attribute."""
+
+        index = self._get_dp_attribute_index()
+        matches = index.get((endpoint_id, attribute_name), [])
+
+        # mappings without an endpoint id belong to the endpoint of this cluster
+        if endpoint_id == self.endpoint.endpoint_id:
+            own_matches = index.get((None, attribute_name))
+            if own_matches:
+                matches = sorted(matches + own_matches) if matches else own_matches
+
+        result = {dp: dp_mapping for _, dp, dp_mapping in matches}
+        if result:
+            self.debug("get_dp_mapping --> found DPs: %s", list(result))
         return result
 
     def handle_mcu_version_response(self, payload: MCUVersion) -> foundation.Status:
@@ -530,7 +689,7 @@ class MoesSwitchManufCluster(TuyaOnOffManufCluster):
             14: DPToAttributeMapping(
                 TuyaMCUCluster.ep_attribute,
                 "power_on_state",
-                converter=lambda x: PowerOnState(x),
+                converter=DPConverter(enum_map=PowerOnState),
             )
         }
     )
@@ -539,7 +698,7 @@ class MoesSwitchManufCluster(TuyaOnOffManufCluster):
             15: DPToAttributeMapping(
                 TuyaMCUCluster.ep_attribute,
                 "backlight_mode",
-                converter=lambda x: MoesBacklight(x),
+                converter=DPConverter(enum_map=MoesBacklight),
             ),
         }
     )
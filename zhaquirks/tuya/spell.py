@@ -0,0 +1,193 @@
+"""Fleet-wide scheduling of Tuya spells."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import dataclasses
+import heapq
+import itertools
+import logging
+import weakref
+
+from zigpy.device import Device
+import zigpy.types as t
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_ROUTER = 0
+PRIORITY_END_DEVICE = 1
+
+
+@dataclasses.dataclass
+class SpellStats:
+    """Outcome of the spells cast on a device."""
+
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    skips: int = 0
+    last_error: str | None = None
+    last_duration: float | None = None
+
+
+class SpellScheduler:
+    """Cast Tuya spells of many devices with a bounded number in flight.
+
+    When a whole network configures at once, e.g. after a coordinator change, only
+    `max_concurrent` devices are spelled at a time. Mains powered routers go first,
+    as they relay the traffic of the other devices. A failing spell is retried up to
+    `retries` times, waiting `backoff` seconds doubled on every retry, at most
+    `max_backoff`, without holding a slot meanwhile.
+
+    With `skip_same_firmware`, a spell that already succeeded for the firmware of
+    a device is not cast again, e.g. while a whole network is restored at once.
+    It is off by default, as an explicit reconfiguration must always cast.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        *,
+        retries: int = 2,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        skip_same_firmware: bool = False,
+    ) -> None:
+        """Init the scheduler."""
+        self.max_concurrent = max_concurrent
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.skip_same_firmware = skip_same_firmware
+        self.stats: dict[t.EUI64, SpellStats] = {}
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._firmware: weakref.WeakKeyDictionary[Device, Hashable] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def active(self) -> int:
+        """Number of spells being cast."""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """Number of devices waiting to be spelled."""
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    @staticmethod
+    def priority(device: Device) -> int:
+        """Return the priority of a device, lower goes first."""
+        node_desc = device.node_desc
+        if node_desc is not None and node_desc.is_mains_powered and node_desc.is_router:
+            return PRIORITY_ROUTER
+        return PRIORITY_END_DEVICE
+
+    async def _acquire(self, priority: int) -> None:
+        # waiters are only queued while all slots are taken
+        if self._active < self.max_concurrent:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # the slot was handed over right before cancelling
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self._active -= 1
+
+    async def cast(
+        self,
+        device: Device,
+        spell: Callable[[], Awaitable[None]],
+        firmware: Callable[[], Hashable | None] | None = None,
+    ) -> bool:
+        """Cast the spell of a device, returning whether it was cast.
+
+        With `firmware`, returning the firmware version of the device if known, the
+        spell is skipped when it already succeeded for that device and firmware if
+        `skip_same_firmware` is set. The error of the last attempt is raised if all
+        attempts failed.
+        """
+        stats = self.stats.setdefault(device.ieee, SpellStats())
+
+        if firmware is not None and self.skip_same_firmware:
+            version = firmware()
+            if version is not None and self._firmware.get(device) == version:
+                stats.skips += 1
+                _LOGGER.debug(
+                    "Skipping Tuya spell of %s, already cast for firmware %s",
+                    device.ieee,
+                    version,
+                )
+                return False
+
+        loop = asyncio.get_running_loop()
+        priority = self.priority(device)
+        delay = self.backoff
+        attempt = 0
+
+        while True:
+            await self._acquire(priority)
+            stats.attempts += 1
+            start = loop.time()
+            try:
+                await spell()
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                stats.failures += 1
+                stats.last_error = repr(exc)
+                if attempt >= self.retries:
+                    raise
+                _LOGGER.debug(
+                    "Tuya spell of %s failed, retrying in %.1fs: %r",
+                    device.ieee,
+                    delay,
+                    exc,
+                )
+            else:
+                stats.successes += 1
+                stats.last_error = None
+                stats.last_duration = loop.time() - start
+                if firmware is not None and (version := firmware()) is not None:
+                    self._firmware[device] = version
+                return True
+            finally:
+                self._release()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+            attempt += 1
+
+
+class _SpellSettings:
+    """Mutable settings shared by all Tuya devices."""
+
+    scheduler = SpellScheduler()
+
+
+_SETTINGS = _SpellSettings()
+
+
+def set_spell_scheduler(scheduler: SpellScheduler) -> None:
+    """Set the scheduler casting the spells of all Tuya devices."""
+    _SETTINGS.scheduler = scheduler
+
+
+def get_spell_scheduler() -> SpellScheduler:
+    """Return the scheduler casting the spells of all Tuya devices."""
+    return _SETTINGS.scheduler
@@ -15,6 +15,10 @@ from zhaquirks.const import (
     OUTPUT_CLUSTERS,
     PROFILE_ID,
 )
+from zhaquirks.telemetry import (
+    ElectricalMeasurementAggregationMixin,
+    MeteringAggregationMixin,
+)
 from zhaquirks.tuya import TuyaManufClusterAttributes, TuyaOnOff, TuyaSwitch
 
 TUYA_TOTAL_ENERGY_ATTR = 0x0211
@@ -64,7 +68,9 @@ class TuyaManufClusterDinPower(TuyaManufClusterAttributes):
             )
 
 
-class TuyaPowerMeasurement(LocalDataCluster, ElectricalMeasurement):
+class TuyaPowerMeasurement(
+    ElectricalMeasurementAggregationMixin, LocalDataCluster, ElectricalMeasurement
+):
     """Custom class for power, voltage and current measurement."""
 
     POWER_ID = 0x050B
@@ -116,7 +122,7 @@ class TuyaPowerMeasurement(LocalDataCluster, ElectricalMeasurement):
         self._update_attribute(self.TOTAL_REACTIVE_POWER_ID, value)
 
 
-class TuyaElectricalMeasurement(LocalDataCluster, Metering):
+class TuyaElectricalMeasurement(MeteringAggregationMixin, LocalDataCluster, Metering):
     """Custom class for total energy measurement."""
 
     CURRENT_DELIVERED_ID = 0x0000
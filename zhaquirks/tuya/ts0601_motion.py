@@ -12,6 +12,7 @@ import zigpy.types as t
 from zigpy.zcl.clusters.measurement import IlluminanceMeasurement, OccupancySensing
 from zigpy.zcl.clusters.security import IasZone
 
+from zhaquirks.scheduler import cluster_persist_key, get_deadline_scheduler
 from zhaquirks.tuya import TuyaLocalCluster
 from zhaquirks.tuya.builder import TuyaQuirkBuilder
 
@@ -36,11 +37,13 @@ class TuyaMotionWithReset(IasZone, TuyaLocalCluster):
         """Init."""
         super().__init__(*args, **kwargs)
         self._loop = asyncio.get_running_loop()
-        self._timer_handle = None
+        self._scheduler = get_deadline_scheduler(self._loop)
+        self._scheduler.restore(
+            self, cluster_persist_key(self, "reset"), self._turn_off
+        )
 
     def _turn_off(self) -> None:
         """Reset IAS zone status."""
-        self._timer_handle = None
         self.debug("%s - Resetting Tuya motion sensor", self.endpoint.device.ieee)
         self._update_attribute(IasZone.AttributeDefs.zone_status.id, 0)
 
@@ -51,9 +54,12 @@ class TuyaMotionWithReset(IasZone, TuyaLocalCluster):
             and value == IasZone.ZoneStatus.Alarm_1
         ):
             self.debug("%s - Received Tuya motion event", self.endpoint.device.ieee)
-            if self._timer_handle:
-                self._timer_handle.cancel()
-            self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+            self._scheduler.schedule(
+                self,
+                self.reset_s,
+                self._turn_off,
+                persist_key=cluster_persist_key(self, "reset"),
+            )
 
         super()._update_attribute(attrid, value)
 
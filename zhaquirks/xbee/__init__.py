@@ -47,6 +47,11 @@ ATTR_PRESENT_VALUE = 0x0055
 PIN_ANALOG_OUTPUT = 2
 
 REMOTE_AT_COMMAND_TIMEOUT = 30
+REMOTE_AT_BATCH_WINDOW = 8
+# maximum unencrypted unicast payload, the NP command returns it for a network
+SERIAL_MAX_PAYLOAD = 84
+# frames in flight are delivered independently and may arrive out of order
+SERIAL_STREAM_WINDOW = 1
 
 
 # https://github.com/zigpy/zigpy-xbee/blob/dev/zigpy_xbee/api.py
@@ -201,6 +206,53 @@ class ATCommandResult(enum.IntEnum):
     TX_FAILURE = 4
 
 
+class ATRequestTable:
+    """Remote AT requests of a device awaiting their response, by frame id.
+
+    Frame ids are allocated per device, skipping the ids still awaiting a response,
+    so up to 255 requests can be in flight for every device. Requests are removed
+    once they are answered, fail, time out or are cancelled.
+    """
+
+    MAX_FRAME_ID = 255
+
+    def __init__(self) -> None:
+        """Init the table."""
+        self._pending: dict[int, asyncio.Future] = {}
+        self._next_frame_id = 1
+        self.expired = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of requests awaiting their response."""
+        return len(self._pending)
+
+    def allocate(self) -> tuple[int, asyncio.Future]:
+        """Allocate a frame id and the future resolved with its response."""
+        if len(self._pending) >= self.MAX_FRAME_ID:
+            raise RuntimeError("No free frame id for a remote AT command")
+
+        frame_id = self._next_frame_id
+        while frame_id in self._pending:
+            frame_id = (frame_id % self.MAX_FRAME_ID) + 1
+        self._next_frame_id = (frame_id % self.MAX_FRAME_ID) + 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[frame_id] = future
+        future.add_done_callback(lambda fut: self._done(frame_id, fut))
+        return frame_id, future
+
+    def pop(self, frame_id: int) -> asyncio.Future | None:
+        """Return the request awaiting the response of a frame id, if any."""
+        return self._pending.pop(frame_id, None)
+
+    def _done(self, frame_id: int, future: asyncio.Future) -> None:
+        if self._pending.get(frame_id) is future:
+            del self._pending[frame_id]
+        if future.cancelled():
+            self.expired += 1
+
+
 class XBeeBasic(LocalDataCluster, Basic):
     """XBee Basic Cluster."""
 
@@ -288,12 +340,8 @@ class XBeeRemoteATRequest(LocalDataCluster):
         for k, v in zip(range(1, len(AT_COMMANDS) + 1), AT_COMMANDS.items())
     }
 
-    _seq: int = 1
-
-    def _save_at_request(self, frame_id, future):
-        self._endpoint.in_clusters[XBEE_AT_RESPONSE_CLUSTER].save_at_request(
-            frame_id, future
-        )
+    def _new_at_request(self):
+        return self._endpoint.in_clusters[XBEE_AT_RESPONSE_CLUSTER].new_at_request()
 
     def remote_at_command(self, cmd_name, *args, apply_changes=True, **kwargs):
         """Execute a Remote AT Command and Return Response."""
@@ -326,8 +374,7 @@ class XBeeRemoteATRequest(LocalDataCluster):
 
     async def _command(self, options, command, data, *args):
         _LOGGER.debug("Command %s %s", command, data)
-        frame_id = self._seq
-        self._seq = (self._seq % 255) + 1
+        frame_id, future = self._new_at_request()
         schema = (
             t.uint8_t,
             t.uint8_t,
@@ -352,9 +399,6 @@ class XBeeRemoteATRequest(LocalDataCluster):
             schema,
         )
 
-        future = asyncio.Future()
-        self._save_at_request(frame_id, future)
-
         try:
             await self._endpoint.device.application.request(
                 self._endpoint.device,
@@ -421,11 +465,14 @@ class XBeeRemoteATResponse(LocalDataCluster):
 
     cluster_id = XBEE_AT_RESPONSE_CLUSTER
 
-    _awaiting = {}
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self.at_requests = ATRequestTable()
 
-    def save_at_request(self, frame_id, future):
-        """Save pending request."""
-        self._awaiting[frame_id] = (future,)
+    def new_at_request(self):
+        """Allocate the frame id and future of a new request."""
+        return self.at_requests.allocate()
 
     def handle_cluster_request(
         self,
@@ -440,7 +487,13 @@ class XBeeRemoteATResponse(LocalDataCluster):
                 "Remote AT command response: %s",
                 (args.frame_id, args.cmd, args.status, args.value),
             )
-            (fut,) = self._awaiting.pop(args.frame_id)
+            fut = self.at_requests.pop(args.frame_id)
+            if fut is None or fut.done():
+                _LOGGER.debug(
+                    "Ignoring response to expired AT command frame %s", args.frame_id
+                )
+                return
+
             try:
                 status = ATCommandResult(args.status)
             except ValueError:
@@ -493,32 +546,31 @@ class XBeeDigitalIOCluster(LocalDataCluster, BinaryInput):
         Update the digital pin states
         """
         if hdr.command_id == SAMPLE_DATA_CMD:
-            values = args.io_sample
-            if "digital_samples" in values:
-                # Update digital inputs
-                active_pins = [
-                    i for i, x in enumerate(values["digital_samples"]) if x is not None
-                ]
-                for pin in active_pins:
-                    # pylint: disable=W0212
-                    self._endpoint.device[0xD0 + pin].on_off._update_attribute(
-                        ATTR_ON_OFF, values["digital_samples"][pin]
-                    )
-            if "analog_samples" in values:
-                # Update analog inputs
-                active_pins = [
-                    i for i, x in enumerate(values["analog_samples"]) if x is not None
-                ]
-                for pin in active_pins:
-                    # pylint: disable=W0212
-                    self._endpoint.device[0xD0 + pin].analog_input._update_attribute(
-                        ATTR_PRESENT_VALUE,
-                        values["analog_samples"][pin]
-                        / (10.23 if pin != 7 else 1000),  # supply voltage is in mV
-                    )
+            io_sample = args.io_sample
+            for sample_set in getattr(io_sample, "sample_sets", [io_sample]):
+                self._update_pins(sample_set)
         else:
             super().handle_cluster_request(hdr, args)
 
+    def _update_pins(self, values):
+        """Update the pins whose value changed in a sample set."""
+        device = self._endpoint.device
+        for pin, value in enumerate(values.get("digital_samples", ())):
+            if value is None:
+                continue
+            cluster = device[0xD0 + pin].on_off
+            if cluster.get(ATTR_ON_OFF) != value:
+                cluster._update_attribute(ATTR_ON_OFF, value)  # pylint: disable=W0212
+
+        for pin, value in enumerate(values.get("analog_samples", ())):
+            if value is None:
+                continue
+            value = value / (10.23 if pin != 7 else 1000)  # supply voltage is in mV
+            cluster = device[0xD0 + pin].analog_input
+            if cluster.get(ATTR_PRESENT_VALUE) != value:
+                # pylint: disable=W0212
+                cluster._update_attribute(ATTR_PRESENT_VALUE, value)
+
     client_commands = {}
     server_commands = {
         SAMPLE_DATA_CMD: foundation.ZCLCommandDef(
@@ -549,12 +601,119 @@ class XBeeEventRelayCluster(EventableCluster, LocalDataCluster, LevelControl):
     )
 
 
+class XBeeSerialWriter:
+    """Stream-like writer of serial data to an XBee device.
+
+    Written data is sent in frames of at most `chunk_size` bytes, with up to
+    `window` frames in flight. Frames are submitted in order, but with a `window`
+    above 1 a frame retried by the network can arrive after the next one, so the
+    device may receive the bytes reordered. Only use a larger window if the
+    protocol spoken over the serial link tolerates that. Like with asyncio
+    streams, `drain()` waits for the written data to be sent and raises the first
+    error sending it.
+    """
+
+    def __init__(self, cluster, reader_cluster, reader, chunk_size, window):
+        """Init the writer."""
+        self._cluster = cluster
+        self._reader_cluster = reader_cluster
+        self._reader = reader
+        self._chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(window)
+        self._buffer = bytearray()
+        self._in_flight: set[asyncio.Task] = set()
+        self._sender: asyncio.Task | None = None
+        self._error: Exception | None = None
+        self._closing = False
+
+    def write(self, data: bytes) -> None:
+        """Write data to the stream."""
+        if self._closing:
+            raise RuntimeError("Serial stream is closed")
+
+        self._buffer += data
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.get_running_loop().create_task(self._send())
+
+    async def drain(self) -> None:
+        """Wait until all written data was sent."""
+        while (self._sender is not None and not self._sender.done()) or (
+            self._in_flight
+        ):
+            await asyncio.wait({self._sender, *self._in_flight} - {None})
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            self._buffer.clear()
+            raise error
+
+    def close(self) -> None:
+        """Close the stream, data already written is still sent."""
+        self._closing = True
+        self._reader_cluster.close_stream(self._reader)
+
+    def is_closing(self) -> bool:
+        """Return whether the stream is closed or closing."""
+        return self._closing
+
+    async def wait_closed(self) -> None:
+        """Wait until the stream is closed."""
+        await self.drain()
+
+    async def _send(self) -> None:
+        while self._buffer and self._error is None:
+            await self._semaphore.acquire()
+            chunk = bytes(self._buffer[: self._chunk_size])
+            del self._buffer[: self._chunk_size]
+            task = asyncio.get_running_loop().create_task(self._send_chunk(chunk))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send_chunk(self, chunk: bytes) -> None:
+        try:
+            await self._cluster.send_frame(chunk)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            if self._error is None:
+                self._error = exc
+        finally:
+            self._semaphore.release()
+
+
 class XBeeSerialDataCluster(LocalDataCluster):
     """Serial Data Cluster for the XBee."""
 
     cluster_id = XBEE_DATA_CLUSTER
     ep_attribute = "xbee_serial_data"
 
+    _stream_reader: asyncio.StreamReader | None = None
+
+    def open_stream(self) -> asyncio.StreamReader:
+        """Collect incoming data in a stream reader."""
+        self.close_stream()
+        self._stream_reader = asyncio.StreamReader()
+        return self._stream_reader
+
+    def close_stream(self, reader: asyncio.StreamReader | None = None) -> None:
+        """Stop collecting incoming data, ending the stream of the reader."""
+        if reader is not None and reader is not self._stream_reader:
+            return
+        if self._stream_reader is not None:
+            self._stream_reader.feed_eof()
+            self._stream_reader = None
+
+    async def send_frame(self, data: bytes):
+        """Send data in a single frame."""
+        return await self._endpoint.device.application.request(
+            self._endpoint.device,
+            XBEE_PROFILE_ID,
+            XBEE_DATA_CLUSTER,
+            XBEE_DATA_ENDPOINT,
+            XBEE_DATA_ENDPOINT,
+            self._endpoint.device.application.get_sequence(),
+            data,
+            expect_reply=False,
+        )
+
     async def command(
         self,
         command_id,
@@ -570,18 +729,7 @@ class XBeeSerialDataCluster(LocalDataCluster):
             foundation.GeneralCommand.Default_Response
         ].schema(
             command_id=0x00,
-            status=(
-                await self._endpoint.device.application.request(
-                    self._endpoint.device,
-                    XBEE_PROFILE_ID,
-                    XBEE_DATA_CLUSTER,
-                    XBEE_DATA_ENDPOINT,
-                    XBEE_DATA_ENDPOINT,
-                    self._endpoint.device.application.get_sequence(),
-                    data,
-                    expect_reply=False,
-                )
-            )[0],
+            status=(await self.send_frame(data))[0],
         )
 
     def handle_cluster_request(
@@ -593,6 +741,8 @@ class XBeeSerialDataCluster(LocalDataCluster):
     ):
         """Handle incoming data."""
         if hdr.command_id == DATA_IN_CMD:
+            if self._stream_reader is not None:
+                self._stream_reader.feed_data(args.data.serialize())
             self._endpoint.out_clusters[LevelControl.cluster_id].handle_cluster_request(
                 hdr, {"data": args.data}
             )
@@ -627,6 +777,62 @@ class XBeeCommon(CustomDevice):
             .remote_at_command(command, *args, apply_changes=True, **kwargs)
         )
 
+    async def remote_at_batch(
+        self, commands, *, window=REMOTE_AT_BATCH_WINDOW, write=False
+    ):
+        """Execute remote AT commands concurrently and apply the changes once.
+
+        `commands` are AT command names, or tuples of a name and its parameter. At
+        most `window` commands await their response at a time. The changes are
+        applied with a single AC command at the end, or also written to non-volatile
+        memory with WR if `write` is set. Returns the response or exception of every
+        command, in order.
+        """
+        request_cluster = self.endpoints[XBEE_AT_ENDPOINT].out_clusters[
+            XBEE_AT_REQUEST_CLUSTER
+        ]
+        semaphore = asyncio.Semaphore(window)
+
+        async def _remote_at(command):
+            name, *args = (command,) if isinstance(command, str) else command
+            async with semaphore:
+                return await request_cluster.remote_at_command(
+                    name, *args, apply_changes=False
+                )
+
+        results = await asyncio.gather(
+            *(_remote_at(command) for command in commands), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+
+        # remote_at() sets the apply changes option, so WR applies the changes too
+        await self.remote_at("WR" if write else "AC")
+
+        return results
+
+    def open_serial_stream(
+        self, *, chunk_size=SERIAL_MAX_PAYLOAD, window=SERIAL_STREAM_WINDOW
+    ):
+        """Open a stream of serial data, returning a reader and a writer.
+
+        Incoming data is collected in the reader, also while events are sent for it.
+        Closing the writer ends the stream of the reader. Frames are sent one at a
+        time by default, see `XBeeSerialWriter` for the ordering of a larger window.
+        """
+        endpoint = self.endpoints[XBEE_DATA_ENDPOINT]
+        reader_cluster = endpoint.in_clusters[XBEE_DATA_CLUSTER]
+        reader = reader_cluster.open_stream()
+        writer = XBeeSerialWriter(
+            endpoint.out_clusters[XBEE_DATA_CLUSTER],
+            reader_cluster,
+            reader,
+            chunk_size,
+            window,
+        )
+        return reader, writer
+
     def deserialize(self, endpoint_id, cluster_id, data):
         """Deserialize."""
         if endpoint_id == 0:
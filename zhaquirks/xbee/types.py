@@ -39,10 +39,31 @@ class BinaryString(str):
         return (cls(data), b"")
 
 
+DIGITAL_PINS = 15
+ANALOG_PINS = 8
+
+# indices of the bits set in every byte, to look up the pins enabled in a mask
+_BIT_INDICES = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+
+def _mask_pins(mask: int, num_pins: int) -> tuple[int, ...]:
+    """Return the indices of the pins enabled in a channel mask."""
+    pins: list[int] = []
+    offset = 0
+    while mask and offset < num_pins:
+        pins.extend(offset + bit for bit in _BIT_INDICES[mask & 0xFF])
+        mask >>= 8
+        offset += 8
+    return tuple(pin for pin in pins if pin < num_pins)
+
+
 class IOSample(dict):
     """Parse an XBee IO sample report."""
 
     serialize = None
+    sample_sets: list[dict[str, list[int | None]]]
 
     @classmethod
     def deserialize(cls, data):
@@ -52,56 +73,52 @@ class IOSample(dict):
         Sample set count byte 0
         Digital mask byte 1, 2
         Analog mask byte 3
-        Digital samples byte 4, 5 (if any sample exists)
-        Analog Sample, 2 bytes per
+        Per sample set:
+            Digital samples 2 bytes (if any digital pin is enabled)
+            Analog Sample, 2 bytes per enabled analog pin
+
+        The sample holds the `digital_samples` and `analog_samples` of the last
+        sample set, all sample sets are in its `sample_sets` attribute, oldest first.
         """
-        sample_sets = int.from_bytes(data[0:1], byteorder="big")
-        if sample_sets != 1:
-            raise ValueError("Number of sets is not 1")
-        digital_mask = data[1:3]
-        analog_mask = data[3:4]
-        digital_sample = data[4:6]
-        num_bits = 15
-        digital_pins = [
-            (int.from_bytes(digital_mask, byteorder="big") >> bit) & 1
-            for bit in range(num_bits - 1, -1, -1)
-        ]
-        digital_pins = list(reversed(digital_pins))
-        analog_pins = [
-            (int.from_bytes(analog_mask, byteorder="big") >> bit) & 1
-            for bit in range(8 - 1, -1, -1)
-        ]
-        analog_pins = list(reversed(analog_pins))
-        if 1 in digital_pins:
-            digital_samples: list[int | None] = [
-                (int.from_bytes(digital_sample, byteorder="big") >> bit) & 1
-                for bit in range(num_bits - 1, -1, -1)
-            ]
-            digital_samples = list(reversed(digital_samples))
-            sample_index = 6
-        else:
-            # skip digital samples block
-            digital_samples = digital_pins
-            sample_index = 4
-        analog_samples = []
-        for apin in analog_pins:
-            if apin == 1:
-                analog_samples.append(
-                    int.from_bytes(
-                        data[sample_index : sample_index + 2], byteorder="big"
-                    )
+        if len(data) < 4:
+            raise ValueError("IO sample is too short")
+
+        num_sets = data[0]
+        if not num_sets:
+            raise ValueError("IO sample has no sample sets")
+
+        digital_pins = _mask_pins(int.from_bytes(data[1:3], "big"), DIGITAL_PINS)
+        analog_pins = _mask_pins(data[3], ANALOG_PINS)
+        set_size = (2 if digital_pins else 0) + 2 * len(analog_pins)
+        sample_index = 4
+        if len(data) < sample_index + num_sets * set_size:
+            raise ValueError("IO sample is too short for its sample sets")
+
+        sample_sets = []
+        for _ in range(num_sets):
+            digital_samples: list[int | None] = [None] * DIGITAL_PINS
+            if digital_pins:
+                digital_sample = int.from_bytes(
+                    data[sample_index : sample_index + 2], "big"
                 )
+                for pin in digital_pins:
+                    digital_samples[pin] = digital_sample >> pin & 1
                 sample_index += 2
-            else:
-                analog_samples.append(None)
-        for dpin in range(len(digital_pins)):
-            if digital_pins[dpin] == 0:
-                digital_samples[dpin] = None
-
-        return (
-            {
-                "digital_samples": digital_samples,
-                "analog_samples": analog_samples,
-            },
-            data[sample_index:],
-        )
+
+            analog_samples: list[int | None] = [None] * ANALOG_PINS
+            for pin in analog_pins:
+                analog_samples[pin] = int.from_bytes(
+                    data[sample_index : sample_index + 2], "big"
+                )
+                sample_index += 2
+
+            sample_sets.append(
+                {
+                    "digital_samples": digital_samples,
+                    "analog_samples": analog_samples,
+                }
+            )
+
+        sample = cls(sample_sets[-1])
+        sample.sample_sets = sample_sets
+        return sample, data[sample_index:]
@@ -49,6 +49,10 @@ from zhaquirks.const import (
     VALUE,
     ZHA_SEND_EVENT,
 )
+from zhaquirks.telemetry import (
+    ElectricalMeasurementAggregationMixin,
+    MeteringAggregationMixin,
+)
 
 BATTERY_LEVEL = "battery_level"
 BATTERY_PERCENTAGE_REMAINING = 0x0021
@@ -127,10 +131,18 @@ class XiaomiQuickInitDevice(XiaomiCustomDevice, QuickInitDevice):
 class XiaomiCluster(CustomCluster):
     """Xiaomi cluster implementation."""
 
-    def _iter_parse_attr_report(
+    # String length offsets of the first valid interpretation of attribute reports,
+    # keyed by model and report length. Shared by all devices of a model.
+    _attr_report_offsets: dict[tuple[str | None, int], tuple[int, ...]] = {}
+    _MAX_ATTR_REPORT_OFFSETS = 1024
+
+    def _iter_parse_attr_report_offsets(
         self, data: bytes
-    ) -> Iterator[tuple[foundation.Attribute, bytes]]:
-        """Yield all interpretations of the first attribute in a Xiaomi report."""
+    ) -> Iterator[tuple[int | None, foundation.Attribute, bytes]]:
+        """Yield all interpretations of the first attribute with their length offset.
+
+        The offset is `None` for attributes that are assumed to be reported correctly.
+        """
 
         # Peek at the attribute report
         attr_id, data = t.uint16_t.deserialize(data)
@@ -149,7 +161,7 @@ class XiaomiCluster(CustomCluster):
             data = attr_id.serialize() + attr_type.serialize() + data
             attribute, data = foundation.Attribute.deserialize(data)
 
-            yield attribute, data
+            yield None, attribute, data
             return
 
         # Length of the "string" can be wrong
@@ -167,6 +179,7 @@ class XiaomiCluster(CustomCluster):
             attr_type = 0x41  # The data type should be "Octet String"
 
             yield (
+                offset,
                 foundation.Attribute(
                     attrid=attr_id,
                     value=foundation.TypeValue(type=attr_type, value=attr_val),
@@ -174,6 +187,14 @@ class XiaomiCluster(CustomCluster):
                 final_data,
             )
 
+    def _iter_parse_attr_report(
+        self, data: bytes
+    ) -> Iterator[tuple[foundation.Attribute, bytes]]:
+        """Yield all interpretations of the first attribute in a Xiaomi report."""
+
+        for _offset, attribute, remaining in self._iter_parse_attr_report_offsets(data):
+            yield attribute, remaining
+
     def _interpret_attr_reports(
         self, data: bytes
     ) -> Iterable[tuple[foundation.Attribute]]:
@@ -192,6 +213,72 @@ class XiaomiCluster(CustomCluster):
             for remaining_attrs in self._interpret_attr_reports(remaining_data):
                 yield (attr,) + remaining_attrs
 
+    def _find_attr_report_interpretation(
+        self, data: bytes
+    ) -> tuple[tuple[foundation.Attribute, ...], tuple[int, ...]] | None:
+        """Return the first valid interpretation of a report and its length offsets.
+
+        Every remaining report is a suffix of `data`, suffixes that can not be parsed
+        are remembered by their length so each one is only tried once.
+        """
+        failed: set[int] = set()
+
+        def search(
+            data: bytes,
+        ) -> tuple[tuple[foundation.Attribute, ...], tuple[int, ...]] | None:
+            if not data:
+                return (), ()
+
+            if len(data) in failed:
+                return None
+
+            try:
+                parsed = list(self._iter_parse_attr_report_offsets(data))
+            except (KeyError, ValueError):
+                parsed = []
+
+            for offset, attr, remaining_data in parsed:
+                result = search(remaining_data)
+                if result is not None:
+                    attrs, offsets = result
+                    if offset is not None:
+                        offsets = (offset, *offsets)
+                    return (attr, *attrs), offsets
+
+            failed.add(len(data))
+            return None
+
+        return search(data)
+
+    def _parse_attr_report_with_offsets(
+        self, data: bytes, offsets: tuple[int, ...]
+    ) -> tuple[foundation.Attribute, ...] | None:
+        """Parse a report with known string length offsets, if they fit the report."""
+        attrs = []
+        offsets_iter = iter(offsets)
+
+        try:
+            while data:
+                candidates = list(self._iter_parse_attr_report_offsets(data))
+
+                if candidates[0][0] is None:
+                    _, attr, data = candidates[0]
+                else:
+                    expected = next(offsets_iter)
+                    match = [c for c in candidates if c[0] == expected]
+                    if not match:
+                        return None
+                    _, attr, data = match[0]
+
+                attrs.append(attr)
+        except (KeyError, ValueError, IndexError, StopIteration):
+            return None
+
+        if next(offsets_iter, None) is not None:
+            return None
+
+        return tuple(attrs)
+
     def deserialize(self, data):
         """Deserialize cluster data."""
         hdr, data = foundation.ZCLHeader.deserialize(data)
@@ -203,18 +290,34 @@ class XiaomiCluster(CustomCluster):
         ):
             return super().deserialize(hdr.serialize() + data)
 
-        reports = list(self._interpret_attr_reports(data))
+        key = (self.endpoint.device.model, len(data))
+        offsets = self._attr_report_offsets.get(key)
+        attrs = None
 
-        if not reports:
-            _LOGGER.warning("Failed to parse Xiaomi attribute report: %r", data)
-            return super().deserialize(hdr.serialize() + data)
-        elif len(reports) > 1:
-            _LOGGER.warning(
-                "Xiaomi attribute report has multiple valid interpretations: %r",
-                reports,
-            )
+        if offsets is not None:
+            attrs = self._parse_attr_report_with_offsets(data, offsets)
 
-        fixed_data = b"".join(attr.serialize() for attr in reports[0])
+        if attrs is None:
+            result = self._find_attr_report_interpretation(data)
+
+            if result is None:
+                _LOGGER.warning("Failed to parse Xiaomi attribute report: %r", data)
+                return super().deserialize(hdr.serialize() + data)
+
+            attrs, offsets = result
+            if len(self._attr_report_offsets) >= self._MAX_ATTR_REPORT_OFFSETS:
+                self._attr_report_offsets.clear()
+            self._attr_report_offsets[key] = offsets
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            reports = list(self._interpret_attr_reports(data))
+            if len(reports) > 1:
+                _LOGGER.debug(
+                    "Xiaomi attribute report has multiple valid interpretations: %r",
+                    reports,
+                )
+
+        fixed_data = b"".join(attr.serialize() for attr in attrs)
 
         return super().deserialize(hdr.serialize() + fixed_data)
 
@@ -632,7 +735,9 @@ class AnalogInputCluster(CustomCluster, AnalogInput):
             )
 
 
-class ElectricalMeasurementCluster(LocalDataCluster, ElectricalMeasurement):
+class ElectricalMeasurementCluster(
+    ElectricalMeasurementAggregationMixin, LocalDataCluster, ElectricalMeasurement
+):
     """Electrical measurement cluster to receive reports that are sent to the basic cluster."""
 
     POWER_ID = ElectricalMeasurement.AttributeDefs.active_power.id
@@ -658,7 +763,7 @@ class ElectricalMeasurementCluster(LocalDataCluster, ElectricalMeasurement):
             self._update_attribute(self.CONSUMPTION_ID, 0)
 
 
-class MeteringCluster(LocalDataCluster, Metering):
+class MeteringCluster(MeteringAggregationMixin, LocalDataCluster, Metering):
     """Metering cluster to receive reports that are sent to the basic cluster."""
 
     CURRENT_SUMM_DELIVERED_ID = Metering.AttributeDefs.current_summ_delivered.id
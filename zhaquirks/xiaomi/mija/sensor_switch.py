@@ -45,6 +45,7 @@ from zhaquirks.const import (
     UNKNOWN,
     ZHA_SEND_EVENT,
 )
+from zhaquirks.scheduler import get_deadline_scheduler
 from zhaquirks.xiaomi import (
     LUMI,
     XIAOMI_NODE_DESC,
@@ -80,7 +81,7 @@ class MijaButton(XiaomiQuickInitDevice):
             """Init."""
             self._current_state = {}
             self._loop = asyncio.get_running_loop()
-            self._timer_handle = None
+            self._scheduler = get_deadline_scheduler(self._loop)
             super().__init__(*args, **kwargs)
 
         def _update_attribute(self, attrid, value):
@@ -91,14 +92,10 @@ class MijaButton(XiaomiQuickInitDevice):
                 value = not value
 
                 if value:
-                    if self._timer_handle:
-                        self._timer_handle.cancel()
-                    self._timer_handle = self._loop.call_later(
-                        self.hold_duration, self._hold_timeout
+                    self._scheduler.schedule(
+                        self, self.hold_duration, self._hold_timeout
                     )
-                elif self._timer_handle:
-                    self._timer_handle.cancel()
-                    self._timer_handle = None
+                elif self._scheduler.cancel(self):
                     click_type = COMMAND_SINGLE
                 else:
                     self.listener_event(ZHA_SEND_EVENT, COMMAND_RELEASE, [])
@@ -117,7 +114,6 @@ class MijaButton(XiaomiQuickInitDevice):
         def _hold_timeout(self):
             """Handle hold timeout."""
 
-            self._timer_handle = None
             self.listener_event(ZHA_SEND_EVENT, COMMAND_HOLD, [])
 
     signature = {